@@ -3,6 +3,7 @@ import uuid
 import random
 import tensorflow as tf
 import hypergan as hg
+import hypergan.inputs.image_loader
 import hyperchamber as hc
 import numpy as np
 from hypergan.viewer import GlobalViewer
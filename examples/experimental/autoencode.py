@@ -5,6 +5,7 @@ import random
 import sys
 import tensorflow as tf
 import hypergan as hg
+import hypergan.inputs.image_loader
 import hyperchamber as hc
 import numpy as np
 import math
@@ -13,11 +13,9 @@ Please see [https://github.com/255BITS/HyperGAN](https://github.com/255BITS/Hype
 
 MIT - https://opensource.org/licenses/MIT
 """
-import hypergan
+__version__ = "0.10.1"
+
+# None of these import tensorflow at module level, components are imported when they are used
 from .gan import GAN
 from .cli import CLI
 from .configuration import Configuration
-import tensorflow as tf
-import hypergan.cli
-import hypergan as hg
-
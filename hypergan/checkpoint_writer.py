@@ -0,0 +1,120 @@
+"""
+Writes checkpoints on a background thread.
+
+`BaseGAN.save` fetches every saved variable in one `session.run` and hands the values to the writer.
+The writer loads them into a private copy of the variables, saves `<save_file>-<step>` with a `tf.train.Saver`
+built once, fsyncs it and atomically publishes it as `<save_file>`.  Only the last `keep` step checkpoints are kept.
+"""
+import glob
+import os
+import queue
+import threading
+import tensorflow as tf
+
+CHECKPOINT_SUFFIXES = [".data-00000-of-00001", ".index", ".meta"]
+
+class CheckpointWriter:
+    def __init__(self, variables, keep=1):
+        self.keep = keep
+        self.names = [v.op.name for v in variables]
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            self.placeholders = []
+            assigns = []
+            saved = {}
+            for v in variables:
+                shape = v.get_shape().as_list()
+                dtype = v.dtype.base_dtype
+                copy = tf.Variable(tf.zeros(shape, dtype=dtype), name=v.op.name, trainable=False)
+                placeholder = tf.placeholder(dtype, shape)
+                assigns.append(tf.assign(copy, placeholder))
+                self.placeholders.append(placeholder)
+                saved[v.op.name] = copy
+            self.assign = tf.group(assigns)
+            self.saver = tf.train.Saver(saved, max_to_keep=None, save_relative_paths=True)
+        self.session = tf.Session(graph=self.graph, config=tf.ConfigProto(device_count={'GPU': 0}))
+        self.queue = queue.Queue(maxsize=1)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def save(self, save_file, values, step):
+        """
+        Queues a snapshot.  A snapshot still waiting to be written is replaced by the newer one.
+        Raises the error of a failed earlier write.
+        """
+        self.raise_error()
+        while True:
+            try:
+                self.queue.put_nowait((save_file, values, step))
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        while True:
+            save_file, values, step = self.queue.get()
+            try:
+                self.write(save_file, values, step)
+            except Exception as e:
+                self.error = e
+                print("[hypergan] Error writing checkpoint", save_file, e)
+            finally:
+                self.queue.task_done()
+
+    def write(self, save_file, values, step):
+        self.session.run(self.assign, dict(zip(self.placeholders, values)))
+        step_file = "%s-%d" % (save_file, step)
+        self.saver.save(self.session, step_file, write_meta_graph=False, write_state=False)
+        for suffix in CHECKPOINT_SUFFIXES:
+            if os.path.exists(step_file + suffix):
+                fsync(step_file + suffix)
+        # Publish the data before the index that refers to it
+        for suffix in CHECKPOINT_SUFFIXES:
+            if os.path.exists(step_file + suffix):
+                publish(step_file + suffix, save_file + suffix)
+        self.rotate(save_file)
+        tf.train.update_checkpoint_state(os.path.dirname(save_file), save_file)
+
+    def rotate(self, save_file):
+        steps = {}
+        for filename in glob.glob(glob.escape(save_file) + "-*.index"):
+            step = filename[len(save_file)+1:-len(".index")]
+            if step.isdigit():
+                steps[int(step)] = filename[:-len(".index")]
+        for step in sorted(steps.keys())[:-self.keep]:
+            for suffix in CHECKPOINT_SUFFIXES:
+                if os.path.exists(steps[step] + suffix):
+                    os.remove(steps[step] + suffix)
+
+    def wait(self):
+        """Blocks until queued checkpoints are written.  Raises the error of a failed write."""
+        self.queue.join()
+        self.raise_error()
+
+    def raise_error(self):
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+def fsync(filename):
+    with open(filename, "rb") as f:
+        os.fsync(f.fileno())
+
+def publish(source, destination):
+    """Atomically makes `destination` a copy of `source`, hard linking when possible."""
+    tmp = destination + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(source, tmp)
+    except OSError:
+        with open(source, "rb") as src, open(tmp, "wb") as dst:
+            dst.write(src.read())
+            dst.flush()
+            os.fsync(dst.fileno())
+    os.replace(tmp, destination)
@@ -1,14 +1,18 @@
 """
 The command line interface.  Trains a directory of data.
 """
+import atexit
 import gc
 import sys
 import os
 import hyperchamber as hc
-import tensorflow as tf
 from hypergan.gan_component import ValidationException
-from .inputs import *
+from hypergan.registry import LazyModule
+from .inputs.input_monitor import InputMonitor
 from .viewer import GlobalViewer
+from .sample_writer import GlobalSampleWriter
+from .sample_sinks import sink_for
+from .metrics import GlobalMetricsWriter
 from .configuration import Configuration
 import hypergan as hg
 import time
@@ -17,10 +21,11 @@ import os
 import shutil
 import sys
 
-from hypergan.losses.supervised_loss import SupervisedLoss
-from hypergan.multi_component import MultiComponent
 from time import sleep
 
+# `new`, `--list-templates` and `--help` do not need tensorflow
+tf = LazyModule("tensorflow")
+
 
 class CLI:
     def __init__(self, gan, args={}):
@@ -42,6 +47,9 @@ class CLI:
 
         self.sampler_name = args.sampler
         self.sampler = None
+        self.input_monitor = None
+        if self.args.input_stats and self.gan is not None:
+            self.input_monitor = InputMonitor(self.gan, every=self.args.input_stats)
         self.validate()
         if self.args.save_file:
             self.save_file = self.args.save_file
@@ -58,17 +66,22 @@ class CLI:
         GlobalViewer.viewer_size = self.args.viewer_size
         GlobalViewer.enabled = self.args.viewer
         GlobalViewer.zoom = self.args.zoom
+        GlobalSampleWriter.enabled = not self.args.sync_samples
+        GlobalSampleWriter.set_ring_size(self.args.sample_ring)
+        GlobalViewer.on_scrub = GlobalSampleWriter.scrub
+        GlobalMetricsWriter.path = self.args.metrics_file
+        if self.args.save_samples and self.args.sample_sink not in [None, 'png']:
+            GlobalSampleWriter.sink = sink_for(self.args.sample_sink, "samples/%s" % self.config_name, fps=self.args.sample_fps or 30)
+            atexit.register(GlobalSampleWriter.close)
 
     def sample(self, allow_save=True):
         """ Samples to a file.  Useful for visualizing the learning process.
 
         If allow_save is False then saves will not be created.
 
-        Use with:
-
-             ffmpeg -i samples/grid-%06d.png -vcodec libx264 -crf 22 -threads 0 grid1-7.mp4
-
-        to create a video of the learning process.
+        By default every sample is a png in `samples/<config>`.  Use `--sample_sink video` to encode
+        a video of the learning process directly, or `--sample_sink raw` to append the frames to
+        `samples/<config>/frames.raw`.  See `hypergan.sample_sinks`.
         """
         sample_file="samples/%s/%06d.png" % (self.config_name, self.samples)
         self.create_path(sample_file)
@@ -88,37 +101,51 @@ class CLI:
                 raise ValidationException("No sampler found by the name '"+self.sampler_name+"'")
 
     def step(self):
+        """
+        Runs one `gan.step()` and returns the number of training updates it made.  Trainers with `fused_steps`
+        make several, and `--steps`, `--save_every` and `--sample_every` count updates.
+        """
         bgan = self.gan
+        start_time = time.time()
+        trainer = bgan.trainer
+        before = getattr(trainer, 'current_step', None)
         self.gan.step()
+        updates = 1
+        if before is not None:
+            updates = max(1, trainer.current_step - before)
+        if self.input_monitor is not None and not bgan.destroy:
+            self.input_monitor.after_step(self.steps, time.time() - start_time, updates)
         if bgan.destroy:
             self.sampler=None
             self.gan = self.gan.newgan
-            gc.collect()
-            refs = gc.get_referrers(bgan)
-            d = bgan.trainer._delegate
+            if self.input_monitor is not None:
+                self.input_monitor.gan = self.gan
+            # The new GAN was built in a fresh default graph by `BaseGAN.transition`
             bgan.trainer=None
-            gc.collect()
             del bgan
-            tf.reset_default_graph()
-
             gc.collect()
 
-        if(self.steps % self.sample_every == 0):
+        if crosses(self.steps, updates, self.sample_every):
             sample_list = self.sample()
 
-        self.steps+=1
+        self.steps += updates
+        return updates
 
     def create_path(self, filename):
         return os.makedirs(os.path.expanduser(os.path.dirname(filename)), exist_ok=True)
 
     def build(self):
         return self.gan.build()
-    def serve(self, gan):
-        return gan_server(self.gan.session, config)
+    def serve(self):
+        """ Serves `z` -> image requests, see `hypergan.gan_server`. """
+        from .gan_server import GANServer
+        server = GANServer(self.gan.session, self.gan.latent.sample, self.gan.generator.sample, max_latency=self.args.max_latency or 0.005, max_count=self.args.max_count)
+        server.serve(host=self.args.host or '127.0.0.1', port=self.args.port or 5000, socket_path=self.args.socket)
 
     def sample_forever(self):
         while not self.gan.destroy:
             self.sample()
+            GlobalSampleWriter.update_viewer()
             GlobalViewer.tick()
 
 
@@ -131,15 +158,16 @@ class CLI:
             fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
 
         while((i < self.total_steps or self.total_steps == -1) and not self.gan.destroy):
-            i+=1
+            start = i
             start_time = time.time()
-            self.step()
+            i += self.step()
+            GlobalSampleWriter.update_viewer()
             GlobalViewer.tick()
 
             if (self.args.save_every != None and
                 self.args.save_every != -1 and
                 self.args.save_every > 0 and
-                i % self.args.save_every == 0):
+                crosses(start + 1, i - start, self.args.save_every)):
                 print(" |= Saving network")
                 self.gan.save(self.save_file)
             if self.args.ipython:
@@ -168,9 +196,31 @@ class CLI:
 
         return
 
+    def preprocess(self):
+        """ Packs `directory` into record shards that `RecordLoader` streams.  See `hypergan.inputs.record_loader`."""
+        size = [int(x) for x in (self.args.size or '64x64x3').split("x")] + [None, None, None]
+        width = size[0] or 64
+        height = size[1] or 64
+        channels = size[2] or 3
+        output = self.args.output or os.path.normpath(self.args.directory) + "-%dx%dx%d" % (width, height, channels)
+        from .inputs.record_loader import write_records
+        index = write_records(self.args.directory, output,
+                channels=channels,
+                format=self.args.format,
+                crop=self.args.crop,
+                width=width,
+                height=height,
+                resize=self.args.resize,
+                shard_size=self.args.shard_size or 4096)
+        print("[hypergan] Wrote", index['count'], "records in", len(index['shards']), "shards to", output)
+        print("[hypergan] Train on them with `hypergan train "+output+" -s "+"%dx%dx%d" % (width, height, channels)+"`")
+        return index
+
     def add_supervised_loss(self):
         if self.args.classloss:
             print("[discriminator] Class loss is on.  Semi-supervised learning mode activated.")
+            from hypergan.losses.supervised_loss import SupervisedLoss
+            from hypergan.multi_component import MultiComponent
             supervised_loss = SupervisedLoss(self.gan, self.gan.config.loss)
             self.gan.loss = MultiComponent(components=[supervised_loss, self.gan.loss], combine='add')
             #EWW
@@ -187,7 +237,9 @@ class CLI:
             else:
                 print("Model loaded")
             self.train()
-            self.gan.save(self.save_file)
+            GlobalSampleWriter.close()
+            GlobalMetricsWriter.flush()
+            self.gan.save(self.save_file, block=True)
             tf.reset_default_graph()
             self.gan.session.close()
         elif self.method == 'build':
@@ -198,7 +250,11 @@ class CLI:
             self.build()
         elif self.method == 'new':
             self.new()
+        elif self.method == 'preprocess':
+            self.preprocess()
         elif self.method == 'sample':
+            # Sampling is the whole job here, write every frame instead of dropping them
+            GlobalSampleWriter.enabled = False
             self.add_supervised_loss()
             if not self.gan.load(self.save_file):
                 print("Initializing new model")
@@ -207,8 +263,15 @@ class CLI:
 
             tf.train.start_queue_runners(sess=self.gan.session)
             self.sample_forever()
+            GlobalSampleWriter.close()
             tf.reset_default_graph()
             self.gan.session.close()
+        elif self.method == 'serve':
+            if not self.gan.load(self.save_file):
+                raise ValidationException("Could not load model: " + self.save_file)
+            print("Model loaded")
+            self.serve()
+            self.gan.session.close()
         elif self.method == 'test':
             print("Hooray!")
             print("Hypergan is installed correctly.  Testing tensorflow for GPU support.")
@@ -230,3 +293,6 @@ class CLI:
             else:
                 print("There were errors in the test, please see the logs")
 
+def crosses(start, count, every):
+    """ True when one of the `count` steps from `start` is a multiple of `every`. """
+    return (start + count - 1) // every > (start - 1) // every
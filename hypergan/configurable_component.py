@@ -7,12 +7,71 @@ import os
 import operator
 from functools import reduce
 
-from hypergan.ops.tensorflow.extended_ops import bicubic_interp_2d
+from hypergan.ops.tensorflow.extended_ops import bicubic_interp_2d, chunked_attention
 from .gan_component import GANComponent
 
 class ConfigurationException(Exception):
     pass
 
+class LayerPlan:
+    """
+    A layer string such as `"conv 64 stride=2 avg_pool=1"` split once into its op, arguments and options.
+
+    Plans are cached by layer string.  Plain numbers and strings are converted when compiled; configurable params
+    such as `decay(range=1:0 steps=1000)` create tensors, so they are resolved by the gan on every build.
+    """
+    cache = {}
+
+    def __init__(self, layer):
+        parens = re.findall('\(.*?\)',layer)
+        for i, paren in enumerate(parens):
+            layer = layer.replace(paren, "PAREN"+str(i))
+        d = layer.split(' ')
+        for i, _d in enumerate(d):
+            for j, paren in enumerate(parens):
+                d[i] = d[i].replace("PAREN"+str(j), paren)
+        self.op = d[0]
+        self.args = []
+        self.options = []
+        for x in d[1:]:
+            if '=' in x:
+                lhs, rhs = x.split('=', 1)
+                self.options.append((lhs, rhs, literal(rhs)))
+            else:
+                self.args.append((x, literal(x)))
+
+    @staticmethod
+    def compile(layer):
+        plan = LayerPlan.cache.get(layer)
+        if plan is None:
+            plan = LayerPlan(layer)
+            LayerPlan.cache[layer] = plan
+        return plan
+
+    def resolve(self, gan):
+        """ Returns new `(args, options)` for one build.  Layers may modify the options they are given. """
+        args = [gan.configurable_param(x) if value is DEFERRED else value for x, value in self.args]
+        options = {}
+        for lhs, rhs, value in self.options:
+            options[lhs] = gan.configurable_param(rhs) if value is DEFERRED else value
+        return args, options
+
+DEFERRED = object()
+
+def literal(string):
+    """ The value of `string` as parsed by `BaseGAN.configurable_param`, or DEFERRED for configurable params. """
+    if "(" in string:
+        return DEFERRED
+    if re.match("^\d+$", string):
+        return int(string)
+    if re.match("^\d+?\.\d+?$", string):
+        return float(string)
+    return string
+
+def count_params(variables):
+    """ Number of parameters in `variables`. """
+    return sum([reduce(operator.mul, [int(d) for d in v.get_shape()], 1) for v in variables])
+
 class ConfigurableComponent:
     def __init__(self, gan, config, name=None, input=None, reuse=None, x=None, g=None, features=[], skip_connections=[]):
         self.layers = []
@@ -92,11 +151,16 @@ class ConfigurableComponent:
     def build(self, net, replace_controls={}):
         self.replace_controls=replace_controls
         config = self.config
+        trainable = tf.get_default_graph().get_collection_ref(tf.GraphKeys.TRAINABLE_VARIABLES)
+        first = len(trainable)
 
         for layer in config.layers:
             net = self.parse_layer(net, layer)
             self.layers += [net]
 
+        if not getattr(self, "summarized", False):
+            self.summarized = True
+            self.print_summary(count_params(trainable[first:]))
         return net
 
     def parse_args(self, strs):
@@ -127,39 +191,52 @@ class ConfigurableComponent:
             return net
 
         else:
-            parens = re.findall('\(.*?\)',layer)
-            for i, paren in enumerate(parens):
-                layer = layer.replace(paren, "PAREN"+str(i))
-            d = layer.split(' ')
-            for i, _d in enumerate(d):
-                for j, paren in enumerate(parens):
-                    d[i] = d[i].replace("PAREN"+str(j), paren)
-            op = d[0]
-            args, options = self.parse_args(d[1:])
+            plan = LayerPlan.compile(layer)
+            args, options = plan.resolve(self.gan)
         
-            net = self.build_layer(net, op, args, options)
+            net = self.build_layer(net, plan.op, args, options)
             return net
             
 
     def build_layer(self, net, op, args, options):
         if self.layer_ops[op]:
-            before = self.variables()
-            before_count = self.count_number_trainable_params()
-            net = self.layer_ops[op](net, args, options)
+            ops = self.ops
+            trainable = tf.get_default_graph().get_collection_ref(tf.GraphKeys.TRAINABLE_VARIABLES)
+            before = (len(ops.biases), len(ops.weights), len(trainable))
+            depth = getattr(self, "_layer_depth", 0)
+            row = [op, args, 0, None, depth]
+            if not getattr(self, "summarized", False):
+                # Only the first build is summarized, later builds reuse its variables
+                if not hasattr(self, "layer_summary"):
+                    self.layer_summary = []
+                self.layer_summary.append(row)
+            self._layer_depth = depth + 1
+            try:
+                net = self.layer_ops[op](net, args, options)
+            finally:
+                self._layer_depth = depth
             if 'name' in options:
                 self.set_layer(options['name'], net)
 
-            after = self.variables()
-            new = set(after) - set(before)
+            new = ops.biases[before[0]:] + ops.weights[before[1]:]
             for j in new:
                 self.layer_options[j]=options
-            after_count = self.count_number_trainable_params()
-            print("number of params in layer ", op, args, after_count-before_count)
+            row[2] = count_params(trainable[before[2]:])
+            if hasattr(net, "get_shape") and net.get_shape().ndims is not None:
+                row[3] = net.get_shape().as_list()
         else:
             print("ConfigurableComponent: Op not defined", op)
 
         return net
 
+    def print_summary(self, total):
+        """ Prints the layers built by `build` with their output shapes and parameter counts. """
+        lines = ["[hypergan] " + self.ops.description + " " + str(len(self.layer_summary)) + " layers, " + "{:,}".format(total) + " params"]
+        for op, args, params, shape, depth in self.layer_summary:
+            layer = "  " * (depth + 1) + " ".join([op] + [str(a) for a in args])
+            lines.append("%-40s %-24s %12s" % (layer, shape, "{:,}".format(params)))
+        print("\n".join(lines))
+
     def set_layer(self, name, net):
         #if options['name'] in self.named_layers and op != 'reference':
         #    raise ConfigurationException("Named layer " + options['name'] + " with " + str(net) + " already exists as " + str(self.named_layers[options['name']]))
@@ -170,22 +247,8 @@ class ConfigurableComponent:
         '''
         Counts the number of trainable variables.
         '''
-        def get_nb_params_shape(shape):
-            '''
-            Computes the total number of params for a given shap.
-            Works for any number of shapes etc [D,F] or [W,H,C] computes D*F and W*H*C.
-            '''
-            nb_params = 1
-            for dim in shape:
-                nb_params = nb_params*int(dim)
-            return nb_params
-
-        tot_nb_params = 0
-        for trainable_variable in tf.trainable_variables():
-            shape = trainable_variable.get_shape() # e.g [D,F] or [W,H,C]
-            current_nb_params = get_nb_params_shape(shape)
-            tot_nb_params = tot_nb_params + current_nb_params
-        return tot_nb_params
+        return count_params(tf.trainable_variables())
+
     def layer_filter(self, net, args=[], options={}):
         """
             If a layer filter is defined, apply it.  Layer filters allow for adding information
@@ -720,7 +783,7 @@ class ConfigurableComponent:
             ksize = [1,scale,1,1]
             _net = tf.nn.avg_pool(_net, ksize=ksize, strides=ksize, padding='SAME')
             return _net
-        def _attn(_net, name=None):
+        def _project(_net, name=None):
             args = [ops.shape(_net)[-1]]
             name = name or self.ops.generate_name()
             options.name=name+'_fx'
@@ -735,20 +798,11 @@ class ConfigurableComponent:
                 c_scale
                 fx = _pool(fx, c_scale)
                 gx = _pool(gx, c_scale)
-            bottleneck_shape = ops.shape(hx)
-            fx = _flatten(fx)
-            gx = _flatten(gx)
-            hx = _flatten(hx)
-            fx = tf.transpose(fx, [0,2,1])
-            if options.dot_product_similarity:
-                f = tf.matmul(gx,fx)
-                bji = f / tf.cast(tf.shape(f)[-1], tf.float32)
-            else:
-                bji = tf.nn.softmax(tf.matmul(gx,fx))
-
             if options.h_activation:
                 hx = ops.lookup(options.h_activation)(hx)
-            oj = tf.matmul(bji, hx)
+            return _flatten(fx), _flatten(gx), _flatten(hx), ops.shape(hx)
+
+        def _finish(oj, bottleneck_shape):
             oj = tf.reshape(oj, bottleneck_shape)
             #if options.final_conv:
             #args[0] = ops.shape(_net)[-1]
@@ -760,12 +814,25 @@ class ConfigurableComponent:
                 oj = self.ops.lookup(options.final_activation)(oj)
             if options.enable_at_step:
                 oj *= tf.cast(tf.greater(tf.train.get_global_step(),int(options.enable_at_step)), tf.float32)
-            if options.only:
-                return oj
             return oj
 
-
-        ojs = [_attn(net, options.name) for i in range(self.config.heads or 1)]
+        # Each head keeps its own projections, the attention of all heads runs as one batch
+        heads = self.config.heads or 1
+        projections = [_project(net, options.name) for i in range(heads)]
+        fx = tf.concat([p[0] for p in projections], axis=0)
+        gx = tf.concat([p[1] for p in projections], axis=0)
+        hx = tf.concat([p[2] for p in projections], axis=0)
+        if options.chunk:
+            # Streaming softmax, never materializes the (H*W)x(H*W) attention matrix
+            oj = chunked_attention(gx, fx, hx, int(options.chunk), softmax=not options.dot_product_similarity)
+        elif options.dot_product_similarity:
+            f = tf.matmul(gx,fx,transpose_b=True)
+            bji = f / tf.cast(tf.shape(f)[-1], tf.float32)
+            oj = tf.matmul(bji, hx)
+        else:
+            bji = tf.nn.softmax(tf.matmul(gx,fx,transpose_b=True))
+            oj = tf.matmul(bji, hx)
+        ojs = [_finish(oj, p[3]) for oj, p in zip(tf.split(oj, heads, axis=0), projections)]
 
         if options.concat:
             nets = [net] + [oj*oj_lambda for oj in ojs]
@@ -1073,36 +1140,46 @@ class ConfigurableComponent:
         return group
 
     def layer_relational(self, net, args, options):
-        def concat_coor(o, i, d):
-            coor = tf.tile(tf.expand_dims(
-                [float(int(i / d)) / d, (i % d) / d], axis=0), [self.ops.shape(net)[0], 1])
-            o = tf.concat([o, tf.to_float(coor)], axis=1)
-            return o
-
+        """
+            Relation network, eq.1 in https://arxiv.org/abs/1706.01427.  `g_theta` is the `relational` component
+            and runs once over every (o_i, o_j) pair of cells, each cell tagged with its coordinates.
 
-        # eq.1 in the paper
+            All pairs are batched into one `[batch*cells*cells, features]` input.  With `chunk=n` the pairs are
+            evaluated n at a time in a loop to bound memory, in which case cells*cells must divide by n.
+            `g_theta` must treat each row of its input independently, as it did when it ran once per pair.
+        """
         # g_theta = (o_i, o_j, q)
         # conv_4 [B, d, d, k]
-        d = net.get_shape().as_list()[1]
-        all_g = []
-        for i in range(d*d):
-            o_i = net[:, int(i / d), int(i % d), :]
-            o_i = concat_coor(o_i, i, d)
-            for j in range(d*d):
-                o_j = net[:, int(j / d), int(j % d), :]
-                o_j = concat_coor(o_j, j, d)
-                r_input = tf.concat([o_i, o_j], axis=1)
-                if i == 0 and j == 0:
-                    g_theta = self.gan.create_component(self.config.relational, name='relational', input=r_input, reuse=self.ops._reuse)
-                    g_i_j = g_theta.sample
-                    self.ops.weights += g_theta.variables()
-                else:
-                    g_i_j = g_theta.reuse(r_input)
-                all_g.append(g_i_j)
-
-        all_g = tf.stack(all_g, axis=0)
-        all_g = tf.reduce_mean(all_g, axis=0, name='all_g')
-        return all_g
+        shape = self.ops.shape(net)
+        batch_size, d, k = shape[0], shape[1], shape[3]
+        cells = d*d
+        coordinates = tf.constant([[float(int(i / d)) / d, (i % d) / d] for i in range(cells)], dtype=tf.float32)
+        objects = tf.reshape(net, [batch_size, cells, k])
+        objects = tf.concat([tf.to_float(objects), tf.tile(tf.expand_dims(coordinates, 0), [batch_size, 1, 1])], axis=2)
+
+        # pairs[b, i, j] = concat(o_i, o_j), in the order the pairs were evaluated one by one
+        o_i = tf.tile(tf.expand_dims(objects, 2), [1, 1, cells, 1])
+        o_j = tf.tile(tf.expand_dims(objects, 1), [1, cells, 1, 1])
+        pairs = tf.reshape(tf.concat([o_i, o_j], axis=3), [batch_size, cells*cells, 2*(k+2)])
+
+        chunk = int(options.get("chunk", cells*cells))
+        if (cells*cells) % chunk != 0:
+            raise ConfigurationException("relational chunk=" + str(chunk) + " must divide the " + str(cells*cells) + " pairs")
+
+        def g_sum(g, count):
+            g = tf.reshape(g, [batch_size, count] + self.ops.shape(g)[1:])
+            return tf.reduce_sum(g, axis=1)
+
+        chunks = tf.reshape(tf.transpose(tf.reshape(pairs, [batch_size, -1, chunk, 2*(k+2)]), [1, 0, 2, 3]), [-1, batch_size*chunk, 2*(k+2)])
+        g_theta = self.gan.create_component(self.config.relational, name='relational', input=chunks[0], reuse=self.ops._reuse)
+        self.ops.weights += g_theta.variables()
+        if chunk == cells*cells:
+            all_g = g_theta.sample
+            all_g = tf.reshape(all_g, [batch_size, cells*cells] + self.ops.shape(all_g)[1:])
+            return tf.reduce_mean(all_g, axis=1, name='all_g')
+
+        total = tf.foldl(lambda total, c: total + g_sum(g_theta.reuse(c), chunk), chunks[1:], initializer=g_sum(g_theta.sample, chunk), parallel_iterations=1)
+        return tf.divide(total, float(cells*cells), name='all_g')
 
     def layer_pixel_norm(self, net, args, options):
         epsilon = 1e-8
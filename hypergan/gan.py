@@ -1,16 +1,32 @@
-from hypergan.gans.standard_gan import StandardGAN
-from hypergan.ops.tensorflow.ops import TensorflowOps
+from hypergan import registry
 
-def gan_factory(*args, **kw_args):
+def gan_factory(*args, graph_cache=None, **kw_args):
+    """
+    Creates the GAN named by `config['class']`, a `StandardGAN` by default.
+
+    With `graph_cache` set to a directory the built graph is cached there and imported on later runs instead
+    of being built, see `hypergan.graph_cache`.
+    """
     if 'config' in kw_args:
         config = kw_args['config']
     elif len(args) > 0:
         config = args[0]
     else:
         config = None
+    cache = None
+    if graph_cache is not None and len(args) == 0:
+        from hypergan.graph_cache import GraphCache
+        cache = GraphCache(graph_cache, config, kw_args.get('inputs'))
+        gan = cache.load(**{k: v for k, v in kw_args.items() if k != 'config'})
+        if gan is not None:
+            return gan
     if config and 'class' in config:
-        return TensorflowOps.lookup_function(None, config['class'])(*args, **kw_args)
+        gan = registry.lookup(config['class'])(*args, **kw_args)
     else:
-        return StandardGAN(*args, **kw_args)
+        from hypergan.gans.standard_gan import StandardGAN
+        gan = StandardGAN(*args, **kw_args)
+    if cache is not None:
+        cache.export(gan)
+    return gan
 
 GAN=gan_factory
@@ -2,7 +2,9 @@ import hyperchamber as hc
 import inspect
 import itertools
 import types
-import tensorflow as tf
+from hypergan.registry import LazyModule
+
+tf = LazyModule("tensorflow")
 
 class ValidationException(Exception):
     """
@@ -0,0 +1,245 @@
+"""
+Serves `z` -> image requests from a trained generator over HTTP or a unix socket.
+Usage:
+
+    hypergan serve [folder] -c [name] --port 5000
+
+Requests:
+
+* `GET /sample?count=4&format=png` - images from random latent vectors.
+* `POST /sample?format=raw` with a json body `{"z": [[...], ...]}` - one image per flattened latent vector.
+* `GET /health` - the latent and image shapes.
+
+A request may ask for at most `max_count` images, by default 4 batches.  Larger or malformed counts get a 400.
+
+`png` responses are one image with the samples side by side.  `raw` responses are the uint8
+`[count, height, width, channels]` array with the shape in the `X-Shape` header.
+
+A single worker thread owns the session.  Requests that arrive within `max_latency` seconds of each
+other are batched into one `session.run` of up to `batch_size` images, so throughput stays high and latency
+bounded with many concurrent clients.  Encoding happens on the request threads.
+"""
+import io
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import numpy as np
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+from PIL import Image
+
+def to_image(samples):
+    """Maps generator output in [-1, 1] to uint8."""
+    return np.clip((samples + 1.) * 127.5 + .5, 0, 255).astype(np.uint8)
+
+def encode(images, format='png'):
+    """Returns `(content_type, body)` for uint8 images shaped `[count, height, width, channels]`."""
+    if format == 'raw':
+        return 'application/octet-stream', np.ascontiguousarray(images).tobytes()
+    if format != 'png':
+        raise ValueError("Unknown format " + str(format) + ".  Choose png or raw")
+    strip = np.squeeze(np.hstack(list(images)))
+    out = io.BytesIO()
+    Image.fromarray(strip).save(out, format='PNG')
+    return 'image/png', out.getvalue()
+
+class Request:
+    def __init__(self, z, count):
+        self.z = z
+        self.count = count
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+class GANServer:
+    def __init__(self, session, z, output, max_latency=0.005, max_queue=1024, max_count=None):
+        self.session = session
+        self.z_t = z
+        self.output_t = output
+        self.batch_size = int(z.shape[0])
+        self.z_shape = [int(d) for d in z.shape[1:]]
+        self.z_size = int(np.prod(self.z_shape))
+        self.output_shape = [int(d) for d in output.shape[1:]]
+        self.max_latency = max_latency
+        self.max_count = max_count or 4 * self.batch_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.queue.put(None)
+
+    def generate(self, z=None, count=1, timeout=None):
+        """
+        Returns `count` generated samples, or one per row of `z`.  Safe to call from any thread.
+        """
+        if z is not None:
+            z = np.reshape(np.asarray(z, dtype=np.float32), [-1] + self.z_shape)
+            count = z.shape[0]
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        if count > self.max_count:
+            raise ValueError("count must be at most " + str(self.max_count))
+        request = Request(z, count)
+        self.queue.put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError("Request timed out")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def collect(self):
+        """Blocks for one request, then gathers more until the batch is full or `max_latency` passes."""
+        first = self.queue.get()
+        if first is None:
+            return None
+        pending = [first]
+        rows = first.count
+        deadline = time.time() + self.max_latency
+        while rows < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self.running = False
+                break
+            pending.append(request)
+            rows += request.count
+        return pending
+
+    def run_batch(self, z):
+        """Generates one batch.  Rows of `z` that are None are sampled from the latent distribution."""
+        if all(row is None for row in z):
+            return self.session.run(self.output_t)
+        latent = self.session.run(self.z_t)
+        for i, row in enumerate(z):
+            if row is not None:
+                latent[i] = row
+        return self.session.run(self.output_t, {self.z_t: latent})
+
+    def run(self):
+        while self.running:
+            pending = self.collect()
+            if pending is None:
+                return
+            try:
+                rows = []
+                for request in pending:
+                    if request.z is None:
+                        rows += [None] * request.count
+                    else:
+                        rows += list(request.z)
+                outputs = []
+                for i in range(0, len(rows), self.batch_size):
+                    batch = rows[i:i+self.batch_size]
+                    count = len(batch)
+                    batch += [None] * (self.batch_size - count)
+                    outputs.append(self.run_batch(batch)[:count])
+                outputs = np.concatenate(outputs, axis=0)
+                offset = 0
+                for request in pending:
+                    request.result = outputs[offset:offset+request.count]
+                    offset += request.count
+            except Exception as e:
+                for request in pending:
+                    request.error = e
+            for request in pending:
+                request.done.set()
+
+    def handler(self):
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status, content_type, body, headers={}):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def error(self, status, message):
+                self.reply(status, 'application/json', json.dumps({"error": message}).encode('utf-8'))
+
+            def sample(self, z):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                format = params.get('format', ['png'])[0]
+                try:
+                    count = int(params.get('count', ['1'])[0])
+                    if z is not None and np.size(z) % server.z_size != 0:
+                        raise ValueError("z must contain a multiple of " + str(server.z_size) + " values")
+                    images = to_image(server.generate(z=z, count=count))
+                    content_type, body = encode(images, format)
+                except ValueError as e:
+                    return self.error(400, str(e))
+                except Exception as e:
+                    return self.error(500, str(e))
+                self.reply(200, content_type, body, {'X-Shape': ",".join(str(d) for d in images.shape)})
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == '/health':
+                    body = {"batch_size": server.batch_size, "z_shape": server.z_shape, "output_shape": server.output_shape}
+                    return self.reply(200, 'application/json', json.dumps(body).encode('utf-8'))
+                if path == '/sample':
+                    return self.sample(None)
+                self.error(404, "Unknown path " + path)
+
+            def do_POST(self):
+                if urlparse(self.path).path != '/sample':
+                    return self.error(404, "Unknown path " + self.path)
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    z = json.loads(self.rfile.read(length).decode('utf-8')).get('z')
+                except ValueError as e:
+                    return self.error(400, "Invalid json: " + str(e))
+                self.sample(z)
+        return Handler
+
+    def serve(self, host='127.0.0.1', port=5000, socket_path=None):
+        """Serves until interrupted.  `socket_path` serves on a unix socket instead of `host:port`."""
+        if self.thread is None:
+            self.start()
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            httpd = ThreadingUnixHTTPServer(socket_path, self.handler())
+            print("[hypergan] Serving on", socket_path)
+        else:
+            httpd = ThreadingHTTPServer((host, port), self.handler())
+            print("[hypergan] Serving on http://%s:%d" % (host, port))
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            self.stop()
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = socketserver.UnixStreamServer.get_request(self)
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
@@ -3,9 +3,14 @@ from hyperchamber import Config
 from hypergan.ops import TensorflowOps
 from hypergan.gan_component import ValidationException, GANComponent
 from hypergan.skip_connections import SkipConnections
+from hypergan.checkpoint_writer import CheckpointWriter
+from hypergan.variable_registry import VariableRegistry
+from hypergan import registry
 
 import re
 import os
+import shutil
+import time
 import inspect
 import hypergan as hg
 import tensorflow as tf
@@ -14,23 +19,20 @@ import numpy as np
 from tensorflow.python.framework import ops
 from tensorflow.python.tools import freeze_graph
 from tensorflow.python.tools import optimize_for_inference_lib
+try:
+    from tensorflow.tools.graph_transforms import TransformGraph
+except ImportError:
+    TransformGraph = None
 
-from hypergan.samplers.static_batch_sampler import StaticBatchSampler
-from hypergan.samplers.progressive_sampler import ProgressiveSampler
-from hypergan.samplers.batch_sampler import BatchSampler
-from hypergan.samplers.batch_walk_sampler import BatchWalkSampler
-from hypergan.samplers.grid_sampler import GridSampler
-from hypergan.samplers.sorted_sampler import SortedSampler
-from hypergan.samplers.began_sampler import BeganSampler
-from hypergan.samplers.aligned_sampler import AlignedSampler
-from hypergan.samplers.autoencode_sampler import AutoencodeSampler
-from hypergan.samplers.random_walk_sampler import RandomWalkSampler
-from hypergan.samplers.style_walk_sampler import StyleWalkSampler
-from hypergan.samplers.alphagan_random_walk_sampler import AlphaganRandomWalkSampler
-from hypergan.samplers.debug_sampler import DebugSampler
-from hypergan.samplers.segment_sampler import SegmentSampler
-from hypergan.samplers.y_sampler import YSampler
-from hypergan.samplers.gang_sampler import GangSampler
+
+def resize_to(saved, current):
+    """ Crops `saved` to the shape of `current`, then pads it with the leading values of `current`. """
+    value = saved[tuple(slice(0, n) for n in current.shape)]
+    for i, (n, s) in enumerate(zip(current.shape, value.shape)):
+        if n > s:
+            remainder = current[tuple(slice(0, n - s) if j == i else slice(0, value.shape[j]) for j in range(current.ndim))]
+            value = np.concatenate([value, remainder], axis=i)
+    return value
 
 class BaseGAN(GANComponent):
     def __init__(self, config=None, inputs=None, device='/gpu:0', ops_config=None, ops_backend=TensorflowOps, graph=None,
@@ -50,6 +52,9 @@ class BaseGAN(GANComponent):
         self.session = session
         self.skip_connections = SkipConnections()
         self.destroy = False
+        self.checkpoint_writer = None
+        self._variable_registry = None
+        self._variables_key = None
         if graph is None:
             graph = tf.get_default_graph()
         self.graph = graph
@@ -191,27 +196,76 @@ class BaseGAN(GANComponent):
         return self.trainable_d_vars(), self.trainable_g_vars()
 
     def trainable_d_vars(self):
-        return list(set(self.d_vars()).intersection(tf.trainable_variables()))
+        return list(self.variable_registry().trainable_d_vars)
 
     def trainable_g_vars(self):
-        return list(set(self.g_vars()).intersection(tf.trainable_variables()))
+        return list(self.variable_registry().trainable_g_vars)
+
+    def variable_registry(self):
+        """ The up to date `VariableRegistry`, rebuilt only when components or their variables were added. """
+        if self._variable_registry is None:
+            self._variable_registry = VariableRegistry(self)
+        return self._variable_registry.refresh()
+
+    def var_role(self, var):
+        """ "d", "g" or None.  A variable in both `d_vars` and `g_vars` is "d". """
+        return self.variable_registry().roles.get(var)
+
+    def is_d_var(self, var):
+        return self.var_role(var) == "d"
+
+    def is_g_var(self, var):
+        return self.var_role(var) == "g"
 
-    def save(self, save_file):
-        if(np.any(np.isnan(self.session.run(self.loss.d_fake)))):
+    def variable_owner(self, var):
+        """ The component that created `var`, or None. """
+        return self.variable_registry().owners.get(var)
+
+    def is_trainable(self, var):
+        return var in self.variable_registry().trainable
+
+    def save(self, save_file, block=False):
+        """
+        Snapshots the variables with one `session.run` and writes them on a background thread, see
+        `hypergan.checkpoint_writer`.  Set `block` to wait until the checkpoint is on disk.
+        """
+        save_file = os.path.expanduser(save_file)
+        os.makedirs(os.path.dirname(save_file) or ".", exist_ok=True)
+        variables = self.variables()
+        if self.checkpoint_writer is None or self.checkpoint_writer.names != [v.op.name for v in variables]:
+            if self.checkpoint_writer is not None:
+                # Surfaces a failed write before the writer is replaced
+                self.checkpoint_writer.wait()
+            with self.graph.as_default():
+                print("Saving " +str(len(variables))+ " variables: ")
+                missing = set(tf.global_variables()) - set(variables)
+                missing = [ o for o in missing if "dontsave" not in o.name ]
+                if(len(missing) > 0):
+                    print("[hypergan] Warning: Variables on graph but not saved:", missing)
+            keep = getattr(getattr(self, 'args', None), 'keep_checkpoints', None) or 1
+            self.checkpoint_writer = CheckpointWriter(variables, keep=keep)
+
+        values, step = self.session.run([variables, self.steps])
+        if self.has_nan(values):
             print("[Error] NAN detected.  Refusing to save")
             exit()
 
-        with self.graph.as_default():
-            print("[hypergan] Saving network to ", save_file)
-            os.makedirs(os.path.expanduser(os.path.dirname(save_file)), exist_ok=True)
-            saver = tf.train.Saver(self.variables())
-            print("Saving " +str(len(self.variables()))+ " variables: ")
-            missing = set(tf.global_variables()) - set(self.variables())
-            missing = [ o for o in missing if "dontsave" not in o.name ]
-            if(len(missing) > 0):
-                print("[hypergan] Warning: Variables on graph but not saved:", missing)
-            saver.save(self.session, save_file)
+        print("[hypergan] Saving network to ", save_file)
+        self.checkpoint_writer.save(save_file, values, step)
+        if block:
+            self.checkpoint_writer.wait()
 
+    def has_nan(self, values):
+        """ Checks the saved values and the trainer's latest fetched metrics, without running another forward pass. """
+        for value in values:
+            if np.issubdtype(np.asarray(value).dtype, np.floating) and not np.all(np.isfinite(value)):
+                return True
+        monitor = getattr(getattr(self, 'trainer', None), 'metrics_monitor', None)
+        if monitor is not None:
+            for history in monitor.history.values():
+                if not np.isfinite(history.latest()):
+                    return True
+        return False
 
     def load(self, save_file):
         save_file = os.path.expanduser(save_file)
@@ -229,55 +283,99 @@ class BaseGAN(GANComponent):
             return False
 
     def optimistic_restore(self, session, save_file, variables):
+        """
+        Restores `variables` from `save_file` in one `session.run`, skipping variables missing from the checkpoint.
+        Variables whose shape changed are cropped or padded with their current values in numpy.
+        Returns `{name: (saved shape, new shape)}` for the resized variables.
+        """
         reader = tf.train.NewCheckpointReader(save_file)
-        saved_shapes = reader.get_variable_to_shape_map()
-        var_names = sorted([(var.name, var.name.split(':')[0]) for var in variables
-                if var.name.split(':')[0] in saved_shapes])
-        restore_vars = []
-        post_restore_vars = []
-        name2var = dict(zip(map(lambda x:x.name.split(':')[0], variables), variables))
-        with tf.variable_scope('', reuse=True):
-            for var_name, saved_var_name in var_names:
-                curr_var = name2var[saved_var_name]
-                var_shape = curr_var.get_shape().as_list()
-                if saved_shapes[saved_var_name] is None:
-                    print(" (load) No variable found, weights discarded", saved_var_name)
-                if saved_shapes[saved_var_name] != var_shape:
-                    #print(" (load) Shapes do not match, weights discarded", saved_var_name, var_shape, " vs loaded ", saved_shapes[saved_var_name])
-                    print(" (load) Shapes do not match, extra reinitialized", saved_var_name, var_shape, " vs loaded ", saved_shapes[saved_var_name], curr_var)
-                    saved_var = tf.zeros(saved_shapes[saved_var_name])
-                    s1 = self.ops.shape(curr_var)
-                    s2 = saved_shapes[saved_var_name]
-                    new_var = saved_var
-
-                    for i, (_s1, _s2) in enumerate(zip(s1, s2)):
-                        if _s1 > _s2:
-                            s3 = self.ops.shape(new_var)
-                            ns = [i for i in s3]
-                            ns[i] = s1[i] - s2[i]
-
-                            curr_var_remainder = tf.slice(curr_var, [0 for i in s1], ns)
-                            new_var = tf.concat([new_var, curr_var_remainder], axis=i)
-
-                        elif _s2 > _s1:
-                            ns = [-1 for i in s1]
-                            ns[i] = _s1
-
-                            new_var = tf.slice(curr_var, [0 for i in s1], ns)
-
-                    post_restore_op = tf.assign(curr_var, new_var)
-                    post_restore_vars.append([post_restore_op, saved_var, reader.get_tensor(saved_var_name)])
-
-                if var_shape == saved_shapes[saved_var_name]:
-                    restore_vars.append(curr_var)
-        saver = tf.train.Saver(restore_vars)
-        saver.restore(session, save_file)
-
-        for op, var, val in post_restore_vars:
-            self.gan.session.run(op, {var: val})
+        return self.assign_values(session, reader.get_variable_to_shape_map(), reader.get_tensor, variables)
+
+    def assign_values(self, session, saved_shapes, read, variables):
+        """
+        Assigns `read(name)` to each of `variables` named in `saved_shapes`, resizing as `optimistic_restore` does.
+        """
+        variables = [v for v in variables if v.op.name in saved_shapes]
+        resized_variables = [v for v in variables if saved_shapes[v.op.name] != v.get_shape().as_list()]
+        current_values = dict(zip(resized_variables, session.run(resized_variables)))
+
+        values = {}
+        resized = {}
+        for v in variables:
+            if v in current_values and len(saved_shapes[v.op.name]) != len(v.get_shape().as_list()):
+                print(" (load) Rank does not match, weights discarded", v.op.name, saved_shapes[v.op.name])
+                continue
+            value = read(v.op.name)
+            if v in current_values:
+                resized[v.op.name] = (saved_shapes[v.op.name], v.get_shape().as_list())
+                value = resize_to(value, current_values[v])
+            values[v] = value
+
+        feed_dict = {}
+        assigns = []
+        for v, value in values.items():
+            initial_value = getattr(v, 'initial_value', None)
+            if initial_value is not None and self.graph.is_feedable(initial_value) and initial_value not in feed_dict:
+                assigns.append(v.initializer)
+                feed_dict[initial_value] = value
+            else:
+                placeholder, assign = self.restore_assign(v)
+                assigns.append(assign)
+                feed_dict[placeholder] = value
+        session.run(assigns, feed_dict)
+
+        for name, (saved_shape, shape) in sorted(resized.items()):
+            print(" (load) Resized", name, saved_shape, "->", shape)
+        print("[hypergan] Restored", len(values), "variables,", len(resized), "resized")
+        return resized
+
+    def snapshot(self):
+        """ `{name: value}` of all saved variables, fetched in one `session.run`. """
+        variables = self.variables()
+        return dict(zip([v.op.name for v in variables], self.session.run(variables)))
+
+    def transition(self, config, name=None, create_inputs=None, **input_options):
+        """
+        Replaces this GAN with a new one built from `config`, seeded with this GAN's variable values in memory
+        instead of through a checkpoint.  Closes this GAN's session and resets the default graph.
+
+        The inputs are `create_inputs(**input_options)`, by default `inputs.rebuild` which reuses the file list.
+        """
+        start_time = time.time()
+        if create_inputs is None:
+            if not hasattr(self.inputs, 'rebuild'):
+                raise ValidationException(self.inputs.__class__.__name__ + " cannot be rebuilt, pass `create_inputs`")
+            create_inputs = self.inputs.rebuild
+        values = self.snapshot()
+        self.session.close()
+        tf.reset_default_graph()
+        inputs = create_inputs(**input_options)
+        newgan = self.config['class'](config=config, inputs=inputs)
+        for attr in ['args', 'cli', 'save_file', 'x_width', 'x_height', 'x_channels']:
+            if hasattr(self, attr):
+                setattr(newgan, attr, getattr(self, attr))
+        newgan.name = name or self.name
+        saved_shapes = {k: list(np.shape(v)) for k, v in values.items()}
+        newgan.assign_values(newgan.session, saved_shapes, values.get, newgan.variables())
+        print("[hypergan] Transitioned to", newgan.name, "in %.2fs" % (time.time() - start_time))
+        return newgan
+
+    def restore_assign(self, variable):
+        """ A placeholder assign for `variable`, built once. """
+        if not hasattr(self, '_restore_assigns'):
+            self._restore_assigns = {}
+        if variable not in self._restore_assigns:
+            placeholder = tf.placeholder(variable.dtype.base_dtype, variable.get_shape())
+            self._restore_assigns[variable] = (placeholder, tf.assign(variable, placeholder))
+        return self._restore_assigns[variable]
 
     def variables(self):
-        return list(set(self.ops.variables() + sum([c.variables() for c in self.components], []))) + [self.global_step, self.steps]
+        # Optimizer slots are not tracked by the registry, so also key on the number of graph variables
+        key = (self.variable_registry().version, len(self.graph.get_collection_ref(tf.GraphKeys.GLOBAL_VARIABLES)))
+        if self._variables_key != key:
+            self._variables = list(set(self.ops.variables() + sum([c.variables() for c in self.components], []))) + [self.global_step, self.steps]
+            self._variables_key = key
+        return list(self._variables)
 
     def weights(self):
         return self.ops.weights + sum([c.ops.weights for c in self.components], [])
@@ -372,7 +470,93 @@ class BaseGAN(GANComponent):
     def exit(self):
         self.destroy = True
 
+    def create_inference_generator(self, z):
+        """ Builds only the generator on `z` for `export`.  Override in GANs whose generator samples from the latent alone. """
+        raise ValidationException(self.__class__.__name__ + " does not support export")
+
+    def inference_graph(self, batch_size=None):
+        """
+        A new graph holding only `latent -> generator`, without the discriminator, loss, trainer or hooks.
+        Returns `(graph, variables)` with nodes named `z` and `output`.
+        """
+        z_shape = self.ops.shape(self.latent.sample)[1:]
+        graph = tf.Graph()
+        with graph.as_default():
+            z = tf.placeholder(tf.float32, [batch_size] + z_shape, name="z")
+            generator = self.create_inference_generator(tf.minimum(1., tf.maximum(-1., z)))
+            tf.identity(generator.sample, name="output")
+            variables = tf.global_variables()
+        return graph, variables
+
+    def freeze_inference_graph(self):
+        """ Returns a frozen, constant folded `GraphDef` of `inference_graph`, with a dynamic batch when the generator allows it. """
+        try:
+            graph, variables = self.inference_graph(batch_size=None)
+        except Exception as e:
+            print("[hypergan] Generator does not support a dynamic batch size, exporting with batch size", self.batch_size(), e)
+            try:
+                graph, variables = self.inference_graph(batch_size=self.batch_size())
+            except (ValueError, TypeError) as e:
+                # Generators that use tensors from the training graph, such as skip connections, cannot be rebuilt alone
+                raise ValidationException("Generator could not be rebuilt for export: " + str(e))
+
+        trained = {v.op.name: v for v in self.session.graph.get_collection(tf.GraphKeys.GLOBAL_VARIABLES)}
+        missing = [v.op.name for v in variables if v.op.name not in trained]
+        if len(missing) > 0:
+            raise ValidationException("Rebuilt generator has variables missing from the trained model: " + ", ".join(missing))
+        values = self.session.run([trained[v.op.name] for v in variables])
+
+        with tf.Session(graph=graph) as sess:
+            for variable, value in zip(variables, values):
+                variable.load(value, sess)
+            graph_def = tf.graph_util.convert_variables_to_constants(sess, graph.as_graph_def(), ["output"])
+        graph_def = tf.graph_util.remove_training_nodes(graph_def, protected_nodes=["z", "output"])
+        graph_def = optimize_for_inference_lib.optimize_for_inference(graph_def, ["z"], ["output"], tf.float32.as_datatype_enum)
+        if TransformGraph is not None:
+            graph_def = TransformGraph(graph_def, ["z"], ["output"], ["fold_constants(ignore_errors=true)", "strip_unused_nodes"])
+        return graph_def
+
+    def export(self, path="builds"):
+        """
+        Writes `<name>.pb`(frozen graph), `<name>_saved_model` and `<name>.tflite` to `path`.  Each holds
+        only the generator, taking `z` and returning `output`.
+        """
+        os.makedirs(os.path.expanduser(path), exist_ok=True)
+        graph_def = self.freeze_inference_graph()
+        frozen_file = os.path.join(path, self.name + ".pb")
+        with open(frozen_file, "wb") as f:
+            f.write(graph_def.SerializeToString())
+
+        graph = tf.Graph()
+        with graph.as_default():
+            tf.import_graph_def(graph_def, name="")
+        z = graph.get_tensor_by_name("z:0")
+        output = graph.get_tensor_by_name("output:0")
+        saved_model_dir = os.path.join(path, self.name + "_saved_model")
+        if os.path.exists(saved_model_dir):
+            shutil.rmtree(saved_model_dir)
+        with tf.Session(graph=graph) as sess:
+            tf.saved_model.simple_save(sess, saved_model_dir, inputs={"z": z}, outputs={"output": output})
+            converter = tf.lite.TFLiteConverter.from_session(sess, [z], [output])
+            converter.optimizations = [tf.lite.Optimize.OPTIMIZE_FOR_SIZE]
+            tflite_model = converter.convert()
+        tflite_file = os.path.join(path, self.name + ".tflite")
+        with open(tflite_file, "wb") as f:
+            f.write(tflite_model)
+
+        print("Input: ", z)
+        print("Output: ", output)
+        print("Written to", frozen_file, saved_model_dir, tflite_file)
+        return frozen_file, saved_model_dir, tflite_file
+
     def build(self, input_nodes=None, output_nodes=None):
+        if input_nodes is None and output_nodes is None:
+            try:
+                self.gan.export()
+                self.gan.session.close()
+                return
+            except (ValidationException, ValueError, TypeError) as e:
+                print("[hypergan] Exporting the full training graph.", e)
         if input_nodes is None:
             input_nodes = self.gan.input_nodes()
         if output_nodes is None:
@@ -383,11 +567,9 @@ class BaseGAN(GANComponent):
             return os.makedirs(os.path.expanduser(os.path.dirname(filename)), exist_ok=True)
         create_path(build_file)
         tf.train.write_graph(self.gan.session.graph, 'builds', save_file_text)
-        inputs = [x.name.split(":")[0] for x in input_nodes]
-        outputs = [x.name.split(":")[0] for x in output_nodes]
 
         with self.gan.session as sess:
-            converter = tf.lite.TFLiteConverter.from_session(sess, self.gan.input_nodes(), self.gan.output_nodes())
+            converter = tf.lite.TFLiteConverter.from_session(sess, input_nodes, output_nodes)
             converter.optimizations = [tf.lite.Optimize.OPTIMIZE_FOR_SIZE]
             tflite_model = converter.convert()
             tflite_file = "builds/"+self.gan.name+".tflite"
@@ -396,36 +578,21 @@ class BaseGAN(GANComponent):
             f.close()
         tf.reset_default_graph()
         self.gan.session.close()
-        [print("Input: ", x) for x in self.gan.input_nodes()]
-        [print("Output: ", y) for y in self.gan.output_nodes()]
+        [print("Input: ", x) for x in input_nodes]
+        [print("Output: ", y) for y in output_nodes]
         print("Written to "+tflite_file)
 
 
     def get_registered_samplers(self=None):
-        return {
-                'static_batch': StaticBatchSampler,
-                'progressive': ProgressiveSampler,
-                'random_walk': RandomWalkSampler,
-                'alphagan_random_walk': AlphaganRandomWalkSampler,
-                'style_walk': StyleWalkSampler,
-                'batch_walk': BatchWalkSampler,
-                'batch': BatchSampler,
-                'grid': GridSampler,
-                'sorted': SortedSampler,
-                'gang': GangSampler,
-                'began': BeganSampler,
-                'autoencode': AutoencodeSampler,
-                'debug': DebugSampler,
-                'y': YSampler,
-                'segment': SegmentSampler,
-                'aligned': AlignedSampler
-            }
-    def sampler_for(self, name, default=StaticBatchSampler):
-        samplers = self.get_registered_samplers()
+        """ Every sampler in `hypergan.registry.samplers` by name.  Imports them all, prefer `sampler_for`. """
+        return dict(registry.samplers.items())
+
+    def sampler_for(self, name, default=None):
         self.selected_sampler = name
-        if name in samplers:
-            return samplers[name]
+        if name in registry.samplers:
+            return registry.samplers.get(name)
         else:
+            default = default or registry.samplers.get('static_batch')
             print("[hypergan] No sampler found for ", name, ".  Defaulting to", default)
             return default
 
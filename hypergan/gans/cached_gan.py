@@ -0,0 +1,127 @@
+import hyperchamber as hc
+import tensorflow as tf
+
+from hypergan.gan_component import ValidationException
+from hypergan.metrics import MetricsMonitor
+from hypergan.ops import TensorflowOps
+from hypergan.skip_connections import SkipConnections
+from hypergan.trainers.base_trainer import BaseTrainer
+from .base_gan import BaseGAN
+
+# Samplers that only use `latent.sample` and `generator.sample`
+SAMPLERS = ['static_batch', 'batch']
+
+class CachedComponent:
+    """ Stands in for a component of a `CachedGAN`.  Only `sample` and `variables()` are available. """
+    def __init__(self, sample=None, variables=None):
+        self.sample = sample
+        self._variables = variables or []
+
+    def variables(self):
+        return self._variables
+
+    def metrics(self):
+        return {}
+
+class CachedTrainer:
+    """ Runs the train ops recorded by the exporting trainer in order and fetches due metrics with the last one. """
+    output_string = BaseTrainer.output_string
+    record_metrics = BaseTrainer.record_metrics
+
+    def __init__(self, gan, train, config):
+        self.gan = gan
+        self.train = train
+        self.config = config
+        self.current_step = 0
+        self.train_hooks = []
+        self.metrics_monitor = MetricsMonitor(every=config.metrics_every or 10, intervals=config.metric_intervals, window=config.metrics_window or 100)
+
+    def step(self, feed_dict={}):
+        sess = self.gan.session
+        metrics = self.metrics_monitor.due(self.gan.metrics(), self.current_step)
+        fetches = [metrics[k] for k in sorted(metrics.keys())]
+        for i, (op, repeat) in enumerate(self.train):
+            for j in range(repeat - 1):
+                sess.run(op, feed_dict)
+            if i == len(self.train) - 1:
+                metric_values = sess.run([op] + fetches, feed_dict)[1:]
+            else:
+                sess.run(op, feed_dict)
+        self.record_metrics(metrics, metric_values)
+        self.current_step += 1
+
+    def variables(self):
+        return []
+
+class CachedGAN(BaseGAN):
+    """
+    A GAN imported by `hypergan.graph_cache` instead of built in python.
+
+    Trains, samples, saves and loads like the GAN it was exported from.  Its latent, generator, loss and
+    discriminator are `CachedComponent`s, so samplers and tools that use more than their `sample` need the python build.
+    """
+    def __init__(self, config=None, handles=None, inputs=None, device='/gpu:0', ops_config=None, ops_backend=TensorflowOps, graph=None,
+            batch_size=None, width=None, height=None, channels=None, debug=None, session=None, name="hypergan"):
+        self.config = hc.Config(config)
+        self.inputs = inputs
+        self.device = device
+        self.ops_backend = ops_backend
+        self.ops_config = ops_config
+        self.ops = ops_backend(config=self.config, device=device)
+        self.components = []
+        self._metrics = []
+        self._batch_size = batch_size
+        self._width = width
+        self._height = height
+        self._channels = channels
+        self.debug = debug
+        self.name = name
+        self.skip_connections = SkipConnections()
+        self.destroy = False
+        self.checkpoint_writer = None
+        self._variable_registry = None
+        self._variables_key = None
+        self.graph = graph or tf.get_default_graph()
+
+        element = self.graph.as_graph_element
+        variables = {v.name: v for v in self.graph.get_collection(tf.GraphKeys.GLOBAL_VARIABLES)}
+        missing = [v for v in handles["variables"] if v not in variables]
+        if len(missing) > 0:
+            raise ValidationException("Graph cache is missing variables " + str(missing) + ".  Delete the cache directory and rebuild.")
+
+        self.steps = variables[handles["steps"]]
+        self.global_step = variables[handles["global_step"]]
+        self.increment_step = element(handles["increment_step"])
+        self.cached_variables = [variables[v] for v in handles["variables"]]
+        self.latent = CachedComponent(element(handles["latent"]))
+        self.generator = CachedComponent(element(handles["generator"]), [variables[v] for v in handles["g_vars"]])
+        self.discriminator = CachedComponent(None, [variables[v] for v in handles["d_vars"]])
+        self.loss = CachedComponent([element(t) for t in handles["loss"]])
+        self.cached_metrics = {name: element(t) for name, t in handles["metrics"].items()}
+
+        tfconfig = tf.ConfigProto(allow_soft_placement=True)
+        tfconfig.gpu_options.allow_growth=True
+        with tf.device(self.device):
+            self.session = session or tf.Session(config=tfconfig, graph=self.graph)
+        self.trainer = CachedTrainer(self, [(element(op), repeat) for op, repeat in handles["train"]], hc.Config(self.config.trainer or {}))
+
+    def create(self):
+        pass
+
+    def sampler_for(self, name, default=None):
+        if name not in SAMPLERS:
+            print("[hypergan] Graph cache: sampler", name, "needs the built GAN, using static_batch")
+            name = 'static_batch'
+        return BaseGAN.sampler_for(self, name, default)
+
+    def g_vars(self):
+        return self.generator.variables()
+
+    def d_vars(self):
+        return self.discriminator.variables()
+
+    def variables(self):
+        return list(self.cached_variables)
+
+    def metrics(self):
+        return dict(self.cached_metrics)
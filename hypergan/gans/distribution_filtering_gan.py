@@ -7,12 +7,6 @@ import time
 import uuid
 import copy
 
-from hypergan.discriminators import *
-from hypergan.distributions import *
-from hypergan.generators import *
-from hypergan.inputs import *
-from hypergan.samplers import *
-from hypergan.trainers import *
 
 import hyperchamber as hc
 from hyperchamber import Config
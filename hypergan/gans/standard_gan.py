@@ -7,12 +7,6 @@ import time
 import uuid
 import copy
 
-from hypergan.discriminators import *
-from hypergan.distributions import *
-from hypergan.generators import *
-from hypergan.inputs import *
-from hypergan.samplers import *
-from hypergan.trainers import *
 
 import hyperchamber as hc
 from hyperchamber import Config
@@ -22,6 +16,7 @@ import hypergan as hg
 
 from hypergan.gan_component import ValidationException, GANComponent
 from .base_gan import BaseGAN
+from hypergan.trainers.latent_search import LatentSearch
 
 class StandardGAN(BaseGAN):
     """ 
@@ -59,6 +54,11 @@ class StandardGAN(BaseGAN):
             self.session = self.ops.new_session(self.ops_config)
             self.latent = self.create_component(config.z_distribution or config.latent)
             self.uniform_distribution = self.latent
+            latent = self.latent.sample
+            self.latent_search = None
+            if config.trainer and config.trainer.device_search:
+                self.latent_search = LatentSearch(self)
+                latent = self.latent_search.select(latent)
 
             z_shape = self.ops.shape(self.latent.sample)
             self.android_input = tf.reshape(self.latent.sample, [-1])
@@ -66,7 +66,7 @@ class StandardGAN(BaseGAN):
             direction, slider = self.create_controls(self.ops.shape(self.android_input))
             self.slider = slider
             self.direction = direction
-            z = self.android_input + slider * direction
+            z = tf.reshape(latent, [-1]) + slider * direction
             z = tf.maximum(-1., z)
             z = tf.minimum(1., z)
             z = tf.reshape(z, z_shape)
@@ -99,6 +99,10 @@ class StandardGAN(BaseGAN):
     def d_vars(self):
         return self.discriminator.variables()
 
+    def create_inference_generator(self, z):
+        # Not added to `self.components`, the rebuilt generator lives in another graph
+        return self.ops.lookup(self.config.generator['class'])(self, self.config.generator, name="generator", input=z)
+
     def input_nodes(self):
         "used in hypergan build"
         return [
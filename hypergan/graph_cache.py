@@ -0,0 +1,157 @@
+"""
+Caches the built graph of a GAN between runs, see `hypergan train --graph_cache`.
+
+The first run builds the GAN in python and exports its meta graph to `<directory>/<key>`, where the key hashes
+the configuration, the input shape and the hypergan version.  Later runs import the meta graph instead of
+building the GAN and get a `hypergan.gans.cached_gan.CachedGAN`.
+
+The input pipeline is cut out of the exported graph.  Tensors the GAN took from its inputs are replaced with
+placeholders, which are mapped back to the same tensors of the new run's inputs on import.  If the inputs are
+built differently the cache is not used.
+
+Only GANs whose trainer steps without python are cached, see `BaseTrainer.cached_train_ops`.
+"""
+import hashlib
+import json
+import os
+import time
+import tensorflow as tf
+import hypergan
+from tensorflow.core.framework import variable_pb2
+
+# Collections restored on import.  Others, like queue runners, may refer to the removed input pipeline.
+COLLECTIONS = [
+    tf.GraphKeys.GLOBAL_VARIABLES,
+    tf.GraphKeys.TRAINABLE_VARIABLES,
+    tf.GraphKeys.LOCAL_VARIABLES,
+    tf.GraphKeys.GLOBAL_STEP,
+    tf.GraphKeys.UPDATE_OPS
+]
+
+class GraphCache:
+    def __init__(self, directory, config, inputs, graph=None):
+        """ Create before building the GAN: every op already on `graph` is treated as part of the input pipeline. """
+        self.graph = graph or tf.get_default_graph()
+        self.config = config
+        self.inputs = inputs
+        self.input_ops = set([op.name for op in self.graph.get_operations()])
+        self.path = os.path.join(os.path.expanduser(directory), self.key())
+
+    def key(self):
+        shape = self.inputs.x.get_shape().as_list() if self.inputs is not None else None
+        description = json.dumps({"config": self.config, "shape": shape, "version": hypergan.__version__}, sort_keys=True, default=str)
+        return hashlib.sha256(description.encode("utf-8")).hexdigest()[:16]
+
+    def load(self, **kw_args):
+        """ Imports the cached graph and returns a `CachedGAN`, or None on a cache miss. """
+        handles_file = os.path.join(self.path, "handles.json")
+        if not os.path.exists(handles_file):
+            return None
+        with open(handles_file) as f:
+            handles = json.load(f)
+        try:
+            input_map = {placeholder + ":0": self.graph.get_tensor_by_name(tensor) for tensor, placeholder in handles["inputs"].items()}
+        except (KeyError, ValueError) as e:
+            print("[hypergan] Graph cache: inputs differ from the cached graph, building the GAN", e)
+            return None
+
+        start = time.time()
+        with self.graph.as_default():
+            tf.train.import_meta_graph(os.path.join(self.path, "graph.meta"), input_map=input_map)
+        from hypergan.gans.cached_gan import CachedGAN
+        gan = CachedGAN(config=self.config, handles=handles, graph=self.graph, **kw_args)
+        print("[hypergan] Graph cache: imported", self.path, "in %.2fs" % (time.time() - start))
+        return gan
+
+    def export(self, gan):
+        """ Exports the graph of `gan`, built since this cache was created.  Returns False if it cannot be cached. """
+        trainer = getattr(gan, "trainer", None)
+        train = trainer.cached_train_ops() if hasattr(trainer, "cached_train_ops") else None
+        if train is None:
+            print("[hypergan] Graph cache: the trainer or its hooks step in python, not caching")
+            return False
+
+        with self.graph.as_default():
+            meta = tf.train.export_meta_graph(collection_list=COLLECTIONS)
+        placeholders = self.cut_inputs(meta.graph_def)
+        self.cut_collections(meta)
+        handles = {
+            "inputs": placeholders,
+            "latent": gan.latent.sample.name,
+            "generator": gan.generator.sample.name,
+            "loss": [t.name for t in gan.loss.sample],
+            "steps": gan.steps.name,
+            "global_step": gan.global_step.name,
+            "increment_step": gan.increment_step.name,
+            "variables": [v.name for v in gan.variables()],
+            "d_vars": [v.name for v in gan.d_vars()],
+            "g_vars": [v.name for v in gan.g_vars()],
+            "metrics": {name: t.name for name, t in gan.metrics().items() if hasattr(t, "graph")},
+            "train": [[t.name, repeat] for t, repeat in train]
+        }
+
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "graph.meta"), "wb") as f:
+            f.write(meta.SerializeToString())
+        # handles.json marks the entry as complete, write it last
+        tmp = os.path.join(self.path, "handles.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(handles, f)
+        os.replace(tmp, os.path.join(self.path, "handles.json"))
+        print("[hypergan] Graph cache: exported", self.path)
+        return True
+
+    def cut_collections(self, meta):
+        """ Removes collection entries of the input pipeline, such as the loaders' `input_wait` variables, from `meta`. """
+        for collection in meta.collection_def.values():
+            kind = collection.WhichOneof("kind")
+            if kind == "bytes_list":
+                kept = []
+                for value in collection.bytes_list.value:
+                    variable = variable_pb2.VariableDef()
+                    variable.ParseFromString(value)
+                    if variable.variable_name.split(":")[0] not in self.input_ops:
+                        kept.append(value)
+                del collection.bytes_list.value[:]
+                collection.bytes_list.value.extend(kept)
+            elif kind == "node_list":
+                kept = [name for name in collection.node_list.value if name.split(":")[0] not in self.input_ops]
+                del collection.node_list.value[:]
+                collection.node_list.value.extend(kept)
+
+    def cut_inputs(self, graph_def):
+        """
+        Removes the input pipeline from `graph_def`.  Returns `{input tensor name: placeholder name}` for the
+        placeholders that replace the tensors the GAN used.
+        """
+        placeholders = {}
+        nodes = []
+        for original in graph_def.node:
+            if original.name in self.input_ops:
+                continue
+            node = tf.NodeDef()
+            node.CopyFrom(original)
+            nodes.append(node)
+            inputs = []
+            for name in node.input:
+                if name.startswith("^"):
+                    if name[1:] not in self.input_ops:
+                        inputs.append(name)
+                    continue
+                if name.split(":")[0] not in self.input_ops:
+                    inputs.append(name)
+                    continue
+                tensor = name if ":" in name else name + ":0"
+                if tensor not in placeholders:
+                    placeholders[tensor] = "graph_cache/input_%d" % len(placeholders)
+                inputs.append(placeholders[tensor])
+            del node.input[:]
+            node.input.extend(inputs)
+
+        for tensor, placeholder in placeholders.items():
+            t = self.graph.get_tensor_by_name(tensor)
+            with tf.Graph().as_default():
+                nodes.append(tf.placeholder(t.dtype, t.get_shape(), name=placeholder).op.node_def)
+        del graph_def.node[:]
+        graph_def.node.extend(nodes)
+        return placeholders
@@ -0,0 +1,97 @@
+# Persisted, incrementally updated index of the images in a directory
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from natsort import natsorted
+
+INDEX_VERSION = 1
+
+class FileIndex:
+    """
+    FileIndex lists the images in a dataset directory without globbing it on every start.
+
+    Directories are scanned in parallel with `os.scandir`.  The listing is persisted to `path` together with
+    each directory's modification time, and later starts only rescan directories whose modification time changed.
+
+    Like `ImageLoader`, images are read from the immediate subdirectories when there is more than one,
+    otherwise from `directory` itself.  Set `subdirectories` to False to always read from `directory`.
+    """
+
+    def __init__(self, directory, format='jpg', path='~/.hypergan/index', threads=16, subdirectories=True):
+        self.directory = os.path.abspath(directory)
+        self.format = format
+        self.path = os.path.expanduser(path)
+        self.threads = threads
+        self.subdirectories = subdirectories
+        self.entries = {}
+        self.load()
+        self.update()
+
+    def index_file(self):
+        key = json.dumps([INDEX_VERSION, self.directory, self.format, self.subdirectories])
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        name = os.path.basename(os.path.normpath(self.directory)) or "dataset"
+        return os.path.join(self.path, name + "-" + digest + ".json")
+
+    def load(self):
+        try:
+            with open(self.index_file()) as f:
+                self.entries = json.load(f)['entries']
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        index_file = self.index_file()
+        with open(index_file + ".tmp", 'w') as f:
+            json.dump({"version": INDEX_VERSION, "directory": self.directory, "format": self.format, "entries": self.entries}, f)
+        os.replace(index_file + ".tmp", index_file)
+
+    def scan(self, directory):
+        """Returns the index entry for one directory, reusing the stored entry when its modification time is unchanged."""
+        mtime = os.stat(directory).st_mtime_ns
+        entry = self.entries.get(directory)
+        if entry is not None and entry['mtime'] == mtime:
+            return entry
+        files = []
+        directories = []
+        suffix = "." + self.format
+        with os.scandir(directory) as it:
+            for e in it:
+                if e.is_dir():
+                    directories.append(e.name)
+                elif e.name.endswith(suffix):
+                    files.append(e.name)
+        return {"mtime": mtime, "files": sorted(files), "directories": sorted(directories)}
+
+    def update(self):
+        root = self.scan(self.directory)
+        entries = {self.directory: root}
+        if self.subdirectories and len(root['directories']) > 1:
+            directories = [os.path.join(self.directory, d) for d in root['directories']]
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                for directory, entry in zip(directories, executor.map(self.scan, directories)):
+                    entries[directory] = entry
+        self.scanned = len([d for d in entries if entries[d] is not self.entries.get(d)])
+        changed = self.scanned > 0 or set(entries.keys()) != set(self.entries.keys())
+        self.entries = entries
+        if changed:
+            self.save()
+        print("[loader] FileIndex", self.directory, "rescanned", self.scanned, "of", len(entries), "directories")
+
+    def image_directories(self):
+        root = self.entries[self.directory]
+        if self.subdirectories and len(root['directories']) > 1:
+            return [os.path.join(self.directory, d) for d in root['directories']]
+        return [self.directory]
+
+    def filenames(self, natural_sort=True):
+        """
+        All indexed images.  Without `natural_sort` they are returned in index order, which is sorted
+        per directory and much faster to produce for millions of files.
+        """
+        filenames = [os.path.join(d, f) for d in self.image_directories() for f in self.entries[d]['files']]
+        if natural_sort:
+            return natsorted(filenames)
+        return filenames
@@ -0,0 +1,154 @@
+# Caches decoded images in a memory-mapped file
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import tensorflow as tf
+from hypergan.gan_component import ValidationException
+from hypergan.inputs.pipeline import shuffled_slices
+
+CACHE_VERSION = 1
+
+def decode_batches(filenames, load_image, batch_size=256):
+    """
+    Decodes `filenames` with `load_image` in a private graph.  Yields numpy batches in the order of `filenames`.
+    """
+    graph = tf.Graph()
+    with graph.as_default():
+        dataset = tf.data.Dataset.from_tensor_slices(tf.convert_to_tensor(filenames, dtype=tf.string))
+        dataset = dataset.map(load_image, num_parallel_calls=os.cpu_count() or 4)
+        dataset = dataset.batch(batch_size)
+        dataset = dataset.prefetch(2)
+        next_t = dataset.make_one_shot_iterator().get_next()
+        with tf.Session(graph=graph) as sess:
+            while True:
+                try:
+                    yield sess.run(next_t)
+                except tf.errors.OutOfRangeError:
+                    return
+
+class ImageCache:
+    """
+    ImageCache stores already decoded, cropped and resized images in one memory-mapped file per dataset and size.
+
+    The first run decodes every image once and writes the `[height, width, channels]` tensors to disk.
+    Later runs read batches straight from the memory map with no decoding.
+
+    The cache is keyed on the directory contents, format, size and crop/resize flags, so it invalidates itself.
+
+    `dtype` is either:
+
+    * `uint8` - stores raw pixel values.  Lossless for crop, nearest neighbor resize and unresized images.
+    * `float16` - stores the normalized `[-1, 1]` values.
+    """
+
+    def __init__(self, path, dtype='uint8'):
+        if dtype not in ['uint8', 'float16']:
+            raise ValidationException("ImageCache dtype must be uint8 or float16, got "+str(dtype))
+        self.path = os.path.expanduser(path)
+        self.dtype = dtype
+
+    def key(self, directory, filenames, threads=16, **options):
+        """
+        A hash of everything the cached tensors depend on, including the size and modification time of every file.
+        Files are stated per file even with a `FileIndex`: overwriting an image in place does not change its directory.
+        """
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            stats = list(executor.map(os.stat, filenames))
+        signature = [[s.st_size, s.st_mtime] for s in stats]
+        description = {
+            "version": CACHE_VERSION,
+            "directory": os.path.abspath(directory),
+            "filenames": list(filenames),
+            "signature": signature,
+            "dtype": self.dtype,
+            "options": options
+        }
+        digest = hashlib.sha1(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+        name = os.path.basename(os.path.normpath(directory)) or "dataset"
+        return "%s-%dx%dx%d-%s-%s" % (name, options['width'], options['height'], options['channels'], self.dtype, digest[:16])
+
+    def data_file(self, key):
+        return os.path.join(self.path, key + ".bin")
+
+    def index_file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def exists(self, key):
+        return os.path.isfile(self.data_file(key)) and os.path.isfile(self.index_file(key))
+
+    def write(self, key, filenames, load_image, shape, batch_size=256):
+        """
+        Decodes `filenames` with `load_image` in a private graph and writes the results to the memory map.
+
+        `load_image` maps a filename tensor to a float32 `[height, width, channels]` tensor of pixel values in `[0, 255]`.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        count = len(filenames)
+        data_file = self.data_file(key)
+        tmp_file = data_file + ".tmp"
+        print("[loader] Writing image cache", data_file, "for", count, "images")
+
+        mm = np.memmap(tmp_file, dtype=self.dtype, mode='w+', shape=tuple([count] + shape))
+        offset = 0
+        for images in decode_batches(filenames, load_image, batch_size):
+            mm[offset:offset+len(images)] = self.encode(images)
+            offset += len(images)
+        mm.flush()
+        del mm
+        os.replace(tmp_file, data_file)
+
+        with open(self.index_file(key), 'w') as f:
+            json.dump({"count": count, "shape": shape, "dtype": self.dtype}, f)
+
+    def read(self, key):
+        with open(self.index_file(key)) as f:
+            index = json.load(f)
+        return np.memmap(self.data_file(key), dtype=index['dtype'], mode='r', shape=tuple([index['count']] + index['shape']))
+
+    def encode(self, images):
+        if self.dtype == 'uint8':
+            return np.clip(np.round(images), 0, 255).astype(np.uint8)
+        return (images / 127.5 - 1.).astype(np.float16)
+
+    def decode(self, batch):
+        """Converts a batch read from the memory map into normalized float32 images"""
+        batch = tf.cast(batch, tf.float32)
+        if self.dtype == 'uint8':
+            return batch / 127.5 - 1.
+        return batch
+
+    def dataset(self, key, batch_size, sequential=False, shuffle_buffer=None, parallel_calls=2):
+        """
+        A `tf.data.Dataset` of normalized image batches read from the memory map.
+        """
+        mm = self.read(key)
+        count = mm.shape[0]
+        dtype = tf.as_dtype(mm.dtype)
+
+        def gather(indices):
+            return np.asarray(mm[indices])
+
+        def read_batch(indices):
+            batch = tf.py_func(gather, [indices], dtype, stateful=False)
+            batch = self.decode(batch)
+            batch.set_shape([batch_size] + list(mm.shape[1:]))
+            return batch
+
+        dataset = shuffled_slices(np.arange(count), sequential=sequential, shuffle_buffer=shuffle_buffer)
+        dataset = dataset.batch(batch_size, drop_remainder=True)
+        dataset = dataset.repeat()
+        dataset = dataset.map(read_batch, num_parallel_calls=parallel_calls)
+        return dataset
+
+    def load(self, directory, filenames, load_image, batch_size, channels, format, width, height, crop, resize, sequential=False, shuffle_buffer=None, parallel_calls=2):
+        """
+        Returns a cached dataset for `filenames`, writing the cache first if needed.
+        """
+        key = self.key(directory, filenames, channels=channels, format=format, width=width, height=height, crop=crop, resize=resize)
+        if self.exists(key):
+            print("[loader] Using image cache", self.data_file(key))
+        else:
+            self.write(key, filenames, load_image, [height, width, channels])
+        return self.dataset(key, batch_size, sequential=sequential, shuffle_buffer=shuffle_buffer, parallel_calls=parallel_calls)
@@ -6,72 +6,129 @@ import hypergan.inputs.resize_image_patch
 from tensorflow.python.ops import array_ops
 from natsort import natsorted, ns
 from hypergan.gan_component import ValidationException, GANComponent
+from hypergan.inputs.image_cache import ImageCache
+from hypergan.inputs.file_index import FileIndex
+from hypergan.inputs.pipeline import parallelism, shuffled_slices, timed_next
 
-class ImageLoader:
+def list_images(directory, format='jpg', natural_sort=True):
     """
-    ImageLoader loads a set of images into a tensorflow input pipeline.
+    Lists the images in `directory`, or in its subdirectories when it has more than one.
     """
+    directories = glob.glob(directory+"/*")
+    directories = [d for d in directories if os.path.isdir(d)]
 
-    def __init__(self, batch_size):
-        self.batch_size = batch_size
+    if(len(directories) == 0):
+        directories = [directory]
 
-    def create(self, directory, channels=3, format='jpg', width=64, height=64, crop=False, resize=False, sequential=False):
-        directories = glob.glob(directory+"/*")
-        directories = [d for d in directories if os.path.isdir(d)]
+    # Create a queue that produces the filenames to read.
+    if(len(directories) == 1):
+        # No subdirectories, use all the images in the passed in path
+        filenames = glob.glob(directory+"/*."+format)
+    else:
+        filenames = glob.glob(directory+"/**/*."+format)
 
-        if(len(directories) == 0):
-            directories = [directory] 
+    if natural_sort:
+        return natsorted(filenames)
+    return sorted(filenames)
 
-        # Create a queue that produces the filenames to read.
-        if(len(directories) == 1):
-            # No subdirectories, use all the images in the passed in path
-            filenames = glob.glob(directory+"/*."+format)
+def image_decoder(channels=3, format='jpg', width=64, height=64, crop=False, resize=False):
+    """
+    Returns a function that decodes an encoded image string tensor into a float32 `[height, width, channels]` image in `[0, 255]`.
+    """
+    def decode_image(image_string):
+        if format == 'jpg':
+            image = tf.image.decode_jpeg(image_string, channels=channels)
+        elif format == 'png':
+            image = tf.image.decode_png(image_string, channels=channels)
         else:
-            filenames = glob.glob(directory+"/**/*."+format)
+            print("[loader] Failed to load format", format)
+        image = tf.cast(image, tf.float32)
+        # Image processing for evaluation.
+        # Crop the central [height, width] of the image.
+        if crop:
+            image = hypergan.inputs.resize_image_patch.resize_image_with_crop_or_pad(image, height, width, dynamic_shape=True)
+        elif resize:
+            image = tf.image.resize_images(image, [height, width], 1)
+
+        tf.Tensor.set_shape(image, [height,width,channels])
+        return image
+    return decode_image
+
+def image_parser(channels=3, format='jpg', width=64, height=64, crop=False, resize=False):
+    """
+    Returns a function that reads and decodes a filename tensor into a float32 `[height, width, channels]` image in `[0, 255]`.
+    """
+    decode_image = image_decoder(channels=channels, format=format, width=width, height=height, crop=crop, resize=resize)
+    def load_image(filename):
+        return decode_image(tf.read_file(filename))
+    return load_image
+
+class ImageLoader:
+    """
+    ImageLoader loads a set of images into a tensorflow input pipeline.
 
-        filenames = natsorted(filenames)
+    Set `cache` to a directory to decode the images once into a memory-mapped `ImageCache`.
+
+    `autotune` sizes map parallelism and prefetch depth at runtime instead of `parallel_calls` and `prefetch`.
+    `shuffle_buffer` bounds the shuffle buffer, by default it holds the whole dataset.
+
+    Set `file_index` to a directory to persist a `FileIndex` of the filenames instead of globbing on every start.
+    `natural_sort=False` skips natural sorting of the filenames unless `sequential`.
+
+    `rebuild` creates the same pipeline at another size in the current graph, reusing the file list.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    def create(self, directory, channels=3, format='jpg', width=64, height=64, crop=False, resize=False, sequential=False, cache=None, cache_dtype='uint8', autotune=False, parallel_calls=4, prefetch=1, shuffle_buffer=None, file_index=None, natural_sort=True, filenames=None):
+        self.directory = directory
+        self.options = dict(channels=channels, format=format, width=width, height=height, crop=crop, resize=resize, sequential=sequential,
+                cache=cache, cache_dtype=cache_dtype, autotune=autotune, parallel_calls=parallel_calls, prefetch=prefetch,
+                shuffle_buffer=shuffle_buffer, file_index=file_index, natural_sort=natural_sort)
+        natural_sort = natural_sort or sequential
+        if filenames is None and file_index:
+            self.file_index = FileIndex(directory, format, path=file_index)
+            filenames = self.file_index.filenames(natural_sort=natural_sort)
+        elif filenames is None:
+            filenames = list_images(directory, format, natural_sort=natural_sort)
 
         print("[loader] ImageLoader found", len(filenames))
+        self.filenames = filenames
         self.file_count = len(filenames)
         if self.file_count == 0:
             raise ValidationException("No images found in '" + directory + "'")
-        filenames = tf.convert_to_tensor(filenames, dtype=tf.string)
-
-        def parse_function(filename):
-            image_string = tf.read_file(filename)
-            if format == 'jpg':
-                image = tf.image.decode_jpeg(image_string, channels=channels)
-            elif format == 'png':
-                image = tf.image.decode_png(image_string, channels=channels)
-            else:
-                print("[loader] Failed to load format", format)
-            image = tf.cast(image, tf.float32)
-            # Image processing for evaluation.
-            # Crop the central [height, width] of the image.
-            if crop:
-                image = hypergan.inputs.resize_image_patch.resize_image_with_crop_or_pad(image, height, width, dynamic_shape=True)
-            elif resize:
-                image = tf.image.resize_images(image, [height, width], 1)
-
-            image = image / 127.5 - 1.
-            tf.Tensor.set_shape(image, [height,width,channels])
-
-            return image
-
-        # Generate a batch of images and labels by building up a queue of examples.
-        dataset = tf.data.Dataset.from_tensor_slices(filenames)
-        if not sequential:
-            print("Shuffling data")
-            dataset = dataset.shuffle(self.file_count)
-        dataset = dataset.map(parse_function, num_parallel_calls=4)
-        dataset = dataset.batch(self.batch_size, drop_remainder=True)
-        dataset = dataset.repeat()
-        dataset = dataset.prefetch(1)
+
+        load_image = image_parser(channels=channels, format=format, width=width, height=height, crop=crop, resize=resize)
+        parallel_calls, prefetch = parallelism(autotune, parallel_calls, prefetch)
+
+        if cache:
+            self.cache = ImageCache(cache, dtype=cache_dtype)
+            dataset = self.cache.load(directory, filenames, load_image, self.batch_size,
+                    channels=channels, format=format, width=width, height=height, crop=crop, resize=resize, sequential=sequential,
+                    shuffle_buffer=shuffle_buffer, parallel_calls=parallel_calls)
+        else:
+            def parse_function(filename):
+                return load_image(filename) / 127.5 - 1.
+
+            # Generate a batch of images and labels by building up a queue of examples.
+            dataset = shuffled_slices(filenames, sequential=sequential, shuffle_buffer=shuffle_buffer)
+            dataset = dataset.map(parse_function, num_parallel_calls=parallel_calls)
+            dataset = dataset.batch(self.batch_size, drop_remainder=True)
+            dataset = dataset.repeat()
+        dataset = dataset.prefetch(prefetch)
 
         self.dataset = dataset
 
         self.iterator = self.dataset.make_one_shot_iterator()
-        self.x = tf.reshape( self.iterator.get_next(), [self.batch_size, height, width, channels])
+        batch, self.input_wait = timed_next(self.iterator)
+        self.x = tf.reshape(batch, [self.batch_size, height, width, channels])
+
+    def rebuild(self, batch_size=None, **options):
+        """ A new `ImageLoader` in the current graph with the same file list, overriding `options` such as `width` and `height`. """
+        loader = ImageLoader(batch_size or self.batch_size)
+        loader.create(self.directory, filenames=self.filenames, **{**self.options, **options})
+        return loader
 
     def inputs(self):
         return [self.x,self.x]
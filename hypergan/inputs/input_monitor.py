@@ -0,0 +1,46 @@
+# Measures how long training waits on the input pipeline
+import time
+
+class InputMonitor:
+    """
+    InputMonitor logs the fraction of step time spent waiting on input.
+
+    Loaders time each dequeue inside the training step and add it up in `inputs.input_wait`, see
+    `hypergan.inputs.pipeline.timed_next`.  Every `every` steps the monitor reads the total, which pulls no data,
+    and compares the wait since its last read against the step time.  `updates` is the number of training updates
+    in a step, see `fused_steps`.
+    """
+
+    def __init__(self, gan, every=100):
+        self.gan = gan
+        self.every = every
+        self.input_wait = None
+        self.last = None
+        self.step_time = 0.
+        self.steps = 0
+
+    def after_step(self, step, step_time, updates=1):
+        self.step_time += step_time
+        self.steps += updates
+        if self.input_wait is not None and self.steps < self.every:
+            return None
+
+        input_wait = getattr(self.gan.inputs, 'input_wait', None)
+        if input_wait is None:
+            return None
+        total = self.gan.session.run(input_wait)
+        if input_wait is not self.input_wait:
+            # First read, or new inputs after a transition
+            self.input_wait = input_wait
+            self.last = total
+            self.step_time = 0.
+            self.steps = 0
+            return None
+
+        wait, dequeues = total - self.last
+        self.last = total
+        fraction = min(1.0, wait / max(self.step_time, 1e-9))
+        print("[loader] input wait %.1f%%  dequeue %.2fms  step %.2fms" % (fraction * 100, wait / max(dequeues, 1) * 1000, self.step_time / max(self.steps, 1) * 1000))
+        self.step_time = 0.
+        self.steps = 0
+        return fraction
@@ -6,63 +6,80 @@ from natsort import natsorted, ns
 import hypergan.inputs.resize_image_patch
 from tensorflow.python.ops import array_ops
 from hypergan.gan_component import ValidationException, GANComponent
+from hypergan.inputs.image_cache import ImageCache
+from hypergan.inputs.file_index import FileIndex
+from hypergan.inputs.image_loader import image_parser
+from hypergan.inputs.pipeline import parallelism, shuffled_slices, timed_next
 
 class MultiImageLoader:
     """
     MultiImageLoader loads a set of images into a tensorflow input pipeline.
     Supports multiple directories
+
+    Set `cache` to a directory to decode each directory once into a memory-mapped `ImageCache`.
+    See `ImageLoader` for `autotune`, `parallel_calls`, `prefetch`, `shuffle_buffer`, `file_index` and `natural_sort`.
     """
 
     def __init__(self, batch_size):
         self.batch_size = batch_size
 
 
-    def create(self, directories, channels=3, format='jpg', width=64, height=64, crop=False, resize=False, sequential=False):
-        filenames_list = [natsorted(glob.glob(directory+"/*."+format)) for directory in directories]
+    def create(self, directories, channels=3, format='jpg', width=64, height=64, crop=False, resize=False, sequential=False, cache=None, cache_dtype='uint8', autotune=False, parallel_calls=4, prefetch=1, shuffle_buffer=None, file_index=None, natural_sort=True, filenames_list=None):
+        self.directories = directories
+        self.options = dict(channels=channels, format=format, width=width, height=height, crop=crop, resize=resize, sequential=sequential,
+                cache=cache, cache_dtype=cache_dtype, autotune=autotune, parallel_calls=parallel_calls, prefetch=prefetch,
+                shuffle_buffer=shuffle_buffer, file_index=file_index, natural_sort=natural_sort)
+        natural_sort = natural_sort or sequential
+        if filenames_list is None and file_index:
+            self.file_indexes = [FileIndex(directory, format, path=file_index, subdirectories=False) for directory in directories]
+            filenames_list = [index.filenames(natural_sort=natural_sort) for index in self.file_indexes]
+        elif filenames_list is None and natural_sort:
+            filenames_list = [natsorted(glob.glob(directory+"/*."+format)) for directory in directories]
+        elif filenames_list is None:
+            filenames_list = [sorted(glob.glob(directory+"/*."+format)) for directory in directories]
 
+        self.filenames_list = filenames_list
         imgs = []
 
         self.datasets = []
+        input_waits = []
+        load_image = image_parser(channels=channels, format=format, width=width, height=height, crop=crop, resize=resize)
         def parse_function(filename):
-            image_string = tf.read_file(filename)
-            if format == 'jpg':
-                image = tf.image.decode_jpeg(image_string, channels=channels)
-            elif format == 'png':
-                image = tf.image.decode_png(image_string, channels=channels)
-            else:
-                print("[loader] Failed to load format", format)
-            image = tf.cast(image, tf.float32)
-            # Image processing for evaluation.
-            # Crop the central [height, width] of the image.
-            if crop:
-                image = hypergan.inputs.resize_image_patch.resize_image_with_crop_or_pad(image, height, width, dynamic_shape=True)
-            elif resize:
-                image = tf.image.resize_images(image, [height, width], 1)
+            return load_image(filename) / 127.5 - 1.
+        parallel_calls, prefetch = parallelism(autotune, parallel_calls, prefetch)
 
-            image = image / 127.5 - 1.
-            tf.Tensor.set_shape(image, [height,width,channels])
-            return image
+        if cache:
+            self.cache = ImageCache(cache, dtype=cache_dtype)
 
-        for filenames in filenames_list:
+        for directory, filenames in zip(directories, filenames_list):
             self.file_count = len(filenames)
-            filenames = tf.convert_to_tensor(filenames, dtype=tf.string)
-
-            dataset = tf.data.Dataset.from_tensor_slices(filenames)
-            if not sequential:
-                print("Shuffling data")
-                dataset = dataset.shuffle(self.file_count)
-            dataset = dataset.map(parse_function, num_parallel_calls=4)
-            dataset = dataset.batch(self.batch_size, drop_remainder=True)
-            dataset = dataset.repeat()
-            dataset = dataset.prefetch(1)
+            if cache:
+                dataset = self.cache.load(directory, filenames, load_image, self.batch_size,
+                        channels=channels, format=format, width=width, height=height, crop=crop, resize=resize, sequential=sequential,
+                        shuffle_buffer=shuffle_buffer, parallel_calls=parallel_calls)
+            else:
+                dataset = shuffled_slices(filenames, sequential=sequential, shuffle_buffer=shuffle_buffer)
+                dataset = dataset.map(parse_function, num_parallel_calls=parallel_calls)
+                dataset = dataset.batch(self.batch_size, drop_remainder=True)
+                dataset = dataset.repeat()
+            dataset = dataset.prefetch(prefetch)
             shape = [self.batch_size, height, width, channels]
-            self.datasets.append(tf.reshape(dataset.make_one_shot_iterator().get_next(), shape))
+            batch, input_wait = timed_next(dataset.make_one_shot_iterator())
+            input_waits.append(input_wait)
+            self.datasets.append(tf.reshape(batch, shape))
 
         self.xs = self.datasets
+        self.input_wait = tf.add_n(input_waits)
         self.xa = self.datasets[0]
         self.xb = self.datasets[1]
         self.x = self.datasets[0]
         return self.xs
 
+    def rebuild(self, batch_size=None, **options):
+        """ A new `MultiImageLoader` in the current graph with the same file lists, overriding `options` such as `width` and `height`. """
+        loader = MultiImageLoader(batch_size or self.batch_size)
+        loader.create(self.directories, filenames_list=self.filenames_list, **{**self.options, **options})
+        return loader
+
     def inputs(self):
         return self.xs
@@ -0,0 +1,50 @@
+# Shared tf.data pipeline settings for the input loaders
+import numpy as np
+import tensorflow as tf
+
+AUTOTUNE = tf.data.experimental.AUTOTUNE
+
+def parallelism(autotune=False, parallel_calls=4, prefetch=1):
+    """
+    Returns `(num_parallel_calls, prefetch)` for a loader.
+
+    With `autotune` tf.data sizes map parallelism and prefetch depth at runtime from the measured
+    element latency and the rate the training step consumes batches.
+    """
+    if autotune:
+        return AUTOTUNE, AUTOTUNE
+    return parallel_calls, prefetch
+
+def timed_next(iterator):
+    """
+    Returns `(batch, input_wait)`, where `batch` is `iterator.get_next()` and `input_wait` is a `[seconds, count]`
+    variable that adds up how long each dequeue blocked.
+
+    The wait is measured inside the step that consumes the batch, so reading it pulls no extra data.
+    See `hypergan.inputs.input_monitor`.
+    """
+    input_wait = tf.Variable(tf.zeros([2], dtype=tf.float64), trainable=False, name="dontsave_input_wait")
+    start = tf.timestamp()
+    with tf.control_dependencies([start]):
+        batch = iterator.get_next()
+    with tf.control_dependencies([batch]):
+        record = tf.assign_add(input_wait, tf.stack([tf.timestamp() - start, tf.constant(1., dtype=tf.float64)]))
+    with tf.control_dependencies([record]):
+        batch = tf.identity(batch)
+    return batch, input_wait
+
+def shuffled_slices(elements, sequential=False, shuffle_buffer=None):
+    """
+    A dataset of `elements` that is reshuffled every epoch unless `sequential`.
+
+    `shuffle_buffer` bounds the shuffle buffer.  When it is smaller than the dataset the elements are
+    permuted once up front, so the bounded window still mixes the whole dataset.
+    """
+    count = len(elements)
+    if not sequential and shuffle_buffer and shuffle_buffer < count:
+        elements = [elements[i] for i in np.random.permutation(count)]
+    dataset = tf.data.Dataset.from_tensor_slices(elements)
+    if not sequential:
+        print("Shuffling data")
+        dataset = dataset.shuffle(min(shuffle_buffer or count, count))
+    return dataset
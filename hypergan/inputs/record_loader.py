@@ -0,0 +1,145 @@
+# Loads preprocessed record shards with the tensorflow input pipeline
+import json
+import os
+import struct
+import numpy as np
+import tensorflow as tf
+from hypergan.gan_component import ValidationException
+from hypergan.inputs.image_cache import decode_batches
+from hypergan.inputs.image_loader import list_images, image_parser
+from hypergan.inputs.pipeline import parallelism, timed_next
+
+RECORDS_VERSION = 1
+RECORDS_INDEX = "records.json"
+LENGTH_BYTES = 4
+
+def write_records(directory, output, channels=3, format='jpg', width=64, height=64, crop=False, resize=False, shard_size=4096):
+    """
+    Packs the images in `directory` into fixed-size shards in `output`.
+
+    Each shard holds up to `shard_size` records.  A record is a little-endian uint32 length followed by
+    the `[height, width, channels]` uint8 pixels of one decoded, cropped or resized image.
+
+    `records.json` indexes the shards.  Returns the index.
+    """
+    filenames = list_images(directory, format)
+    if len(filenames) == 0:
+        raise ValidationException("No images found in '" + directory + "'")
+    os.makedirs(output, exist_ok=True)
+    print("[preprocess] Packing", len(filenames), "images from", directory, "into", output)
+
+    load_image = image_parser(channels=channels, format=format, width=width, height=height, crop=crop, resize=resize)
+    record_bytes = width * height * channels
+    prefix = struct.pack("<I", record_bytes)
+    shards = []
+    shard = None
+
+    def close(shard):
+        shard['file'].close()
+        os.replace(shard['path'] + ".tmp", shard['path'])
+        shards.append({"file": os.path.basename(shard['path']), "count": shard['count']})
+        print("[preprocess] Wrote", shard['path'], shard['count'])
+
+    for images in decode_batches(filenames, load_image, batch_size=min(shard_size, 256)):
+        images = np.clip(np.round(images), 0, 255).astype(np.uint8)
+        for image in images:
+            if shard is None:
+                path = os.path.join(output, "shard-%05d.hgr" % len(shards))
+                shard = {"path": path, "file": open(path + ".tmp", "wb"), "count": 0}
+            shard['file'].write(prefix)
+            shard['file'].write(image.tobytes())
+            shard['count'] += 1
+            if shard['count'] == shard_size:
+                close(shard)
+                shard = None
+    if shard is not None:
+        close(shard)
+
+    index = {
+        "version": RECORDS_VERSION,
+        "source": os.path.abspath(directory),
+        "format": format,
+        "width": width,
+        "height": height,
+        "channels": channels,
+        "crop": crop,
+        "resize": resize,
+        "record_bytes": record_bytes,
+        "count": sum([s['count'] for s in shards]),
+        "shards": shards
+    }
+    with open(os.path.join(output, RECORDS_INDEX), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def is_record_directory(directory):
+    return os.path.isfile(os.path.join(directory, RECORDS_INDEX))
+
+class RecordLoader:
+    """
+    RecordLoader streams shards written by `hypergan preprocess` into a tensorflow input pipeline.
+
+    Shards are read in parallel and interleaved, so startup needs no directory glob and no per-image file opens.
+    See `ImageLoader` for `autotune`, `parallel_calls`, `prefetch` and `shuffle_buffer`.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+
+    def create(self, directory, channels=3, width=64, height=64, sequential=False, parallel_reads=8, autotune=False, parallel_calls=4, prefetch=1, shuffle_buffer=None):
+        self.directory = directory
+        self.options = dict(channels=channels, width=width, height=height, sequential=sequential, parallel_reads=parallel_reads,
+                autotune=autotune, parallel_calls=parallel_calls, prefetch=prefetch, shuffle_buffer=shuffle_buffer)
+        index_file = os.path.join(directory, RECORDS_INDEX)
+        if not os.path.isfile(index_file):
+            raise ValidationException("No " + RECORDS_INDEX + " found in '" + directory + "'.  Create it with `hypergan preprocess`")
+        with open(index_file) as f:
+            self.index = json.load(f)
+        index = self.index
+        if [index['height'], index['width'], index['channels']] != [height, width, channels]:
+            raise ValidationException("Records in '" + directory + "' are " + "%dx%dx%d" % (index['width'], index['height'], index['channels']) + ", expected " + "%dx%dx%d" % (width, height, channels))
+
+        self.file_count = index['count']
+        print("[loader] RecordLoader found", self.file_count, "in", len(index['shards']), "shards")
+        if self.file_count == 0:
+            raise ValidationException("No records found in '" + directory + "'")
+
+        record_bytes = index['record_bytes']
+        shards = [os.path.join(directory, s['file']) for s in index['shards']]
+
+        def read_shard(shard):
+            return tf.data.FixedLengthRecordDataset(shard, LENGTH_BYTES + record_bytes)
+
+        def parse_function(record):
+            image = tf.decode_raw(record, tf.uint8)[LENGTH_BYTES:]
+            image = tf.reshape(image, [height, width, channels])
+            image = tf.cast(image, tf.float32)
+            return image / 127.5 - 1.
+
+        dataset = tf.data.Dataset.from_tensor_slices(tf.convert_to_tensor(shards, dtype=tf.string))
+        if not sequential:
+            dataset = dataset.shuffle(len(shards))
+        dataset = dataset.repeat()
+        cycle_length = 1 if sequential else min(parallel_reads, len(shards))
+        dataset = dataset.apply(tf.data.experimental.parallel_interleave(read_shard, cycle_length=cycle_length, sloppy=not sequential))
+        if not sequential:
+            dataset = dataset.shuffle(min(self.file_count, shuffle_buffer or max([s['count'] for s in index['shards']])))
+        parallel_calls, prefetch = parallelism(autotune, parallel_calls, prefetch)
+        dataset = dataset.map(parse_function, num_parallel_calls=parallel_calls)
+        dataset = dataset.batch(self.batch_size, drop_remainder=True)
+        dataset = dataset.prefetch(prefetch)
+
+        self.dataset = dataset
+
+        self.iterator = self.dataset.make_one_shot_iterator()
+        batch, self.input_wait = timed_next(self.iterator)
+        self.x = tf.reshape(batch, [self.batch_size, height, width, channels])
+
+    def rebuild(self, batch_size=None, **options):
+        """ A new `RecordLoader` in the current graph over the same shards.  Records have a fixed size, so `width` and `height` cannot change. """
+        loader = RecordLoader(batch_size or self.batch_size)
+        loader.create(self.directory, **{**self.options, **options})
+        return loader
+
+    def inputs(self):
+        return [self.x,self.x]
@@ -0,0 +1,169 @@
+# Streams newly arriving images into the tensorflow input pipeline
+import os
+import queue
+import socket
+import stat
+import struct
+import threading
+import time
+import tensorflow as tf
+from hypergan.gan_component import ValidationException
+from hypergan.inputs.image_loader import image_decoder
+from hypergan.inputs.pipeline import parallelism, timed_next
+
+class StreamLoader:
+    """
+    StreamLoader trains on data as it is produced instead of a finite, pre-globbed directory.
+
+    `source` is one of:
+
+    * a directory - existing images are read first, then new files are picked up as they appear.
+      Producers should write to a temporary name and rename, so partially written files are never read.
+    * a named pipe or unix socket - a stream of encoded images, each prefixed with a little-endian uint32 byte length.
+
+    Images pass through a bounded queue of `queue_size` encoded images.  When training falls behind the
+    reader blocks, and when no data arrives training waits for it.  Exposes the same `x` tensor as `ImageLoader`.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.queue = None
+        self.thread = None
+        self.running = False
+        self.file_count = 0
+
+    def create(self, source, channels=3, format='jpg', width=64, height=64, crop=False, resize=False, queue_size=1024, poll_interval=1.0, autotune=False, parallel_calls=4, prefetch=1):
+        mode = os.stat(source).st_mode
+        if stat.S_ISDIR(mode):
+            reader = self.tail_directory
+        elif stat.S_ISFIFO(mode):
+            reader = self.read_pipe
+        elif stat.S_ISSOCK(mode):
+            reader = self.read_socket
+        else:
+            raise ValidationException("StreamLoader source must be a directory, named pipe or unix socket: '" + source + "'")
+
+        self.source = source
+        self.format = format
+        self.poll_interval = poll_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.running = True
+        self.thread = threading.Thread(target=reader, daemon=True)
+        self.thread.start()
+        print("[loader] StreamLoader reading from", source)
+
+        self.options = dict(channels=channels, width=width, height=height, crop=crop, resize=resize,
+                autotune=autotune, parallel_calls=parallel_calls, prefetch=prefetch)
+        self.build(**self.options)
+
+    def build(self, channels=3, width=64, height=64, crop=False, resize=False, autotune=False, parallel_calls=4, prefetch=1):
+        """ Builds the tensorflow pipeline over the queue in the current graph. """
+        decode_image = image_decoder(channels=channels, format=self.format, width=width, height=height, crop=crop, resize=resize)
+        def parse_function(image_string):
+            return decode_image(image_string) / 127.5 - 1.
+
+        parallel_calls, prefetch = parallelism(autotune, parallel_calls, prefetch)
+        dataset = tf.data.Dataset.from_generator(self.generate, tf.string, tf.TensorShape([]))
+        dataset = dataset.map(parse_function, num_parallel_calls=parallel_calls)
+        dataset = dataset.batch(self.batch_size, drop_remainder=True)
+        dataset = dataset.prefetch(prefetch)
+
+        self.dataset = dataset
+
+        self.iterator = self.dataset.make_one_shot_iterator()
+        batch, self.input_wait = timed_next(self.iterator)
+        self.x = tf.reshape(batch, [self.batch_size, height, width, channels])
+
+    def rebuild(self, batch_size=None, **options):
+        """
+        Rebuilds the pipeline in the current graph, overriding `options` such as `width` and `height`.
+        The reader thread and its queue are kept, so streaming continues where it left off.
+        """
+        self.batch_size = batch_size or self.batch_size
+        self.options = {**self.options, **options}
+        self.build(**self.options)
+        return self
+
+    def generate(self):
+        while True:
+            image_string = self.queue.get()
+            if image_string is None:
+                return
+            yield image_string
+
+    def put(self, image_string):
+        """Blocks while the queue is full, so a fast producer cannot outrun training."""
+        while self.running:
+            try:
+                self.queue.put(image_string, timeout=self.poll_interval)
+                self.file_count += 1
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def tail_directory(self):
+        seen = set()
+        suffix = "." + self.format
+        while self.running:
+            with os.scandir(self.source) as it:
+                current = set([e.path for e in it if e.name.endswith(suffix)])
+            # Forget files that were removed so `seen` stays bounded when the producer rotates old files out
+            seen &= current
+            filenames = sorted(current - seen)
+            for filename in filenames:
+                seen.add(filename)
+                try:
+                    with open(filename, 'rb') as f:
+                        image_string = f.read()
+                except OSError as e:
+                    print("[loader] StreamLoader could not read", filename, e)
+                    continue
+                if not self.put(image_string):
+                    return
+            if len(filenames) == 0:
+                time.sleep(self.poll_interval)
+
+    def read_stream(self, read):
+        def read_exactly(n):
+            data = b''
+            while len(data) < n:
+                chunk = read(n - len(data))
+                if not chunk:
+                    return None
+                data += chunk
+            return data
+
+        while self.running:
+            header = read_exactly(4)
+            if header is None:
+                return False
+            image_string = read_exactly(struct.unpack("<I", header)[0])
+            if image_string is None or not self.put(image_string):
+                return False
+        return True
+
+    def read_pipe(self):
+        while self.running:
+            with open(self.source, 'rb') as pipe:
+                self.read_stream(pipe.read)
+
+    def read_socket(self):
+        while self.running:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.source)
+                    self.read_stream(sock.recv)
+            except OSError as e:
+                print("[loader] StreamLoader socket error", e)
+            time.sleep(self.poll_interval)
+
+    def stop(self):
+        self.running = False
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def inputs(self):
+        return [self.x,self.x]
@@ -0,0 +1,130 @@
+"""
+Interval metric fetching.
+
+Trainers fetch each metric from `gan.metrics()` only every `metrics_every` steps(default 10), or at the
+interval given for it in `metric_intervals`.  An interval of 0 disables a metric.  For example:
+
+    "trainer": {
+      ...
+      "metrics_every": 10,
+      "metric_intervals": {"h11": 1000, "f1": 0}
+    }
+
+Recent values are kept in a ring buffer of `metrics_window` values with running mean, min and max.
+
+With `hypergan train --metrics_file metrics.jsonl` each fetch is appended to the file from a background thread.
+Files ending in `.csv` are written as `step,time,name,value` rows instead of json lines.
+"""
+import collections
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+class MetricHistory:
+    """The last `window` values of one metric."""
+    def __init__(self, window=100):
+        self.values = collections.deque(maxlen=window)
+        self.step = None
+
+    def add(self, step, value):
+        self.step = step
+        self.values.append(value)
+
+    def latest(self):
+        return self.values[-1]
+
+    def mean(self):
+        return float(np.mean(self.values))
+
+    def min(self):
+        return min(self.values)
+
+    def max(self):
+        return max(self.values)
+
+class MetricsMonitor:
+    def __init__(self, every=10, intervals=None, window=100):
+        self.every = every
+        self.intervals = dict(intervals or {})
+        self.window = window
+        self.history = {}
+
+    def interval(self, name):
+        return self.intervals.get(name, self.every)
+
+    def due(self, metrics, step):
+        """The subset of `metrics` to fetch at `step`."""
+        due = {}
+        for name, value in metrics.items():
+            interval = self.interval(name)
+            if interval and interval > 0 and step % interval == 0:
+                due[name] = value
+        return due
+
+    def record(self, step, values):
+        """Records fetched `{name: value}` values."""
+        values = {name: float(np.mean(value)) for name, value in values.items()}
+        for name, value in values.items():
+            if name not in self.history:
+                self.history[name] = MetricHistory(self.window)
+            self.history[name].add(step, value)
+        GlobalMetricsWriter.write(step, values)
+        return values
+
+    def summary(self):
+        """`{name: {"latest", "mean", "min", "max"}}` over the window."""
+        return {name: {"latest": h.latest(), "mean": h.mean(), "min": h.min(), "max": h.max()} for name, h in self.history.items()}
+
+class MetricsWriter:
+    """Appends metrics to `path` from a background thread.  Does nothing while `path` is None."""
+    def __init__(self, path=None, queue_size=1024):
+        self.path = path
+        self.queue_size = queue_size
+        self.queue = None
+        self.thread = None
+        self.dropped = 0
+
+    def write(self, step, values):
+        if self.path is None or len(values) == 0:
+            return
+        if self.thread is None:
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self.thread = threading.Thread(target=self.run, args=(self.path,), daemon=True)
+            self.thread.start()
+        try:
+            self.queue.put_nowait((step, time.time(), values))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                print("[hypergan] Metrics writer is behind, dropped", self.dropped, "rows")
+
+    def format(self, path, step, timestamp, values):
+        if path.endswith(".csv"):
+            return "".join("%d,%.3f,%s,%r\n" % (step, timestamp, name, value) for name, value in sorted(values.items()))
+        row = {"step": step, "time": timestamp}
+        row.update(values)
+        return json.dumps(row) + "\n"
+
+    def run(self, path):
+        directory = os.path.dirname(os.path.expanduser(path))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.expanduser(path), "a") as f:
+            while True:
+                step, timestamp, values = self.queue.get()
+                try:
+                    f.write(self.format(path, step, timestamp, values))
+                    if self.queue.empty():
+                        f.flush()
+                finally:
+                    self.queue.task_done()
+
+    def flush(self):
+        """Waits for all queued rows to be written."""
+        if self.queue is not None:
+            self.queue.join()
+
+GlobalMetricsWriter = MetricsWriter()
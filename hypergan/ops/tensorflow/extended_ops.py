@@ -1,3 +1,4 @@
+import functools
 import tensorflow as tf
 import numpy as np
 
@@ -12,125 +13,126 @@ def bicubic_interp_2d(input_, new_size, endpoint=False):
   Args :
     input_ : Input tensor. Its shape should be
         [batch_size, height, width, channel].
-        In this implementation, the shape should be fixed for speed.
+        Height and width must be known, the batch size may be dynamic.
     new_size : The output size [new_height, new_width]
   ref : 
     http://blog.demofox.org/2015/08/15/resizing-images-with-bicubic-interpolation/
+
+  Bicubic interpolation is separable, so the resize is two 1-D passes: a `[new_width, width]` weight matrix
+  along x, then a `[new_height, height]` one along y.  See `bicubic_weights`.
   """
 
   shape = input_.get_shape().as_list()
-  batch_size = shape[0]
   height  = shape[1]
   width   = shape[2]
-  channel = shape[3]
- 
-  def _hermite(A, B, C, D, t):
-    a = A * (-0.5) + B * 1.5 + C * (-1.5) + D * 0.5
-    b = A + B * (-2.5) + C * 2.0 + D * (-0.5)
-    c = A * (-0.5) + C * 0.5
-    d = B
-
-    return a*t*t*t + b*t*t + c*t + d
-
-  def _get_grid_array(n_i, y_i, x_i, c_i):
-    n, y, x, c = np.meshgrid(n_i, y_i, x_i, c_i, indexing='ij')
-    n = np.expand_dims(n, axis=4)
-    y = np.expand_dims(y, axis=4)
-    x = np.expand_dims(x, axis=4)
-    c = np.expand_dims(c, axis=4)
-    
-    return np.concatenate([n,y,x,c], axis=4)
-
-  def _get_frac_array(y_d, x_d, n, c):
-    y = y_d.shape[0]
-    x = x_d.shape[0]
-    y_t = y_d.reshape([1, -1, 1, 1])
-    x_t = x_d.reshape([1, 1, -1, 1])
-    y_t = tf.constant(np.tile(y_t, (n,1,x,c)), dtype=tf.float32)
-    x_t = tf.constant(np.tile(x_t, (n,y,1,c)), dtype=tf.float32)
-    return y_t, x_t
-
-  def _get_index_tensor(grid, x, y):
-    new_grid = np.array(grid)
-
-    grid_y = grid[:,:,:,:,1] + y
-    grid_x = grid[:,:,:,:,2] + x
-
-    grid_y = np.clip(grid_y, 0, height-1)
-    grid_x = np.clip(grid_x, 0, width-1)
-
-    new_grid[:,:,:,:,1] = grid_y
-    new_grid[:,:,:,:,2] = grid_x
-
-    return tf.constant(new_grid, dtype=tf.int32)
-
-  new_height = new_size[0]
-  new_width  = new_size[1]
-
-  n_i = np.arange(batch_size)
-  c_i = np.arange(channel)
+  dtype = input_.dtype.base_dtype
 
-  if endpoint:
-    y_f = np.linspace(0., height-1, new_height)
-  else:
-    y_f = np.linspace(0., height, new_height, endpoint=False)
-  y_i = y_f.astype(np.int32)
-  y_d = y_f - np.floor(y_f)
+  w_y = tf.constant(bicubic_weights(height, new_size[0], endpoint), dtype=dtype)
+  w_x = tf.constant(bicubic_weights(width, new_size[1], endpoint), dtype=dtype)
+
+  net = tf.tensordot(input_, w_x, axes=[[2], [1]])  # [batch, height, channel, new_width]
+  net = tf.tensordot(net, w_y, axes=[[1], [1]])     # [batch, channel, new_width, new_height]
+  return tf.transpose(net, [0, 3, 2, 1])
 
+@functools.lru_cache(maxsize=None)
+def bicubic_weights(size, new_size, endpoint=False):
+  """
+  `[new_size, size]` matrix of the 1-D bicubic interpolation weights used by `bicubic_interp_2d`.
+
+  Output i samples the input at `f`, from `linspace` like the original per-pixel gathers, and weights the
+  4 neighbours `floor(f)-1 .. floor(f)+2` with the Catmull-Rom spline at `f - floor(f)`.  Neighbours outside
+  the input are clamped to the edge, so their weights add up there.
+  """
   if endpoint:
-    x_f = np.linspace(0., width-1, new_width)
+    f = np.linspace(0., size-1, new_size)
   else:
-    x_f = np.linspace(0., width, new_width, endpoint=False)
-  x_i = x_f.astype(np.int32)
-  x_d = x_f - np.floor(x_f) 
-
-  grid = _get_grid_array(n_i, y_i, x_i, c_i)
-  y_t, x_t = _get_frac_array(y_d, x_d, batch_size, channel)
-
-  i_00 = _get_index_tensor(grid, -1, -1)
-  i_10 = _get_index_tensor(grid, +0, -1)
-  i_20 = _get_index_tensor(grid, +1, -1)
-  i_30 = _get_index_tensor(grid, +2, -1)
-      
-  i_01 = _get_index_tensor(grid, -1, +0)
-  i_11 = _get_index_tensor(grid, +0, +0)
-  i_21 = _get_index_tensor(grid, +1, +0)
-  i_31 = _get_index_tensor(grid, +2, +0)
-      
-  i_02 = _get_index_tensor(grid, -1, +1)
-  i_12 = _get_index_tensor(grid, +0, +1)
-  i_22 = _get_index_tensor(grid, +1, +1)
-  i_32 = _get_index_tensor(grid, +2, +1)
-      
-  i_03 = _get_index_tensor(grid, -1, +2)
-  i_13 = _get_index_tensor(grid, +0, +2)
-  i_23 = _get_index_tensor(grid, +1, +2)
-  i_33 = _get_index_tensor(grid, +2, +2)
-
-  p_00 = tf.gather_nd(input_, i_00)
-  p_10 = tf.gather_nd(input_, i_10)
-  p_20 = tf.gather_nd(input_, i_20)
-  p_30 = tf.gather_nd(input_, i_30)
-
-  p_01 = tf.gather_nd(input_, i_01)
-  p_11 = tf.gather_nd(input_, i_11)
-  p_21 = tf.gather_nd(input_, i_21)
-  p_31 = tf.gather_nd(input_, i_31)
-
-  p_02 = tf.gather_nd(input_, i_02)
-  p_12 = tf.gather_nd(input_, i_12)
-  p_22 = tf.gather_nd(input_, i_22)
-  p_32 = tf.gather_nd(input_, i_32)
-
-  p_03 = tf.gather_nd(input_, i_03)
-  p_13 = tf.gather_nd(input_, i_13)
-  p_23 = tf.gather_nd(input_, i_23)
-  p_33 = tf.gather_nd(input_, i_33)
-
-  col0 = _hermite(p_00, p_10, p_20, p_30, x_t)
-  col1 = _hermite(p_01, p_11, p_21, p_31, x_t)
-  col2 = _hermite(p_02, p_12, p_22, p_32, x_t)
-  col3 = _hermite(p_03, p_13, p_23, p_33, x_t)
-  value = _hermite(col0, col1, col2, col3, y_t)
-  
-  return value
+    f = np.linspace(0., size, new_size, endpoint=False)
+  i = f.astype(np.int32)
+  t = f - np.floor(f)
+
+  # _hermite(A, B, C, D, t) as weights of A, B, C and D
+  weights = [
+    -0.5*t**3 + t**2 - 0.5*t,
+    1.5*t**3 - 2.5*t**2 + 1,
+    -1.5*t**3 + 2.0*t**2 + 0.5*t,
+    0.5*t**3 - 0.5*t**2
+  ]
+
+  matrix = np.zeros([new_size, size], dtype=np.float64)
+  rows = np.arange(new_size)
+  for k, weight in enumerate(weights):
+    np.add.at(matrix, (rows, np.clip(i + k - 1, 0, size-1)), weight)
+  matrix.setflags(write=False)
+  return matrix
+
+def chunked_attention(q, k, v, chunk, softmax=True):
+    """
+    `softmax(q k^T) v`, or `(q k^T / keys) v` with `softmax=False`, for q `[batch, queries, c]`, k `[batch, keys, c]`
+    and v `[batch, keys, cv]`.
+
+    Evaluated `chunk` queries and keys at a time with a running max and sum, so the `queries x keys` matrix
+    is never materialized.  The gradient recomputes the attention of one query block at a time.
+    `chunk` must divide both the number of queries and keys.
+    """
+    batch, queries, c = q.get_shape().as_list()
+    keys, cv = k.get_shape().as_list()[1], v.get_shape().as_list()[2]
+    if queries % chunk != 0 or keys % chunk != 0:
+        raise ValueError("chunk %d must divide %d queries and %d keys" % (chunk, queries, keys))
+
+    def blocks(t):
+        # [batch, n, c] -> [n/chunk, batch, chunk, c]
+        return tf.transpose(tf.reshape(t, [batch, -1, chunk, t.get_shape().as_list()[-1]]), [1, 0, 2, 3])
+
+    def unblock(t):
+        return tf.reshape(tf.transpose(t, [1, 0, 2, 3]), [batch, -1, t.get_shape().as_list()[-1]])
+
+    @tf.custom_gradient
+    def attention(q, k, v):
+        k_blocks, v_blocks = blocks(k), blocks(v)
+
+        def attend(q_block):
+            def step(state, kv):
+                m, l, acc = state
+                s = tf.matmul(q_block, kv[0], transpose_b=True)
+                if not softmax:
+                    return m, l, acc + tf.matmul(s, kv[1])
+                m_new = tf.maximum(m, tf.reduce_max(s, axis=-1, keepdims=True))
+                p = tf.exp(s - m_new)
+                scale = tf.exp(m - m_new)
+                return m_new, l * scale + tf.reduce_sum(p, axis=-1, keepdims=True), acc * scale + tf.matmul(p, kv[1])
+
+            initializer = (tf.fill([batch, chunk, 1], tf.constant(-np.inf, dtype=q.dtype)),
+                    tf.zeros([batch, chunk, 1], dtype=q.dtype),
+                    tf.zeros([batch, chunk, cv], dtype=q.dtype))
+            m, l, acc = tf.foldl(step, (k_blocks, v_blocks), initializer=initializer, parallel_iterations=1)
+            if softmax:
+                return acc / l
+            return acc / keys
+
+        output = unblock(tf.map_fn(attend, blocks(q), parallel_iterations=1))
+
+        def grad(d_output):
+            q_blocks, d_output_blocks = blocks(q), blocks(d_output)
+            d_q = tf.TensorArray(q.dtype, size=queries // chunk)
+
+            def body(i, d_k, d_v, d_q):
+                q_block, d_output_block = q_blocks[i], d_output_blocks[i]
+                s = tf.matmul(q_block, k, transpose_b=True)
+                d_p = tf.matmul(d_output_block, v, transpose_b=True)
+                if softmax:
+                    p = tf.nn.softmax(s)
+                    d_s = p * (d_p - tf.reduce_sum(d_p * p, axis=-1, keepdims=True))
+                else:
+                    p = s / keys
+                    d_s = d_p / keys
+                d_k += tf.matmul(d_s, q_block, transpose_a=True)
+                d_v += tf.matmul(p, d_output_block, transpose_a=True)
+                return i + 1, d_k, d_v, d_q.write(i, tf.matmul(d_s, k))
+
+            _, d_k, d_v, d_q = tf.while_loop(lambda i, d_k, d_v, d_q: i < queries // chunk, body,
+                    [tf.constant(0), tf.zeros_like(k), tf.zeros_like(v), d_q], parallel_iterations=1)
+            return unblock(d_q.stack()), d_k, d_v
+
+        return output, grad
+
+    return attention(q, k, v)
@@ -5,6 +5,7 @@ import types
 import uuid
 import importlib
 import hypergan
+from hypergan import registry
 from tensorflow.python.ops.variables import RefVariable
 from hypergan.ops.tensorflow import layer_regularizers
 from hypergan.ops.tensorflow.activations import lrelu, selu
@@ -701,10 +702,7 @@ class TensorflowOps:
         return symbol
 
     def lookup_function(self, name):
-        namespaced_method = name.split(":")[1]
-        method = namespaced_method.split(".")[-1]
-        namespace = ".".join(namespaced_method.split(".")[0:-1])
-        return getattr(importlib.import_module(namespace),method)
+        return registry.lookup(name)
 
     def lookup_class(self, name):
         return self.lookup_function(name)
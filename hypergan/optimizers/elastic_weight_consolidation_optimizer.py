@@ -39,10 +39,10 @@ class ElasticWeightConsolidationOptimizer(optimizer.Optimizer):
     d_grads = []
     g_grads = []
     for grad,var in grads_and_vars:
-        if var in self.gan.d_vars():
+        if self.gan.is_d_var(var):
             d_vars += [var]
             d_grads += [grad]
-        elif var in self.gan.g_vars():
+        elif self.gan.is_g_var(var):
             g_vars += [var]
             g_grads += [grad]
         else:
@@ -38,9 +38,9 @@ class ConsensusOptimizer(optimizer.Optimizer):
     g_vars = []
     all_grads = [ g for g, _ in grads_and_vars ]
     for grad,var in grads_and_vars:
-        if var in self.gan.d_vars():
+        if self.gan.is_d_var(var):
             d_vars += [var]
-        elif var in self.gan.g_vars():
+        elif self.gan.is_g_var(var):
             g_vars += [var]
         else:
             raise("Couldn't find var in g_vars or d_vars")
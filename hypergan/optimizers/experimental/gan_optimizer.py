@@ -38,19 +38,19 @@ class GANOptimizer(optimizer.Optimizer):
 
   def _create_slots(self, var_list):
     super()._create_slots(var_list)
-    d_vars = [v for v in var_list if v in self.gan.d_vars()]
-    g_vars = [v for v in var_list if v in self.gan.g_vars()]
+    d_vars = [v for v in var_list if self.gan.is_d_var(v)]
+    g_vars = [v for v in var_list if self.gan.is_g_var(v)]
     self.d_optimizer._create_slots(d_vars)
     self.g_optimizer._create_slots(g_vars)
-    missing_vars = [v for v in var_list if v not in self.gan.g_vars() + self.gan.d_vars()]
+    missing_vars = [v for v in var_list if self.gan.var_role(v) is None]
     if len(missing_vars) > 0:
         print("Error, GANOptimizer does not know how to handle missing variables (not in d_vars or g_vars)", missing_vars)
         raise("Error, GANOptimizer does not know how to handle missing variables (not in d_vars or g_vars)")
 
   def _apply_dense(self, grad, var):
-    if var in self.gan.d_vars():
+    if self.gan.is_d_var(var):
         return self.d_optimizer._apply_dense(grad, var)
-    elif var in self.gan.g_vars():
+    elif self.gan.is_g_var(var):
         return self.g_optimizer._apply_dense(grad, var)
     raise("Unable to handle", var)
 
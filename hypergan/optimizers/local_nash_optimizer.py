@@ -50,10 +50,10 @@ class LocalNashOptimizer(optimizer.Optimizer):
         beta = self.gan.configurable_param(self.config.beta)
 
     for grad,var in grads_and_vars:
-        if var in self.gan.d_vars():
+        if self.gan.is_d_var(var):
             d_vars += [var]
             d_grads += [grad]
-        elif var in self.gan.g_vars():
+        elif self.gan.is_g_var(var):
             g_vars += [var]
             g_grads += [grad]
         else:
@@ -155,9 +155,9 @@ class LocalNashOptimizer(optimizer.Optimizer):
     g_vars = []
     all_grads = [ g for g, _ in grads_and_vars ]
     for grad,var in grads_and_vars:
-        if var in self.gan.d_vars():
+        if self.gan.is_d_var(var):
             d_vars += [var]
-        elif var in self.gan.g_vars():
+        elif self.gan.is_g_var(var):
             g_vars += [var]
         else:
             raise("Couldn't find var in g_vars or d_vars")
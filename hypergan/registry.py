@@ -0,0 +1,80 @@
+"""
+Lazy lookup of components by name.
+
+Config strings such as `"class:hypergan.trainers.alternating_trainer.AlternatingTrainer"` and sampler names
+are resolved the first time they are used, so only the components a configuration names are imported.
+
+Samplers from other packages can be registered by import path:
+
+    import hypergan.registry
+    hypergan.registry.samplers.register("my_sampler", "my_package.samplers.MySampler")
+
+and are then available as `hypergan sample --sampler my_sampler`.
+"""
+import importlib
+import types
+
+_symbols = {}
+
+def lookup(name):
+    """ Resolves `"class:module.Name"`, `"function:module.name"` or `"module.name"` to the named attribute. """
+    if name in _symbols:
+        return _symbols[name]
+    path = name.split(":", 1)[-1]
+    namespace, attribute = path.rsplit(".", 1)
+    value = getattr(importlib.import_module(namespace), attribute)
+    _symbols[name] = value
+    return value
+
+class Registry:
+    """ Names mapped to import paths, or to the objects themselves.  Paths are imported on first `get`. """
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+
+    def register(self, name, entry):
+        self.entries[name] = entry
+
+    def names(self):
+        return list(self.entries.keys())
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def get(self, name, default=None):
+        if name not in self.entries:
+            return default
+        entry = self.entries[name]
+        if isinstance(entry, str):
+            entry = lookup(entry)
+            self.entries[name] = entry
+        return entry
+
+    def items(self):
+        """ Every `(name, entry)`.  Imports all registered paths. """
+        return [(name, self.get(name)) for name in self.names()]
+
+samplers = Registry({
+    'static_batch': 'hypergan.samplers.static_batch_sampler.StaticBatchSampler',
+    'progressive': 'hypergan.samplers.progressive_sampler.ProgressiveSampler',
+    'random_walk': 'hypergan.samplers.random_walk_sampler.RandomWalkSampler',
+    'alphagan_random_walk': 'hypergan.samplers.alphagan_random_walk_sampler.AlphaganRandomWalkSampler',
+    'style_walk': 'hypergan.samplers.style_walk_sampler.StyleWalkSampler',
+    'batch_walk': 'hypergan.samplers.batch_walk_sampler.BatchWalkSampler',
+    'batch': 'hypergan.samplers.batch_sampler.BatchSampler',
+    'grid': 'hypergan.samplers.grid_sampler.GridSampler',
+    'sorted': 'hypergan.samplers.sorted_sampler.SortedSampler',
+    'gang': 'hypergan.samplers.gang_sampler.GangSampler',
+    'began': 'hypergan.samplers.began_sampler.BeganSampler',
+    'autoencode': 'hypergan.samplers.autoencode_sampler.AutoencodeSampler',
+    'debug': 'hypergan.samplers.debug_sampler.DebugSampler',
+    'y': 'hypergan.samplers.y_sampler.YSampler',
+    'segment': 'hypergan.samplers.segment_sampler.SegmentSampler',
+    'aligned': 'hypergan.samplers.aligned_sampler.AlignedSampler'
+})
+
+class LazyModule(types.ModuleType):
+    """ Stands in for a module and imports it when an attribute is first used, e.g. `tf = LazyModule("tensorflow")`. """
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
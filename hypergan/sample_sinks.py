@@ -0,0 +1,128 @@
+"""
+Sample sinks store the uint8 frames produced by samplers.
+
+* `PngSink` - one PNG per sample(default).
+* `RawFrameSink` - appends frames to a single `frames.raw` file, indexed by `frames.idx`.
+* `VideoSink` - encodes frames into a video with `ffmpeg`.  Falls back to `RawFrameSink` when `ffmpeg` is missing.
+
+Select one with `hypergan train --save_samples --sample_sink video`.
+"""
+import json
+import os
+import shutil
+import subprocess
+import numpy as np
+from PIL import Image
+
+def sink_for(name, path, fps=30):
+    if name is None or name == 'png':
+        return PngSink()
+    if name == 'raw':
+        return RawFrameSink(path)
+    if name == 'video':
+        return VideoSink(path, fps=fps)
+    raise ValueError("Unknown sample sink " + str(name) + ".  Choose png, raw or video")
+
+def rgb(image):
+    if len(np.shape(image)) == 2:
+        image = np.tile(np.expand_dims(image, 2), [1, 1, 3])
+    return image[:, :, :3]
+
+class PngSink:
+    def write(self, image, filename):
+        if np.shape(image)[2] == 4:
+            fmt = "RGBA"
+        else:
+            fmt = "RGB"
+        try:
+            Image.fromarray(image, fmt).save(filename)
+        except Exception as e:
+            print("Warning: could not sample to ", filename, ".  Please check permissions and make sure the path exists")
+            print(e)
+
+    def close(self):
+        pass
+
+class RawFrameSink:
+    """
+    Appends raw uint8 frames to `path/frames.raw`.  Each line of `path/frames.idx` is a json
+    `{"offset", "shape", "name"}` entry for one frame.  Read them back with `read_frames`.
+    """
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.data = open(os.path.join(path, "frames.raw"), "ab")
+        self.index = open(os.path.join(path, "frames.idx"), "a")
+
+    def write(self, image, filename):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        entry = {"offset": self.data.tell(), "shape": list(image.shape), "name": os.path.basename(filename)}
+        self.data.write(image.tobytes())
+        self.index.write(json.dumps(entry) + "\n")
+        self.data.flush()
+        self.index.flush()
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+def read_frames(path):
+    """Yields `(name, frame)` for every frame written by `RawFrameSink` to `path`."""
+    with open(os.path.join(path, "frames.idx")) as index, open(os.path.join(path, "frames.raw"), "rb") as data:
+        for line in index:
+            entry = json.loads(line)
+            size = int(np.prod(entry['shape']))
+            data.seek(entry['offset'])
+            yield entry['name'], np.frombuffer(data.read(size), dtype=np.uint8).reshape(entry['shape'])
+
+class VideoSink:
+    """
+    Pipes frames into an `ffmpeg` process writing `path/samples.mp4`.  A new segment is started
+    when the frame size changes, for example after switching samplers.
+    """
+    def __init__(self, path, fps=30):
+        self.path = path
+        self.fps = fps
+        self.process = None
+        self.shape = None
+        self.segment = 0
+        self.fallback = None
+        os.makedirs(path, exist_ok=True)
+        if shutil.which("ffmpeg") is None:
+            print("[hypergan] ffmpeg not found, writing raw frames to", path)
+            self.fallback = RawFrameSink(path)
+
+    def start(self, shape):
+        name = "samples.mp4" if self.segment == 0 else "samples-%03d.mp4" % self.segment
+        self.segment += 1
+        self.shape = shape
+        command = ["ffmpeg", "-loglevel", "error", "-y",
+                   "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "%dx%d" % (shape[1], shape[0]), "-r", str(self.fps), "-i", "-",
+                   "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "22",
+                   os.path.join(self.path, name)]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, image, filename):
+        if self.fallback is not None:
+            return self.fallback.write(image, filename)
+        image = np.ascontiguousarray(rgb(image), dtype=np.uint8)
+        if self.shape != image.shape:
+            self.close()
+            self.start(image.shape)
+        try:
+            self.process.stdin.write(image.tobytes())
+        except (BrokenPipeError, OSError) as e:
+            print("[hypergan] ffmpeg failed, writing raw frames to", self.path, e)
+            self.close()
+            self.fallback = RawFrameSink(self.path)
+            self.fallback.write(image, filename)
+
+    def close(self):
+        if self.fallback is not None:
+            self.fallback.close()
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            self.process.wait()
+            self.process = None
@@ -0,0 +1,144 @@
+"""
+Writes samples on a background thread.
+Usage:
+
+    from hypergan.sample_writer import GlobalSampleWriter
+    GlobalSampleWriter.enabled = True
+    GlobalSampleWriter.write(gan, image, "samples/000001.png", True)
+
+When enabled, `BaseSampler.plot` hands the raw sample to the writer and returns immediately.
+Scaling, PNG encoding and file writes happen on the writer thread.  When the writer falls behind
+the oldest pending frames are dropped, so the training loop never waits on it.
+
+The viewer is not thread safe, so the most recent frame is shown by `update_viewer` on the main thread.
+
+Saved samples go to `sink`, see `hypergan.sample_sinks`.  Set `ring_size` to keep the last N frames in `ring`,
+the viewer scrubs through them with the left and right arrow keys.
+"""
+import collections
+import queue
+import threading
+import numpy as np
+from hypergan.viewer import GlobalViewer
+from hypergan.sample_sinks import PngSink
+
+def to_uint8(image, regularize=True):
+    """Clips and scales a sample to a uint8 image the way `BaseSampler.plot` displays it."""
+    if regularize and image.dtype != np.uint8:
+        image = np.minimum(image, 1)
+        image = np.maximum(image, -1)
+    image = np.squeeze(image)
+    if image.dtype != np.uint8:
+        # Scale to 0..255.
+        imin, imax = image.min(), image.max()
+        image = (image - imin) * 255. / (imax - imin) + .5
+        image = image.astype(np.uint8)
+    return image
+
+class SampleWriter:
+    def __init__(self, queue_size=4, enabled=False):
+        self.queue_size = queue_size
+        self.enabled = enabled
+        self.queue = None
+        self.thread = None
+        self.latest = None
+        self.dropped = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        self.sink = PngSink()
+        self.ring = None
+        self.scrub_offset = 0
+
+    def set_ring_size(self, ring_size):
+        """Keeps the last `ring_size` frames in memory for the viewer."""
+        self.ring = collections.deque(maxlen=ring_size) if ring_size else None
+        self.scrub_offset = 0
+
+    def remember(self, gan, image):
+        """Adds a displayed frame to `ring`."""
+        if self.ring is None:
+            return
+        with self.lock:
+            self.ring.append((gan, image))
+            if self.scrub_offset > 0:
+                # Stay on the same frame while scrubbing
+                self.scrub_offset = min(self.scrub_offset + 1, len(self.ring) - 1)
+
+    def scrub(self, delta):
+        """Shows the frame `delta` older(positive) or newer(negative) than the one shown.  Call from the main thread."""
+        if self.ring is None:
+            return
+        with self.lock:
+            if len(self.ring) == 0:
+                return
+            self.scrub_offset = max(0, min(self.scrub_offset + delta, len(self.ring) - 1))
+            frame = self.ring[-1 - self.scrub_offset]
+        GlobalViewer.update(*frame)
+
+    def save(self, image, filename, save_sample):
+        if save_sample:
+            self.sink.write(image, filename)
+
+    def start(self):
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, gan, image, filename, save_sample, regularize=True):
+        """Queues a raw sample.  Never blocks, drops the oldest pending frame when the queue is full."""
+        if self.thread is None:
+            self.start()
+        frame = (gan, image, filename, save_sample, regularize)
+        while True:
+            try:
+                self.queue.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                    self.dropped += 1
+                    if self.dropped % 100 == 1:
+                        print("[hypergan] Sample writer is behind, dropped", self.dropped, "frames")
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        while True:
+            gan, image, filename, save_sample, regularize = self.queue.get()
+            try:
+                image = to_uint8(image, regularize)
+                self.save(image, filename, save_sample)
+                self.remember(gan, image)
+                with self.lock:
+                    self.latest = (gan, image)
+            except Exception as e:
+                # A bad frame or a failed write must not stop the writer thread
+                self.failed += 1
+                if self.failed % 100 == 1:
+                    print("[hypergan] Sample writer failed to write", filename, "-", e, "(%d failed frames)" % self.failed)
+            finally:
+                self.queue.task_done()
+
+    def update_viewer(self):
+        """Shows the most recent frame.  Call from the main thread."""
+        with self.lock:
+            latest = self.latest
+            self.latest = None
+            scrubbing = self.scrub_offset > 0
+        if latest is not None and not scrubbing:
+            GlobalViewer.update(*latest)
+
+    def flush(self):
+        """Waits for all queued frames to be written."""
+        if self.queue is not None:
+            self.queue.join()
+        self.update_viewer()
+
+    def close(self):
+        """Flushes and closes the sink."""
+        self.flush()
+        self.sink.close()
+        self.sink = PngSink()
+
+GlobalSampleWriter = SampleWriter()
@@ -1,7 +1,7 @@
 import numpy as np
 import tensorflow as tf
-from PIL import Image
 from hypergan.viewer import GlobalViewer
+from hypergan.sample_writer import GlobalSampleWriter, to_uint8
 
 class BaseSampler:
     def __init__(self, gan, samples_per_row=8, session=None):
@@ -42,24 +42,31 @@ class BaseSampler:
         """
         return tf.where(tf.is_nan(t),tf.zeros_like(t),t)
 
-    def plot(self, image, filename, save_sample, regularize=True):
-        """ Plot an image."""
-        if regularize:
-            image = np.minimum(image, 1)
-            image = np.maximum(image, -1)
-        image = np.squeeze(image)
-        if np.shape(image)[2] == 4:
-            fmt = "RGBA"
-        else:
-            fmt = "RGB"
+    def mosaic(self, images, rows, columns):
+        """
+        Builds an op that tiles `rows*columns` images shaped like `gan.inputs.x` into one
+        `[1, rows*height, columns*width, channels]` uint8 image.
+
+        Clipping and scaling match `plot`, so `plot` skips them for the result.
+        """
+        shape = self.gan.ops.shape(self.gan.inputs.x)
+        height, width, channels = shape[1], shape[2], shape[3]
+        net = tf.minimum(tf.maximum(images, -1.), 1.)
+        net = tf.reshape(net, [rows, columns, height, width, channels])
+        net = tf.transpose(net, [0, 2, 1, 3, 4])
+        net = tf.reshape(net, [1, rows*height, columns*width, channels])
         # Scale to 0..255.
-        imin, imax = image.min(), image.max()
-        image = (image - imin) * 255. / (imax - imin) + .5
-        image = image.astype(np.uint8)
-        if save_sample:
-            try:
-                Image.fromarray(image, fmt).save(filename)
-            except Exception as e:
-                print("Warning: could not sample to ", filename, ".  Please check permissions and make sure the path exists")
-                print(e)
-        GlobalViewer.update(self.gan, image)
+        imin, imax = tf.reduce_min(net), tf.reduce_max(net)
+        net = (net - imin) * 255. / (imax - imin) + .5
+        return tf.cast(net, tf.uint8)
+
+    def plot(self, image, filename, save_sample, regularize=True):
+        """ Plot an image.  Hands off to the `GlobalSampleWriter` thread when it is enabled."""
+        if GlobalSampleWriter.enabled:
+            GlobalSampleWriter.write(self.gan, image, filename, save_sample, regularize)
+            return
+        image = to_uint8(image, regularize)
+        GlobalSampleWriter.save(image, filename, save_sample)
+        GlobalSampleWriter.remember(self.gan, image)
+        if GlobalSampleWriter.scrub_offset == 0:
+            GlobalViewer.update(self.gan, image)
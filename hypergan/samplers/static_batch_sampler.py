@@ -13,6 +13,14 @@ class StaticBatchSampler(BaseSampler):
         self.rows = 4
         self.columns = 8
 
+        count = self.rows*self.columns
+        if gan.batch_size() >= count:
+            # The whole grid fits in one batch and is tiled in the graph
+            self.samples_t = self.g_t[:count]
+        else:
+            self.samples_t = tf.placeholder(self.g_t.dtype, [count] + gan.ops.shape(self.g_t)[1:])
+        self.mosaic_t = self.mosaic(self.samples_t, self.rows, self.columns)
+
     def compatible_with(gan):
         if hasattr(gan, 'latent'):
             return True
@@ -21,32 +29,31 @@ class StaticBatchSampler(BaseSampler):
     def _sample(self):
         gan = self.gan
         z_t = gan.latent.sample
-        inputs_t = gan.inputs.x
-        needed = int(self.rows*self.columns / gan.batch_size())
+        batch_size = gan.batch_size()
+        count = self.rows*self.columns
+        needed = max(1, count // batch_size)
 
         if self.z is None:
-            self.z = [gan.latent.sample.eval() for i in range(needed)]
-            self.z = np.reshape(self.z, [self.rows*self.columns, -1])
+            self.z = np.concatenate([gan.latent.sample.eval() for i in range(needed)])
+
+        imle_hooks = [t for t in self.gan.trainer.train_hooks if isinstance(t, IMLETrainHook)]
+        if needed == 1 and len(imle_hooks) == 0:
+            return {
+                'generator': gan.session.run(self.mosaic_t, feed_dict={z_t: self.z})
+            }
 
         z = self.z
         gs = []
-        for i in range(int(needed)):
-            zi = z[i*gan.batch_size():(i+1)*gan.batch_size()]
+        for i in range(needed):
+            zi = z[i*batch_size:(i+1)*batch_size]
             g = gan.session.run(self.g_t, feed_dict={z_t: zi})
             gs.append(g)
-        for t in self.gan.trainer.train_hooks:
-            if isinstance(t, IMLETrainHook):
-                for j in range(t.config.memory_size):
-                    gs[j*2][0] = gan.session.run(t.gi[j].sample)
-                    gs[j*2+1][0] = gan.session.run(t.x_matched[j])
-        g = np.hstack(gs)
-        xshape = gan.ops.shape(gan.inputs.x)
-        g = np.reshape(gs, [self.rows, self.columns, xshape[1], xshape[2], xshape[3]])
-        g = np.concatenate(g, axis=1)
-        g = np.concatenate(g, axis=1)
-        g = np.expand_dims(g, axis=0)
+        for t in imle_hooks:
+            for j in range(t.config.memory_size):
+                gs[j*2][0] = gan.session.run(t.gi[j].sample)
+                gs[j*2+1][0] = gan.session.run(t.x_matched[j])
+        g = np.concatenate(gs)[:count]
 
         return {
-            'generator': g
+            'generator': gan.session.run(self.mosaic_t, feed_dict={self.samples_t: g})
         }
-
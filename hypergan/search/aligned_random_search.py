@@ -1,5 +1,6 @@
 import tensorflow as tf
 import hypergan as hg
+import hypergan.discriminators.common
 import hyperchamber as hc
 import numpy as np
 import random
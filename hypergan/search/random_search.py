@@ -1,5 +1,7 @@
 import tensorflow as tf
 import hypergan as hg
+import hypergan.discriminators.common
+import hypergan.generators.common
 import hyperchamber as hc
 import numpy as np
 import random
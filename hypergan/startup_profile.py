@@ -0,0 +1,77 @@
+"""
+Times module imports during startup, for `hypergan <command> --startup-profile`.
+
+Once started, every module imported is timed as it executes.  `report` prints the slowest modules with
+their own time and their time including the modules they imported, similar to `python -X importtime`.
+"""
+import sys
+import time
+
+class TimedLoader:
+    """ Wraps a module loader to time `exec_module`. """
+    def __init__(self, loader, profile):
+        self.loader = loader
+        self.profile = profile
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.profile.begin(module.__name__)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profile.end(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+class StartupProfile:
+    def __init__(self):
+        self.started = None
+        self.times = {}
+        self.stack = []
+        self.reported = False
+
+    def start(self):
+        self.started = time.time()
+        sys.meta_path.insert(0, self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def begin(self, name):
+        self.stack.append([name, time.time(), 0.0])
+
+    def end(self, name):
+        name, started, children = self.stack.pop()
+        total = time.time() - started
+        self.times[name] = (total - children, total)
+        if len(self.stack) > 0:
+            self.stack[-1][2] += total
+
+    def report(self, limit=25):
+        """ Prints the `limit` modules with the largest own import time.  Only reports once. """
+        if self.started is None or self.reported:
+            return
+        self.reported = True
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        elapsed = time.time() - self.started
+        imports = sum([own for own, total in self.times.values()])
+        print("[hypergan] Startup took %.3fs, %.3fs importing %d modules" % (elapsed, imports, len(self.times)))
+        print("%10s %10s  %s" % ("self(ms)", "total(ms)", "module"))
+        slowest = sorted(self.times.items(), key=lambda item: -item[1][0])[:limit]
+        for name, (own, total) in slowest:
+            print("%10.1f %10.1f  %s" % (own*1000, total*1000, name))
+
+GlobalStartupProfile = StartupProfile()
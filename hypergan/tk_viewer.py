@@ -18,6 +18,7 @@ class TkViewer:
         self.viewer_size = viewer_size
         self.enabled = enabled
         self.enable_menu = True
+        self.on_scrub = None
 
     def update(self, gan, image):
         if not self.enabled: return
@@ -159,6 +160,15 @@ class TkViewer:
             root.bind_all("<Control-r>", _refresh_sample)
             root.bind_all("<Control-s>", _save_model)
 
+            def _scrub(delta):
+                def _scrub_proc(*args):
+                    if self.on_scrub is not None:
+                        self.on_scrub(delta)
+                return _scrub_proc
+
+            root.bind_all("<Left>", _scrub(1))
+            root.bind_all("<Right>", _scrub(-1))
+
 
             if self.enable_menu:
                 root.config(menu=menubar)
@@ -33,3 +33,11 @@ class BaseTrainHook(GANComponent):
 
   def after_create(self):
     pass
+
+  def fused_compatible(self):
+    """
+    Trainers with `fused_steps` run several updates per `step` and call `before_step` and `after_step` once
+    around them.  Hooks that only add losses are compatible.  Override to return True if a hook's
+    `before_step`/`after_step` can also run once per block of updates.
+    """
+    return type(self).before_step is BaseTrainHook.before_step and type(self).after_step is BaseTrainHook.after_step
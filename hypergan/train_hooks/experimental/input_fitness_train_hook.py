@@ -16,12 +16,18 @@ from operator import itemgetter
 from hypergan.train_hooks.base_train_hook import BaseTrainHook
 
 class InputFitnessTrainHook(BaseTrainHook):
-  "Keep track of Xs with high discriminator values"
+  """
+  Keep track of Xs with high discriminator values.
+
+  Each search step samples a new batch and keeps the `batch_size` best of the kept and new examples.
+  Scoring, top_k selection and the restore into `gan.inputs.x` are one batched gather per search step,
+  so the graph does not grow with the batch size.  Requires `fixed_input`.
+  """
   def __init__(self, gan=None, config=None, trainer=None, name="GpSnMemoryTrainHook", memory_size=2, top_k=1):
     super().__init__(config=config, gan=gan, trainer=trainer, name=name)
-    gan_inputs = self.gan.inputs.x
+    batch_size = self.gan.batch_size()
+    x = self.gan.inputs.x
 
-    self.input = tf.split(self.gan.inputs.x, self.gan.batch_size(), axis=0)
     fitness = self.gan.loss.d_real
     if self.config.abs:
         fitness = tf.abs(self.gan.loss.d_real)
@@ -29,22 +35,29 @@ class InputFitnessTrainHook(BaseTrainHook):
         fitness = -self.gan.loss.d_real
     if self.config.nabs:
         fitness = -tf.abs(self.gan.loss.d_real)
-    self.d_real = tf.split(fitness, self.gan.batch_size(), axis=0)
-    self.feed_input = tf.split(self.gan.feed_x, self.gan.batch_size(), axis=0)
+    fitness = tf.reshape(fitness, [batch_size])
+    self.fitness = fitness
 
     self.sample_batch = self.gan.set_x
-    cache_count = self.gan.batch_size()
-    self.cache = [tf.Variable(tf.zeros_like(self.input[i])) for i in range(len(self.input))]
-    print("C ", self.cache, self.input)
-    self.set_cache = [tf.assign(c, x) for c, x in zip(self.cache, self.input)]
-    if self.config.skip_restore is None:
-        self.restore_cache = [[tf.assign(self.gan.inputs.x[i], tf.reshape(self.cache[j], self.ops.shape(self.gan.inputs.x[i]))) for i in range(self.gan.batch_size())]  for j in range(self.gan.batch_size())]
-        for i in range(self.gan.batch_size()):
-            restore = []
-            for j in range(self.gan.batch_size()):
-                op = tf.assign(self.gan.inputs.x[i], tf.reshape(self.cache[j], self.ops.shape(self.gan.inputs.x[i])))
-                restore.append(op)
-            self.restore_cache.append(restore)
+    self.cache = tf.Variable(tf.zeros_like(x), trainable=False)
+    self.cache_fitness = tf.Variable(tf.zeros([batch_size]), trainable=False)
+
+    # Keeps the current batch and samples a new one.  The sample is a new assign: control dependencies
+    # only order ops created inside the block, and `gan.set_x` already exists.
+    store = tf.group(self.cache.assign(x), self.cache_fitness.assign(fitness))
+    with tf.control_dependencies([store]):
+        self.store_and_sample = tf.group(tf.assign(x, self.gan.feed_x))
+
+    # Keeps the best of the cache and the new batch, then samples the next candidates
+    candidates = tf.concat([self.cache_fitness, fitness], axis=0)
+    values, indices = tf.nn.top_k(-candidates, k=batch_size)
+    winners = tf.gather(tf.concat([self.cache, x], axis=0), indices)
+    keep = tf.group(self.cache.assign(winners), self.cache_fitness.assign(-values))
+    with tf.control_dependencies([keep]):
+        self.select_and_sample = tf.group(tf.assign(x, self.gan.feed_x))
+        self.worst = tf.identity(-values[-1])
+
+    self.restore_cache = tf.assign(x, self.cache)
     self.loss = [None, None]
 
   def after_step(self, step, feed_dict):
@@ -54,57 +67,39 @@ class InputFitnessTrainHook(BaseTrainHook):
       return self.loss
 
   def before_step(self, step, feed_dict):
+    sess = self.gan.session
     if step == 0:
-        self.gan.session.run(self.sample_batch)
-    def sort():
-        raw_winners = np.argsort(np.array(scores).flatten())
-        winners = raw_winners[:self.gan.batch_size()]
-
-        sticky = 0
-        total = 0
-        cache_winners = [ scorei for scorei in winners if scorei < self.gan.batch_size()]
-        losers = [ i for i in range(self.gan.batch_size()) if (i+self.gan.batch_size()) not in winners ]
-
-        if self.config.skip_restore is None:
-            for loser, cache_winner in zip(cache_winners, losers):
-                self.gan.session.run(self.restore_cache[loser][cache_winner])
-        #if total == sticky or sticky == 0:
-        #    print("Sticky "+str(sticky) + " / "+ str(total))
-
-    if self.config.heuristic is not None:
-        count = 0
-        previous_last_score = 1000
+        sess.run(self.sample_batch)
+
     search_steps = self.config.search_steps
     if self.config.search_steps is None:
         search_steps = 1
 
     if search_steps == 0:
-        self.gan.session.run(self.sample_batch)
+        sess.run(self.sample_batch)
+        return
 
+    count = 0
+    previous_last_score = 1000
+    sess.run(self.store_and_sample)
     for i in range(search_steps):
-        scores = []
-        scores += self.gan.session.run(self.d_real)
-        self.gan.session.run(self.set_cache)
-        self.gan.session.run(self.sample_batch)
-        scores += self.gan.session.run(self.d_real)
-        sort()
+        _, last_score = sess.run([self.select_and_sample, self.worst])
         if self.config.heuristic is not None:
-            last_score = np.sort(np.array(scores).flatten())[-1]
             if last_score < previous_last_score:
                 count = 0
                 previous_last_score = last_score
             else:
                 count += 1
                 if(count > self.config.heuristic):
-                    #print(i+1)
                     break
 
-        if self.config.verify:
-            sortedscores = np.sort(np.array(scores).flatten())
-            newscores =np.sort(np.array(self.gan.session.run(self.d_real)).flatten())
-            print(i)
-            print(sortedscores[:self.gan.batch_size()].flatten())
-            print(np.sort(np.array(newscores).flatten()))
-            print(np.sort(newscores.flatten()) == np.array(sortedscores[:self.gan.batch_size()]).flatten())
-
+    if self.config.skip_restore is None:
+        sess.run(self.restore_cache)
 
+    if self.config.verify:
+        kept = np.sort(sess.run(self.cache_fitness))
+        scores = np.sort(sess.run(self.fitness))
+        print(i)
+        print(kept)
+        print(scores)
+        print(kept == scores)
@@ -106,48 +106,83 @@ class MatchSupportTrainHook(BaseTrainHook):
     self.train_t = self.optimizer.minimize(self.loss, var_list=var_list)
     self.reset_optimizer_t = tf.variables_initializer(self.optimizer.variables())
 
-  def before_step(self, step, feed_dict, depth=0):
+  def loop_status(self, loss, last_loss):
+    """ "nan" or "converged" once `loss` stops the loop, otherwise None. """
+    if np.any(np.isnan(loss)) or np.any(np.isinf(loss)):
+        return "nan"
+    convergence = 1.0-loss/last_loss
+    if self.config.verbose:
+        print("Convergence:", convergence, loss)
+    if (self.config.convergence_threshold is not None and convergence < self.config.convergence_threshold) and convergence > 0.0:
+        if self.config.verbose:
+            print("Convergence threshold reached", self.config.convergence_threshold)
+        return "converged"
+    if self.config.loss_threshold is not None and loss < self.config.loss_threshold:
+        if self.config.verbose:
+            print("Loss threshold reached", self.config.loss_threshold)
+        return "converged"
+    return None
+
+  def train_loop(self, feed_dict, steps, begin):
+    """
+    Runs up to `steps` updates.  Returns `(steps run, loss, status)` where status is "converged", "nan" or "max_steps".
+
+    Each update fetches the loss in the same `session.run`, which is the loss before that update.  So the stopping
+    checks trail the updates by one step, and the returned loss is fetched once after the last update.  This stops
+    short of running the whole loop on the device, which would rebuild the target loss inside a `tf.while_loop`.
+    With `verbose` the loss is fetched after every update instead, which doubles the number of session runs.
+    """
+    sess = self.gan.session
+    last_loss = begin
+    status = None
+    for i in range(steps):
+        if self.config.verbose:
+            sess.run(self.train_t, feed_dict)
+            loss = sess.run(self.loss, feed_dict)
+        else:
+            loss, _ = sess.run([self.loss, self.train_t], feed_dict)
+            if i == 0:
+                # The loss before the first update is `begin`
+                continue
+        status = self.loop_status(loss, last_loss)
+        last_loss = loss
+        if status is not None:
+            break
+    if not self.config.verbose:
+        loss = sess.run(self.loss, feed_dict)
+        if status is None or status == "converged":
+            status = self.loop_status(loss, last_loss) or status
+    return i+1, loss, status or "max_steps"
+
+  def before_step(self, step, feed_dict):
     max_depth = self.config.max_depth
     if max_depth is None:
         max_depth = 2
     begin = self.gan.session.run(self.loss, feed_dict)
-    last_loss = begin
-    if last_loss < self.config.loss_threshold:
+    if self.config.loss_threshold is not None and begin < self.config.loss_threshold:
         if self.config.verbose:
             print(self.config.component, "> Loss begin " + str(begin) + " skipping training")
         return
-    learn_rate = self.initial_learn_rate / 2*(depth+1)
-    feed_dict[self.learn_rate] = learn_rate
-    if self.config.verbose:
-        print("Learn rate: ", learn_rate)
-    self.gan.session.run(self.zero_x+ self.zero_g+ [self.reset_optimizer_t])
-    for i in range((self.config.max_steps or 100)*(1+depth)):
-        _ = self.gan.session.run(self.train_t, feed_dict)
-        loss = self.gan.session.run(self.loss, feed_dict)
-        if np.any(np.isnan(loss)) or np.any(np.isinf(loss)):
-            if max_depth == depth+1:
-                print("NAN during X and G training.  Resetting.")
-                return self.before_step(step, feed_dict, depth+1)
-        convergence = 1.0-loss/last_loss
-        last_loss = loss
+    steps, loss = 0, begin
+    for depth in range(max(max_depth, 1)):
+        learn_rate = self.initial_learn_rate / 2*(depth+1)
+        feed_dict[self.learn_rate] = learn_rate
         if self.config.verbose:
-            print("Convergence:", convergence, loss)
-        if (self.config.convergence_threshold is not None and convergence < self.config.convergence_threshold) and convergence > 0.0:
-            if self.config.verbose:
-                print("Convergence threshold reached", self.config.convergence_threshold)
+            print("Learn rate: ", learn_rate)
+        self.gan.session.run(self.zero_x+ self.zero_g+ [self.reset_optimizer_t])
+        steps, loss, status = self.train_loop(feed_dict, (self.config.max_steps or 100)*(1+depth), begin)
+        if status == "converged":
             break
-
-        if self.config.loss_threshold is not None and loss < self.config.loss_threshold:
-            if self.config.verbose:
-                print("Loss threshold reached", self.config.loss_threshold)
+        if depth+1 == max_depth:
+            break
+        if status == "nan":
+            print("NAN during X and G training.  Resetting.")
+        elif self.config.loss_threshold is None or loss > self.config.loss_threshold:
+            print("No convergence, decreasing learn rate", learn_rate, depth, loss)
+        else:
             break
 
-    if i+1 == ((self.config.max_steps or 100)*(1+depth)) and loss > self.config.loss_threshold:
-        if max_depth != depth+1:
-            print("No convergence, decreasing learn rate", feed_dict[self.learn_rate], depth, loss)
-            return self.before_step(step, feed_dict, depth+1)
-
-    print(self.config.component, "> steps", i, "Loss begin " + str(begin) + " Loss end "+str(i)+":", loss, "lr", feed_dict[self.learn_rate])
+    print(self.config.component, "> steps", steps, "Loss begin " + str(begin) + " Loss end:", loss, "lr", feed_dict[self.learn_rate])
 
   def after_step(self, step, feed_dict):
     self.gan.session.run(self.zero_x+ self.zero_g)
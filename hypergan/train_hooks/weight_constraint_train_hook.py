@@ -161,7 +161,7 @@ class WeightConstraintTrainHook(BaseTrainHook):
     if "l2nn" in constraints:
       result.append(self._update_l2nn(v,i))
     if "l2nn-d" in constraints:
-      if v in d_vars:
+      if self.gan.is_d_var(v):
         result.append(self._update_l2nn(v,i))
     result = [r for r in result if r is not None]
     if(len(result) == 0):
@@ -38,18 +38,101 @@ class AlternatingTrainer(BaseTrainer):
         self.d_optimizer_t = d_optimizer_t
         self.g_optimizer = g_optimizer
         self.g_optimizer_t = g_optimizer_t
+        self.metric_sums = None
+        self.callables = {}
 
         return g_optimizer, d_optimizer
 
     def variables(self):
         return self.ops.variables() + self.d_optimizer.variables() + self.g_optimizer.variables()
 
+    def cached_train_ops(self):
+        if not self.hooks_step_in_graph():
+            return None
+        return [(self.d_optimizer_t, self.config.d_update_steps or 1), (self.g_optimizer_t, 1)]
+
+    def create_fused(self, metrics, steps):
+        """ Sums the metrics on the device across fused steps.  Created on the first fused step, once all metrics exist. """
+        # Only metrics due at least once per block are summed, the rest are fetched when their interval is crossed
+        self.fused_metrics = {name: value for name, value in metrics.items() if 0 < (self.metrics_monitor.interval(name) or 0) <= steps}
+        metrics = self.fused_metrics
+        names = sorted(metrics.keys())
+        with tf.variable_scope("dontsave_fused_metrics"):
+            self.metric_sums = [tf.Variable(0., trainable=False) for name in names]
+        with tf.control_dependencies([self.g_optimizer_t]):
+            accumulate = [s.assign_add(tf.reduce_mean(tf.cast(metrics[name], tf.float32))) for s, name in zip(self.metric_sums, names)]
+            self.fused_g_optimizer_t = tf.group([self.g_optimizer_t] + accumulate)
+        # Every update but the last of a block advances `gan.steps`, `gan.step` already advanced it once
+        with tf.control_dependencies([self.fused_g_optimizer_t]):
+            self.fused_g_advance_t = tf.group(tf.assign_add(self.gan.steps, 1))
+        self.metric_sums_t = [s.read_value() for s in self.metric_sums]
+        with tf.control_dependencies(self.metric_sums_t):
+            self.reset_metric_sums_t = tf.group([s.assign(0.) for s in self.metric_sums])
+        self.gan.session.run(tf.variables_initializer(self.metric_sums))
+
+    def callable_for(self, name, fetches, feed_dict):
+        """ Cached `session.make_callable`, skipping the per-call fetch and feed handling of `session.run`. """
+        key = (name, tuple(feed_dict.keys()))
+        if key not in self.callables:
+            self.callables[key] = self.gan.session.make_callable(fetches, list(feed_dict.keys()))
+        return self.callables[key]
+
+    def fused_steps(self):
+        steps = self.config.fused_steps or 1
+        if steps > 1 and not self.hooks_step_in_graph():
+            if not getattr(self, 'warned_fused', False):
+                print("[hypergan] Train hooks are not fused-compatible, running one update per step")
+                self.warned_fused = True
+            return 1
+        return steps
+
+    def _fused_step(self, feed_dict):
+        """
+        Runs `fused_steps` D/G iterations per call.  Hooks run once around the block, and the printed
+        metrics are averaged over it.
+        """
+        gan = self.gan
+        sess = gan.session
+        steps = self.fused_steps()
+        if self.metric_sums is None:
+            self.create_fused(gan.metrics(), steps)
+        metrics = self.fused_metrics
+        start = self.current_step
+        crossed = lambda interval: (start + steps - 1) // interval > (start - 1) // interval
+        late_metrics = {name: value for name, value in gan.metrics().items()
+                if name not in metrics and (self.metrics_monitor.interval(name) or 0) > 0 and crossed(self.metrics_monitor.interval(name))}
+
+        self.before_step(self.current_step, feed_dict)
+        d_step = self.callable_for('d', self.d_optimizer_t, feed_dict)
+        g_step = self.callable_for('g', self.fused_g_optimizer_t, feed_dict)
+        g_advance_step = self.callable_for('g_advance', self.fused_g_advance_t, feed_dict)
+        feed_values = list(feed_dict.values())
+        for k in range(steps):
+            for i in range(self.config.d_update_steps or 1):
+                d_step(*feed_values)
+            if k < steps - 1:
+                g_advance_step(*feed_values)
+            else:
+                g_step(*feed_values)
+        metric_values, _, late_values = sess.run([self.metric_sums_t, self.reset_metric_sums_t, self.output_variables(late_metrics)], feed_dict)
+        self.after_step(self.current_step, feed_dict)
+
+        self.current_step += steps - 1
+        metric_values = [v / steps for v in metric_values]
+        self.metrics_monitor.record(self.current_step, dict(zip(sorted(metrics.keys()), metric_values)))
+        if len(late_metrics) > 0:
+            self.metrics_monitor.record(self.current_step, dict(zip(sorted(late_metrics.keys()), late_values)))
+        if crossed(10):
+            print(str(self.output_string(metrics) % tuple([self.current_step] + metric_values)))
+
     def _step(self, feed_dict):
+        if self.fused_steps() > 1:
+            return self._fused_step(feed_dict)
         gan = self.gan
         sess = gan.session
         config = self.config
         loss = gan.loss
-        metrics = gan.metrics()
+        metrics = self.due_metrics()
 
         d_loss, g_loss = loss.sample
 
@@ -60,6 +143,5 @@ class AlternatingTrainer(BaseTrainer):
         metric_values = sess.run([self.g_optimizer_t] + self.output_variables(metrics), feed_dict)[1:]
         self.after_step(self.current_step, feed_dict)
 
-        if self.current_step % 10 == 0:
-            print(str(self.output_string(metrics) % tuple([self.current_step] + metric_values)))
+        self.record_metrics(metrics, metric_values)
 
@@ -1,4 +1,5 @@
 from hypergan.gan_component import GANComponent
+from hypergan.metrics import MetricsMonitor
 import hyperchamber as hc
 import tensorflow as tf
 import inspect
@@ -23,6 +24,7 @@ class BaseTrainer(GANComponent):
         g_lr = config.g_learn_rate
         d_lr = config.d_learn_rate
         self.create_called = True
+        self.metrics_monitor = MetricsMonitor(every=config.metrics_every or 10, intervals=config.metric_intervals, window=config.metrics_window or 100)
         self.global_step = tf.train.get_global_step()
         self.d_lr = d_lr
         self.g_lr = g_lr
@@ -55,6 +57,15 @@ class BaseTrainer(GANComponent):
     def required(self):
         return "".split()
 
+    def cached_train_ops(self):
+        """
+        `[(op, repeat)]` that one step runs in order, for `hypergan.graph_cache`.  None when a step needs python.
+        """
+        return None
+
+    def hooks_step_in_graph(self):
+        return all(hook.fused_compatible() for hook in self.train_hooks)
+
     def output_string(self, metrics):
         name = self.gan.name or ""
         output = name + " %2d: " 
@@ -63,6 +74,20 @@ class BaseTrainer(GANComponent):
             output += " %.2f"
         return output
 
+    def due_metrics(self):
+        """ The metrics to fetch this step, see `hypergan.metrics`. """
+        return self.metrics_monitor.due(self.gan.metrics(), self.current_step)
+
+    def record_metrics(self, metrics, metric_values, step=None):
+        """ Records fetched metrics and prints them every 10th step. """
+        if step is None:
+            step = self.current_step
+        if len(metrics) == 0:
+            return
+        self.metrics_monitor.record(step, dict(zip(sorted(metrics.keys()), metric_values)))
+        if step % 10 == 0:
+            print(str(self.output_string(metrics) % tuple([step] + list(metric_values))))
+
     def output_variables(self, metrics):
         gan = self.gan
         sess = gan.session
@@ -3,6 +3,7 @@ import numpy as np
 import hyperchamber as hc
 import inspect
 
+from hypergan.gan_component import ValidationException
 from hypergan.trainers.base_trainer import BaseTrainer
 
 TINY = 1e-12
@@ -26,14 +27,23 @@ class BatchFitnessTrainer(BaseTrainer):
         self._delegate = self.gan.create_component(config.trainer)
         ftype = config.type
 
-        self.fitness = -loss.d_fake
+        self.fitness = self.fitness_for(loss.d_fake)
+        self.zs = None
+        self.search = None
+        if self.config.device_search:
+            if getattr(gan, "latent_search", None) is None:
+                raise ValidationException("device_search is only supported on the top level trainer of a StandardGAN")
+            self.search = gan.latent_search
+            self.search.build(self.fitness_for, config.search_chunk or 1)
+
+    def fitness_for(self, d_fake):
         if self.config.reverse:
-            self.fitness = loss.d_fake
+            return d_fake
         if self.config.abs:
-            self.fitness = tf.abs(self.gan.loss.d_fake)
+            return tf.abs(d_fake)
         if self.config.nabs:
-            self.fitness = -tf.abs(self.gan.loss.d_fake)
-        self.zs = None
+            return -tf.abs(d_fake)
+        return -d_fake
 
     def variables(self):
         return self._delegate.variables()
@@ -41,16 +51,9 @@ class BatchFitnessTrainer(BaseTrainer):
     def required(self):
         return "".split()
 
-    def _step(self, feed_dict):
+    def host_search(self):
         gan = self.gan
         sess = gan.session
-        config = self.config
-        loss = self.gan.loss 
-        metrics = gan.metrics()
-
-        feed_dict = {}
-
-        fit = False
         if self.zs is None:
             d = sess.run([self.fitness,gan.latent.sample])
             fitness = d[0]
@@ -92,8 +95,25 @@ class BatchFitnessTrainer(BaseTrainer):
             sort = np.argsort(fitness)
             sort = sort[:gan.batch_size()]
             sort_zs = zs[sort]
-        feed_dict[gan.latent.sample]=sort_zs
-        self.zs = sort_zs
+        return sort_zs
+
+    def _step(self, feed_dict):
+        gan = self.gan
+        sess = gan.session
+        config = self.config
+        loss = self.gan.loss 
+        metrics = gan.metrics()
+
+        feed_dict = {}
+
+        if self.search is not None:
+            # rescore the kept batch after the first search, the models changed since it was scored
+            self.search.run(self.current_step > 0, self.config.search_steps or 2, self.config.heuristic)
+            feed_dict[self.search.selected]=True
+        else:
+            sort_zs = self.host_search()
+            feed_dict[gan.latent.sample]=sort_zs
+            self.zs = sort_zs
         
         self.before_step(self.current_step, feed_dict)
         self._delegate.step(feed_dict)
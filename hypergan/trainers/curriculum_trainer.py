@@ -4,6 +4,7 @@ import hyperchamber as hc
 import inspect
 import nashpy as nash
 import hypergan as hg
+import hypergan.inputs.image_loader
 import hyperchamber as hc
 import sys
 import gc
@@ -37,22 +38,19 @@ class CurriculumTrainer(BaseTrainer):
         self.current_step += 1
         if (self.current_step-1) == transition_step:
 
-            gan.save("saves/curriculum")
             self.curriculum_index+=1
 
             if self.config.cycle:
                 self.curriculum_index = self.curriculum_index % len(self.curriculum)
             if self.curriculum_index == len(self.curriculum):
                 print("End of curriculum")
-                gan.save("saves/curriculum")
+                gan.save("saves/curriculum", block=True)
                 gan.session.close()
                 tf.reset_default_graph()
                 sys.exit()
 
 
             print("Loading index", self.curriculum_index, self.curriculum, self.curriculum[self.curriculum_index])
-            gan.session.close()
-            tf.reset_default_graph()
 
             config_name = self.curriculum[self.curriculum_index][1]
 
@@ -67,19 +65,24 @@ class CurriculumTrainer(BaseTrainer):
                 base_config = hc.Selector().load(base_filename)
                 newconfig = hc.Config({**base_config, **newconfig})
 
-            inputs = hg.inputs.image_loader.ImageLoader(newconfig.runtime['batch_size'])
-            inputs.create(gan.args.directory,
-                  channels=newconfig.runtime['channels'], 
-                  format=gan.args.format,
-                  crop=gan.args.crop,
+            input_options = dict(batch_size=newconfig.runtime['batch_size'],
+                  channels=newconfig.runtime['channels'],
                   width=newconfig.runtime['width'],
-                  height=newconfig.runtime['height'],
-                  resize=gan.args.resize)
-
-            newgan = gan.config['class'](config=newconfig, inputs=inputs)
-            newgan.args = gan.args
-            newgan.cli = self.gan.cli
-            newgan.name=config_name
+                  height=newconfig.runtime['height'])
+            create_inputs = None
+            if not hasattr(gan.inputs, 'rebuild'):
+                def create_inputs(batch_size, channels, width, height):
+                    inputs = hg.inputs.image_loader.ImageLoader(batch_size)
+                    inputs.create(gan.args.directory,
+                          channels=channels,
+                          format=gan.args.format,
+                          crop=gan.args.crop,
+                          width=width,
+                          height=height,
+                          resize=gan.args.resize)
+                    return inputs
+
+            newgan = gan.transition(newconfig, name=config_name, create_inputs=create_inputs, **input_options)
             newgan.trainer.curriculum= self.curriculum
             newgan.trainer.curriculum_index= self.curriculum_index
             newgan.trainer.config.cycle = self.config.cycle
@@ -87,7 +90,4 @@ class CurriculumTrainer(BaseTrainer):
             gan.cli.sampler = None
             gan.destroy=True
             gan.newgan=newgan
-            gan=None
-            gc.collect()
-            newgan.load("saves/curriculum")
 
@@ -3,6 +3,7 @@ import numpy as np
 import hyperchamber as hc
 import inspect
 
+from hypergan.gan_component import ValidationException
 from hypergan.trainers.base_trainer import BaseTrainer
 
 TINY = 1e-12
@@ -22,11 +23,23 @@ class DepthTrainer(BaseTrainer):
         self.depth_step = 0
         self.fitness = -self.gan.loss.d_fake
         self.latent = None
+        self.search = None
+        if config.device_search:
+            if getattr(self.gan, "latent_search", None) is None:
+                raise ValidationException("device_search is only supported on the top level trainer of a StandardGAN")
+            if config.search_steps is None and config.heuristic is None:
+                raise ValidationException("device_search needs `search_steps` or `heuristic` to stop the search")
+            self.search = self.gan.latent_search
+            self.search.build(lambda d_fake: -d_fake, config.search_chunk or 1)
 
     def required(self):
         return "".split()
 
     def _best_latent(self):
+        if self.search is not None:
+            # the best batch stays in `search.z`, `self.latent` only records that a search has run
+            self.search.run(self.latent is not None, self.config.search_steps, self.config.heuristic)
+            return True
         if self.latent is None:
             self.latent = self.gan.session.run(self.gan.latent.sample)
         fitness = self.gan.session.run(self.fitness, {self.gan.latent.sample:self.latent})
@@ -56,6 +69,12 @@ class DepthTrainer(BaseTrainer):
                     break
         return sort_zs
 
+    def feed_latent(self, feed_dict):
+        if self.search is not None and self.config.freeze_latent == "best":
+            feed_dict[self.search.selected] = True
+        else:
+            feed_dict[self.gan.latent.sample] = self.latent
+
     def _step(self, feed_dict):
         gan = self.gan
         sess = gan.session
@@ -68,14 +87,14 @@ class DepthTrainer(BaseTrainer):
                         self.latent = self._best_latent()
                     else:
                         self.latent = self.gan.session.run(self.gan.latent.sample)
-                    feed_dict[gan.latent.sample] = self.latent
+                    self.feed_latent(feed_dict)
                 self.before_step(self.current_step, feed_dict)
                 gan.session.run(self.store_v)
                 if self.config.reset_optimizer:
                     self.gan.session.run([self.reset_optimizer_t])
 
             if self.config.freeze_latent:
-                feed_dict[gan.latent.sample] = self.latent
+                self.feed_latent(feed_dict)
             self._delegate.step(feed_dict)
             if self.current_step % depth == depth - 1:
                 gan.session.run(self.combine)
@@ -87,12 +106,12 @@ class DepthTrainer(BaseTrainer):
                         self.latent = self._best_latent()
                     else:
                         self.latent = self.gan.session.run(self.gan.latent.sample)
-                    feed_dict[gan.latent.sample] = self.latent
+                    self.feed_latent(feed_dict)
                 self.before_step(self.current_step, feed_dict)
                 gan.session.run(self.store_v)
                 self.max_gradient_mean = 0.0
             if self.config.freeze_latent:
-                feed_dict[gan.latent.sample] = self.latent
+                self.feed_latent(feed_dict)
             self._delegate.step(feed_dict)
             gradient_mean = gan.session.run(gan.gradient_mean, feed_dict)
             self.depth_step += 1
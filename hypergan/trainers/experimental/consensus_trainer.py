@@ -61,9 +61,9 @@ class ConsensusTrainer(BaseTrainer):
 
         self.g_gradient = tf.ones([1])
         def amp_for(v):
-            if v in g_vars:
+            if gan.is_g_var(v):
                 return config.g_w_lambda or 3
-            if v in d_vars:
+            if gan.is_d_var(v):
                 return config.d_w_lambda or 1
 
         def applyvec(g, jg, v, decay):
@@ -83,7 +83,7 @@ class ConsensusTrainer(BaseTrainer):
                     ng = amp_for(v)*g
             else:
                 if decay is not None:
-                    if v in g_vars:
+                    if gan.is_g_var(v):
                         ng = applyvec(g, jg, v, decay)
                     else:
                         ng = applyvec(g, jg, v, None)
@@ -4,6 +4,7 @@ import hyperchamber as hc
 import inspect
 import nashpy as nash
 import hypergan as hg
+import hypergan.inputs.image_loader
 import hyperchamber as hc
 import sys
 import gc
@@ -502,30 +503,26 @@ class GangTrainer(BaseTrainer):
             if config.recreate:
                 gan.train_coordinator.request_stop()
                 gan.train_coordinator.join(gan.input_threads)
-                gan.session.close()
-                tf.reset_default_graph()
-                #x = tf.contrib.graph_editor.copy(self.gan.inputs.x)
-                #self.gan.inputs.x = x
-                inputs = hg.inputs.image_loader.ImageLoader(gan.args.batch_size)
-                inputs.create(gan.args.directory,
-                      channels=gan.x_channels, 
-                      format=gan.args.format,
-                      crop=gan.args.crop,
-                      width=gan.x_width,
-                      height=gan.x_height,
-                      resize=gan.args.resize)
                 config_name = random.choice(self.config.mutations)
 
                 newconfig_file = hg.Configuration.find(config_name+'.json')
                 newconfig = hc.Selector().load(newconfig_file)
 
-                newgan = self.gan.config['class'](config=newconfig, inputs=inputs)
-                newgan.args = gan.args
-                newgan.x_width = gan.x_width
-                newgan.x_height = gan.x_height
-                newgan.x_channels = gan.x_channels
-                newgan.cli = self.gan.cli
-                newgan.cli.sampler = None
+                create_inputs = None
+                if not hasattr(gan.inputs, 'rebuild'):
+                    def create_inputs():
+                        inputs = hg.inputs.image_loader.ImageLoader(gan.args.batch_size)
+                        inputs.create(gan.args.directory,
+                              channels=gan.x_channels,
+                              format=gan.args.format,
+                              crop=gan.args.crop,
+                              width=gan.x_width,
+                              height=gan.x_height,
+                              resize=gan.args.resize)
+                        return inputs
+
+                # Seeds the new graph in memory and reuses the input file list instead of re-globbing the dataset
+                newgan = gan.transition(newconfig, name=gan.name, create_inputs=create_inputs)
                 gan.cli.sampler = None
                 newgan.trainer.sds = self.sds
                 newgan.trainer.sgs = self.sgs
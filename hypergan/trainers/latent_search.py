@@ -0,0 +1,97 @@
+import numpy as np
+import tensorflow as tf
+
+from hypergan.gan_component import ValidationException
+
+class LatentSearch:
+    """
+    Searches for the batch of latents with the lowest fitness on the device.
+
+    StandardGAN creates the search before the generator when the trainer sets `"device_search": true`.  The
+    best batch and its fitness live in variables, and the generator reads the best batch whenever `selected`
+    is fed as True, so the delegate trainer never fetches or feeds the latents.
+
+    `build` adds the search itself: a `tf.while_loop` that samples `chunk` candidate batches per iteration,
+    scores them with the reused generator and discriminator, and merges them into the best batch with `top_k`.
+    A whole search is one `session.run`.
+    """
+    def __init__(self, gan):
+        self.gan = gan
+        z = gan.latent.sample
+        batch_size = gan.batch_size()
+
+        with tf.variable_scope("latent_search"):
+            self.z = tf.Variable(tf.zeros(gan.ops.shape(z), dtype=z.dtype), trainable=False, name="z")
+            self.fitness = tf.Variable(tf.fill([batch_size], np.inf), trainable=False, name="fitness")
+        self.selected = tf.placeholder_with_default(False, [], name="latent_search_selected")
+        self.search_t = None
+
+    def select(self, z):
+        """ Returns the searched batch when `selected` is fed as True, otherwise `z` """
+        return tf.cond(self.selected, lambda: tf.identity(self.z), lambda: z)
+
+    def score(self, z, fitness):
+        """ The fitness of each latent in `z`, using the reused generator and discriminator """
+        gan = self.gan
+        g = gan.generator.reuse(tf.clip_by_value(z, -1., 1.))
+        d_fake = gan.discriminator.reuse(g)
+        scores = fitness(d_fake)
+        return tf.reduce_mean(tf.reshape(scores, [gan.ops.shape(z)[0], -1]), axis=1)
+
+    def build(self, fitness, chunk=1):
+        """
+        Creates `search_t`.  `fitness` maps discriminator outputs on generated samples to a fitness, lower is better.
+        Each loop iteration scores `chunk` batches of candidates at once.
+        """
+        gan = self.gan
+        batch_size = gan.batch_size()
+        latent_config = gan.config.z_distribution or gan.config.latent
+        candidate_shape = [batch_size * chunk] + gan.ops.shape(gan.latent.z)[1:]
+
+        self.keep = tf.placeholder_with_default(False, [], name="latent_search_keep")
+        self.search_steps = tf.placeholder_with_default(2, [], name="latent_search_steps")
+        self.heuristic = tf.placeholder_with_default(-1, [], name="latent_search_heuristic")
+
+        initial_fitness = tf.cond(self.keep,
+                lambda: self.score(self.z, fitness),
+                lambda: tf.fill([batch_size], np.inf))
+
+        def should_continue(i, z, f, worst, stale):
+            steps_left = tf.logical_or(self.search_steps < 0, i < self.search_steps)
+            improving = tf.logical_or(self.heuristic < 0, stale <= self.heuristic)
+            return tf.logical_and(steps_left, improving)
+
+        def search_step(i, z, f, worst, stale):
+            # sampled inside the loop body so every iteration draws new candidates
+            candidates = gan.create_component(latent_config, output_shape=candidate_shape).sample
+            candidate_fitness = tf.concat([f, self.score(candidates, fitness)], axis=0)
+            candidate_z = tf.concat([z, candidates], axis=0)
+            # top_k keeps the largest values, so search on negated fitness
+            values, indices = tf.nn.top_k(-candidate_fitness, k=batch_size)
+            f = -values
+            improved = f[-1] < worst
+            worst = tf.minimum(f[-1], worst)
+            stale = tf.where(improved, 0, stale + 1)
+            return i + 1, tf.gather(candidate_z, indices), f, worst, stale
+
+        steps, best_z, best_fitness, _, _ = tf.while_loop(should_continue, search_step,
+                [tf.constant(0), tf.identity(self.z), initial_fitness, tf.constant(np.inf, dtype=tf.float32), tf.constant(0)],
+                back_prop=False)
+        with tf.control_dependencies([self.z.assign(best_z), self.fitness.assign(best_fitness)]):
+            self.search_t = tf.identity(steps)
+
+    def run(self, keep=False, search_steps=2, heuristic=None):
+        """
+        Searches `search_steps` iterations, starting from the current best batch rescored if `keep` is set.
+        With `heuristic` the search stops early once the worst kept fitness has not improved for that many steps.
+        `search_steps` of None searches until the heuristic stops it.  Returns the number of iterations run.
+        """
+        if self.search_t is None:
+            raise ValidationException("LatentSearch.build must be called before run")
+        if search_steps is None and heuristic is None:
+            raise ValidationException("Latent search needs `search_steps` or `heuristic` to stop")
+        return self.gan.session.run(self.search_t, {
+            self.keep: keep,
+            self.search_steps: -1 if search_steps is None else search_steps,
+            self.heuristic: -1 if heuristic is None else heuristic
+        })
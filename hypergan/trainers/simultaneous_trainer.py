@@ -41,12 +41,17 @@ class SimultaneousTrainer(BaseTrainer):
     def required(self):
         return "".split()
 
+    def cached_train_ops(self):
+        if not self.hooks_step_in_graph():
+            return None
+        return [(self.optimize_t, 1)]
+
     def _step(self, feed_dict):
         gan = self.gan
         sess = gan.session
         config = self.config
         loss = gan.loss
-        metrics = gan.metrics()
+        metrics = self.due_metrics()
 
         d_loss, g_loss = loss.sample
 
@@ -54,6 +59,5 @@ class SimultaneousTrainer(BaseTrainer):
         metric_values = sess.run([self.optimize_t] + self.output_variables(metrics), feed_dict)[1:]
         self.after_step(self.current_step, feed_dict)
 
-        if self.current_step % 10 == 0:
-            print(str(self.output_string(metrics) % tuple([self.current_step] + metric_values)))
+        self.record_metrics(metrics, metric_values)
 
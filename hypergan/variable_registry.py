@@ -0,0 +1,48 @@
+import tensorflow as tf
+
+class VariableRegistry:
+    """
+    Maps each variable of a GAN to its owning component, its role(`"d"`, `"g"` or None) and whether it is trainable.
+
+    Built from `gan.d_vars()`, `gan.g_vars()` and the components' variables, and rebuilt only when components
+    are added or they create new variables.  Use through `BaseGAN.is_d_var`, `BaseGAN.is_g_var` and `BaseGAN.var_role`.
+    """
+    def __init__(self, gan):
+        self.gan = gan
+        self.version = None
+
+    def key(self):
+        gan = self.gan
+        components = [gan] + gan.components
+        count = sum([len(c.ops.weights) + len(c.ops.biases) for c in components if hasattr(c, 'ops')])
+        trainable = len(gan.graph.get_collection_ref(tf.GraphKeys.TRAINABLE_VARIABLES))
+        return (len(gan.components), count, trainable)
+
+    def refresh(self):
+        key = self.key()
+        if key == self.version:
+            return self
+        gan = self.gan
+        trainable = set(gan.graph.get_collection_ref(tf.GraphKeys.TRAINABLE_VARIABLES))
+        self.owners = {}
+        for c in [gan] + gan.components:
+            if c is not gan and not hasattr(c, 'variables'):
+                continue
+            for v in c.variables() if c is not gan else gan.ops.variables():
+                self.owners.setdefault(v, c)
+        self.d_vars = list(gan.d_vars())
+        self.g_vars = list(gan.g_vars())
+        self.roles = {}
+        for v in self.g_vars:
+            self.roles.setdefault(v, "g")
+        for v in self.d_vars:
+            self.roles[v] = "d"
+        self.trainable_d_vars = [v for v in unique(self.d_vars) if v in trainable]
+        self.trainable_g_vars = [v for v in unique(self.g_vars) if v in trainable]
+        self.trainable = trainable
+        self.version = key
+        return self
+
+def unique(variables):
+    seen = set()
+    return [v for v in variables if not (v in seen or seen.add(v))]
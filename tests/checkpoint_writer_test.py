@@ -0,0 +1,42 @@
+import numpy as np
+import os
+import tempfile
+import tensorflow as tf
+from hypergan.checkpoint_writer import CheckpointWriter
+
+class CheckpointWriterTest(tf.test.TestCase):
+    def test_write_and_rotate(self):
+        with tf.Graph().as_default():
+            v = tf.Variable(tf.zeros([2, 3]), name="generator/w")
+            writer = CheckpointWriter([v], keep=2)
+        save_file = os.path.join(tempfile.mkdtemp(), "model.ckpt")
+        for step in range(1, 4):
+            writer.save(save_file, [np.full([2, 3], step, dtype=np.float32)], step)
+            writer.wait()
+        reader = tf.train.NewCheckpointReader(save_file)
+        self.assertAllEqual(reader.get_tensor("generator/w"), np.full([2, 3], 3))
+        self.assertFalse(os.path.exists(save_file + "-1.index"))
+        self.assertTrue(os.path.exists(save_file + "-2.index"))
+        self.assertTrue(os.path.exists(save_file + "-3.index"))
+        self.assertEqual(tf.train.get_checkpoint_state(os.path.dirname(save_file)).model_checkpoint_path, save_file)
+
+    def test_write_error(self):
+        with tf.Graph().as_default():
+            v = tf.Variable(tf.zeros([2, 3]), name="generator/w")
+            writer = CheckpointWriter([v])
+        def write(save_file, values, step):
+            raise IOError("disk full")
+        writer.write = write
+        save_file = os.path.join(tempfile.mkdtemp(), "model.ckpt")
+        writer.save(save_file, [np.zeros([2, 3], dtype=np.float32)], 1)
+        with self.assertRaises(IOError):
+            writer.wait()
+        # Raised once, then cleared
+        writer.wait()
+        writer.save(save_file, [np.zeros([2, 3], dtype=np.float32)], 2)
+        writer.queue.join()
+        with self.assertRaises(IOError):
+            writer.save(save_file, [np.zeros([2, 3], dtype=np.float32)], 3)
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -2,6 +2,7 @@ import hypergan as hg
 import hyperchamber as hc
 import tensorflow as tf
 import os
+from hypergan.cli import crosses
 from hypergan.gan_component import ValidationException
 
 from tests.inputs.image_loader_test import fixture_path
@@ -53,6 +54,22 @@ class CliTest(tf.test.TestCase):
             cli.train()
             self.assertEqual(cli.gan, gan)
 
+    def test_train_fused_steps(self):
+        with self.test_session():
+            gan = mock_gan()
+            gan.trainer.config['fused_steps'] = 4
+            args = hc.Config({"size": "1", "steps": 8, "method": "train", "save_every": -1, "sample_every": 1000})
+            cli = hg.CLI(gan, args)
+            cli.train()
+            self.assertEqual(gan.trainer.current_step, 8)
+            self.assertEqual(cli.steps, 8)
+
+    def test_crosses(self):
+        self.assertTrue(crosses(0, 1, 100))
+        self.assertFalse(crosses(1, 8, 100))
+        self.assertTrue(crosses(96, 8, 100))
+        self.assertFalse(crosses(104, 8, 100))
+
     def test_adds_supervised_loss(self):
         with self.test_session():
             gan = mock_gan(y=2)
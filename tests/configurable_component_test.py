@@ -0,0 +1,55 @@
+import numpy as np
+import tensorflow as tf
+import hyperchamber as hc
+
+from hypergan.configurable_component import LayerPlan, count_params
+from hypergan.discriminators.configurable_discriminator import ConfigurableDiscriminator
+from tests.mocks import mock_gan
+
+class ConfigurableComponentTest(tf.test.TestCase):
+    def test_layer_plan(self):
+        plan = LayerPlan.compile("conv 64 stride=2 lambda=0.5 activation=relu")
+        self.assertEqual(plan.op, "conv")
+        self.assertIs(LayerPlan.compile("conv 64 stride=2 lambda=0.5 activation=relu"), plan)
+        with self.test_session():
+            gan = mock_gan()
+            args, options = plan.resolve(gan)
+            self.assertEqual(args, [64])
+            self.assertEqual(options, {"stride": 2, "lambda": 0.5, "activation": "relu"})
+            options["stride"] = 1
+            self.assertEqual(plan.resolve(gan)[1]["stride"], 2)
+
+    def test_layer_summary(self):
+        with self.test_session():
+            gan = mock_gan()
+            d = gan.discriminator
+            self.assertEqual([row[0] for row in d.layer_summary], ["linear"])
+            self.assertEqual(d.layer_summary[0][2], count_params(d.variables()))
+            for v in d.variables():
+                self.assertEqual(gan.layer_options(v)["activation"], "null")
+
+    def test_relational(self):
+        discriminator = "class:hypergan.discriminators.configurable_discriminator.ConfigurableDiscriminator"
+        relational = {"class": discriminator, "defaults": {"activation": "relu", "initializer": "he_normal"}, "layers": ["linear 5 activation=relu"]}
+        with self.test_session() as sess:
+            gan = mock_gan()
+            net = tf.constant(np.random.uniform(-1, 1, [2, 2, 2, 3]), dtype=tf.float32)
+            batched = gan.create_component({"class": discriminator, "defaults": {"activation": "null"}, "layers": ["relational"], "relational": relational}, name="batched", input=net)
+            g_theta = gan.components[-2]
+            chunked = gan.create_component({"class": discriminator, "defaults": {"activation": "null"}, "layers": ["relational chunk=4"], "relational": relational}, name="chunked", input=net)
+            chunked_g_theta = gan.components[-2]
+
+            # eq.1 evaluated one pair at a time
+            def pairwise(g_theta):
+                objects = []
+                for i in range(4):
+                    coordinates = tf.tile([[float(i // 2) / 2, (i % 2) / 2]], [2, 1])
+                    objects.append(tf.concat([net[:, i // 2, i % 2, :], coordinates], axis=1))
+                return tf.reduce_mean(tf.stack([g_theta.reuse(tf.concat([o_i, o_j], axis=1)) for o_i in objects for o_j in objects]), axis=0)
+
+            sess.run(tf.global_variables_initializer())
+            self.assertAllClose(*sess.run([batched.sample, pairwise(g_theta)]))
+            self.assertAllClose(*sess.run([chunked.sample, pairwise(chunked_g_theta)]))
+
+if __name__ == "__main__":
+    tf.test.main()
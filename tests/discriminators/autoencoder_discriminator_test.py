@@ -6,6 +6,7 @@ from hypergan.discriminators.autoencoder_discriminator import AutoencoderDiscrim
 from hypergan.gan_component import ValidationException
 from hypergan.ops import TensorflowOps
 import hypergan as hg
+import hypergan.discriminators.common
 
 from hypergan.gan_component import GANComponent
 
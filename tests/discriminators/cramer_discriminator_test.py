@@ -5,6 +5,7 @@ from hypergan.discriminators.cramer_discriminator import CramerDiscriminator
 from hypergan.gan_component import ValidationException
 from hypergan.ops import TensorflowOps
 import hypergan as hg
+import hypergan.discriminators.common
 
 from hypergan.gan_component import GANComponent
 
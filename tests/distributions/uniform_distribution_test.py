@@ -2,6 +2,7 @@ import tensorflow as tf
 import hyperchamber as hc
 import numpy as np
 import hypergan as hg
+import hypergan.distributions.uniform_distribution
 from hypergan.distributions.uniform_distribution import UniformDistribution
 from hypergan.gan_component import ValidationException
 from hypergan.ops import TensorflowOps
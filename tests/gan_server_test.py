@@ -0,0 +1,46 @@
+import numpy as np
+import tensorflow as tf
+from hypergan.gan_server import GANServer, encode, to_image
+
+class GANServerTest(tf.test.TestCase):
+    def server(self):
+        z = tf.random_uniform([4, 2], -1, 1)
+        output = tf.reshape(tf.tile(z, [1, 2]), [4, 2, 2, 1])
+        server = GANServer(tf.Session(), z, output)
+        server.start()
+        return server
+
+    def test_generate_z(self):
+        server = self.server()
+        z = [[0.5, -0.5], [0.25, 0.0]]
+        samples = server.generate(z=z)
+        self.assertEqual(samples.shape, (2, 2, 2, 1))
+        self.assertAllClose(samples[0].flatten(), [0.5, -0.5, 0.5, -0.5])
+        self.assertAllClose(samples[1].flatten(), [0.25, 0.0, 0.25, 0.0])
+        server.stop()
+
+    def test_generate_more_than_batch(self):
+        server = self.server()
+        samples = server.generate(count=10)
+        self.assertEqual(samples.shape, (10, 2, 2, 1))
+        server.stop()
+
+    def test_max_count(self):
+        server = self.server()
+        self.assertEqual(server.max_count, 16)
+        with self.assertRaises(ValueError):
+            server.generate(count=17)
+        with self.assertRaises(ValueError):
+            server.generate(z=np.zeros([17, 2]))
+        server.stop()
+
+    def test_encode(self):
+        images = to_image(np.zeros([3, 2, 2, 3]))
+        content_type, body = encode(images, 'raw')
+        self.assertEqual(len(body), 3*2*2*3)
+        content_type, body = encode(images, 'png')
+        self.assertEqual(content_type, 'image/png')
+        self.assertTrue(body.startswith(b'\x89PNG'))
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -1,4 +1,5 @@
 import hypergan as hg
+import hypergan.gans.standard_gan
 import tensorflow as tf
 from tests.mocks import MockDiscriminator, mock_gan
 
@@ -3,9 +3,10 @@ from hypergan.gan_component import ValidationException
 from hypergan.ops import TensorflowOps
 from hypergan.search.default_configurations import DefaultConfigurations
 
-from hypergan.gans.base_gan import BaseGAN
+from hypergan.gans.base_gan import BaseGAN, resize_to
 from hypergan.generators.resizable_generator import ResizableGenerator
 import hypergan as hg
+import hypergan.distributions.uniform_distribution
 import tensorflow as tf
 import hyperchamber as hc
 import numpy as np
@@ -56,5 +57,24 @@ class BaseGanTest(tf.test.TestCase):
             distribution = gan.create_component(gan.config.latent)
             self.assertEqual(type(distribution), hg.distributions.uniform_distribution.UniformDistribution)
 
+    def test_resize_to(self):
+        saved = np.ones([2, 4])
+        current = np.zeros([3, 2])
+        resized = resize_to(saved, current)
+        self.assertEqual(resized.shape, (3, 2))
+        self.assertAllEqual(resized[:2], np.ones([2, 2]))
+        self.assertAllEqual(resized[2], np.zeros([2]))
+
+    def test_variable_roles(self):
+        with self.test_session():
+            gan = mock_gan()
+            d_var = gan.discriminator.variables()[0]
+            g_var = gan.generator.variables()[0]
+            self.assertTrue(gan.is_d_var(d_var))
+            self.assertFalse(gan.is_g_var(d_var))
+            self.assertTrue(gan.is_g_var(g_var))
+            self.assertEqual(gan.variable_owner(d_var), gan.discriminator)
+            self.assertEqual(set(gan.trainable_d_vars()), set(gan.discriminator.variables()))
+
 if __name__ == "__main__":
     tf.test.main()
@@ -82,5 +82,21 @@ class StandardGanTest(tf.test.TestCase):
             self.assertEqual(gan.loss, "l_override")
             self.assertEqual(gan.trainer, "t_override")
 
+    def test_freeze_inference_graph(self):
+        with self.test_session():
+            gan = GAN(inputs = MockInput())
+            graph_def = gan.freeze_inference_graph()
+            ops = [node.op for node in graph_def.node]
+            self.assertNotIn("VariableV2", ops)
+            self.assertIn("z", [node.name for node in graph_def.node])
+            self.assertFalse(any(node.name.startswith("discriminator") for node in graph_def.node))
+
+    def test_freeze_inference_graph_rebuild_error(self):
+        with self.test_session():
+            gan = GAN(inputs = MockInput())
+            gan.create_inference_generator = MagicMock(side_effect=ValueError("Tensor must be from the same graph"))
+            with self.assertRaises(ValidationException):
+                gan.freeze_inference_graph()
+
 if __name__ == "__main__":
     tf.test.main()
@@ -1,6 +1,7 @@
 import tensorflow as tf
 import hyperchamber as hc
 import hypergan as hg
+import hypergan.discriminators.common
 import numpy as np
 from hypergan.generators.resizable_generator import ResizableGenerator
 from hypergan.ops import TensorflowOps
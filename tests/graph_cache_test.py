@@ -0,0 +1,71 @@
+import numpy as np
+import tempfile
+import tensorflow as tf
+import hyperchamber as hc
+import hypergan as hg
+
+from hypergan.gans.cached_gan import CachedGAN, CachedTrainer
+from hypergan.graph_cache import GraphCache
+from tests.mocks import MockInput, mock_config
+
+class GraphCacheTest(tf.test.TestCase):
+    def test_key(self):
+        with tf.Graph().as_default():
+            inputs = hc.Config({"x": tf.zeros([2, 4, 4, 3])})
+            a = GraphCache(self.get_temp_dir(), {"generator": {"layers": ["conv 3"]}}, inputs)
+            b = GraphCache(self.get_temp_dir(), {"generator": {"layers": ["conv 3"]}}, inputs)
+            c = GraphCache(self.get_temp_dir(), {"generator": {"layers": ["conv 6"]}}, inputs)
+            self.assertEqual(a.key(), b.key())
+            self.assertNotEqual(a.key(), c.key())
+
+    def test_cut_inputs(self):
+        graph = tf.Graph()
+        with graph.as_default():
+            x = tf.reshape(tf.range(4, dtype=tf.float32), [2, 2], name="x")
+            cache = GraphCache(self.get_temp_dir(), {}, hc.Config({"x": x}))
+            y = tf.multiply(x, 2., name="y")
+            graph_def = graph.as_graph_def()
+        placeholders = cache.cut_inputs(graph_def)
+        self.assertEqual(placeholders, {"x:0": "graph_cache/input_0"})
+        self.assertNotIn("x", [node.name for node in graph_def.node])
+
+        with tf.Graph().as_default():
+            new_x = tf.ones([2, 2])
+            y, = tf.import_graph_def(graph_def, input_map={"graph_cache/input_0:0": new_x}, return_elements=["y:0"], name="")
+            with self.test_session():
+                self.assertAllEqual(y.eval(), [[2., 2.], [2., 2.]])
+
+    def test_export_and_load(self):
+        directory = tempfile.mkdtemp()
+        with tf.Graph().as_default():
+            gan = hg.GAN(config=mock_config(), inputs=MockInput(batch_size=1), graph_cache=directory)
+            self.assertNotIsInstance(gan, CachedGAN)
+            loss = [t.name for t in gan.loss.sample]
+            train = [[op.name, repeat] for op, repeat in gan.trainer.cached_train_ops()]
+            variables = sorted([v.name for v in gan.variables()])
+            g_vars = sorted([v.name for v in gan.g_vars()])
+            metrics = sorted([name for name, t in gan.metrics().items() if hasattr(t, "graph")])
+            gan.session.close()
+
+        with tf.Graph().as_default() as graph:
+            gan = hg.GAN(config=mock_config(), inputs=MockInput(batch_size=1), graph_cache=directory)
+            self.assertIsInstance(gan, CachedGAN)
+            self.assertIsInstance(gan.trainer, CachedTrainer)
+            self.assertEqual([t.name for t in gan.loss.sample], loss)
+            self.assertTrue(all(t.graph is graph for t in gan.loss.sample))
+            self.assertEqual([[op.name, repeat] for op, repeat in gan.trainer.train], train)
+            self.assertEqual(sorted([v.name for v in gan.variables()]), variables)
+            self.assertEqual(sorted([v.name for v in gan.g_vars()]), g_vars)
+            self.assertEqual(sorted(gan.metrics().keys()), metrics)
+
+            gan.session.run(tf.global_variables_initializer())
+            before = gan.session.run(gan.g_vars())
+            gan.step()
+            after = gan.session.run(gan.g_vars())
+            self.assertEqual(gan.trainer.current_step, 1)
+            self.assertEqual(gan.session.run(gan.steps), 1)
+            self.assertTrue(any([not np.allclose(a, b) for a, b in zip(before, after)]))
+            gan.session.close()
+
+if __name__ == "__main__":
+    tf.test.main()
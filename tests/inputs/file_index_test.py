@@ -0,0 +1,38 @@
+import tensorflow as tf
+from hypergan.inputs.file_index import FileIndex
+from tests.inputs.image_loader_test import fixture_path
+import os
+import shutil
+import tempfile
+
+class FileIndexTest(tf.test.TestCase):
+    def test_filenames(self):
+        path = tempfile.mkdtemp()
+        index = FileIndex(fixture_path(), format='png', path=path)
+        self.assertEqual(len(index.filenames()), 2)
+        self.assertEqual(index.scanned, 3)
+        shutil.rmtree(path)
+
+    def test_reuses_index(self):
+        path = tempfile.mkdtemp()
+        FileIndex(fixture_path(), format='png', path=path)
+        index = FileIndex(fixture_path(), format='png', path=path)
+        self.assertEqual(index.scanned, 0)
+        self.assertEqual(len(index.filenames(natural_sort=False)), 2)
+        shutil.rmtree(path)
+
+    def test_rescans_changed_directory(self):
+        path = tempfile.mkdtemp()
+        data = tempfile.mkdtemp()
+        shutil.copy(fixture_path('white/image.png'), data+'/1.png')
+        FileIndex(data, format='png', path=path)
+        shutil.copy(fixture_path('white/image.png'), data+'/2.png')
+        os.utime(data, ns=(0, os.stat(data).st_mtime_ns + 1000))
+        index = FileIndex(data, format='png', path=path)
+        self.assertEqual(index.scanned, 1)
+        self.assertEqual(len(index.filenames()), 2)
+        shutil.rmtree(path)
+        shutil.rmtree(data)
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -3,6 +3,9 @@ import tensorflow as tf
 from hypergan.gan_component import ValidationException
 from hypergan.inputs.image_loader import ImageLoader
 import os
+import glob
+import shutil
+import tempfile
 
 def fixture_path(subpath=""):
     return os.path.dirname(os.path.realpath(__file__)) + '/fixtures/' + subpath
@@ -61,5 +64,65 @@ class ImageLoaderTest(tf.test.TestCase):
             loader.create(fixture_path('white'), width=4, height=4, format='png')
             self.assertEqual(loader.file_count, 1)
 
+    def test_load_fixture_cache(self):
+        with self.test_session():
+            cache = tempfile.mkdtemp()
+            loader = ImageLoader(1)
+            loader.create(fixture_path('white'), width=4, height=4, format='png', resize=True, cache=cache)
+            self.assertEqual(int(loader.x.get_shape()[1]), 4)
+            self.assertEqual(len(glob.glob(cache+"/*.bin")), 1)
+            loader = ImageLoader(1)
+            loader.create(fixture_path('white'), width=4, height=4, format='png', resize=True, cache=cache)
+            self.assertEqual(len(glob.glob(cache+"/*.bin")), 1)
+            shutil.rmtree(cache)
+
+    def test_cache_overwritten_file(self):
+        with self.test_session():
+            cache = tempfile.mkdtemp()
+            index = tempfile.mkdtemp()
+            data = tempfile.mkdtemp()
+            shutil.copy(fixture_path('white/image.png'), data+'/1.png')
+            loader = ImageLoader(1)
+            loader.create(data, width=4, height=4, format='png', resize=True, cache=cache, file_index=index)
+            # Overwriting in place leaves the directory mtime and file count unchanged
+            mtime = os.stat(data).st_mtime_ns
+            shutil.copy(fixture_path('black/image.png'), data+'/1.png')
+            os.utime(data+'/1.png', ns=(0, os.stat(data+'/1.png').st_mtime_ns + 10**9))
+            os.utime(data, ns=(0, mtime))
+            loader = ImageLoader(1)
+            loader.create(data, width=4, height=4, format='png', resize=True, cache=cache, file_index=index)
+            self.assertEqual(len(glob.glob(cache+"/*.bin")), 2)
+            for path in [cache, index, data]:
+                shutil.rmtree(path)
+
+    def test_load_fixture_autotune(self):
+        with self.test_session():
+            loader = ImageLoader(1)
+            loader.create(fixture_path(), width=4, height=4, format='png', autotune=True, shuffle_buffer=1)
+            self.assertEqual(loader.file_count, 2)
+            self.assertEqual(int(loader.x.get_shape()[1]), 4)
+
+    def test_input_wait(self):
+        with self.test_session() as sess:
+            loader = ImageLoader(1)
+            loader.create(fixture_path(), width=4, height=4, format='png', resize=True)
+            sess.run(tf.global_variables_initializer())
+            sess.run(loader.x)
+            sess.run(loader.x)
+            wait, count = sess.run(loader.input_wait)
+            self.assertEqual(count, 2)
+            self.assertGreaterEqual(wait, 0)
+            # Reading the wait does not dequeue
+            self.assertEqual(sess.run(loader.input_wait)[1], 2)
+
+    def test_rebuild(self):
+        with self.test_session():
+            loader = ImageLoader(32)
+            loader.create(fixture_path(), width=2, height=2, format='png', resize=True)
+            rebuilt = loader.rebuild(batch_size=16, width=4, height=4)
+            self.assertEqual(rebuilt.filenames, loader.filenames)
+            self.assertEqual(loader.x.get_shape().as_list()[:3], [32, 2, 2])
+            self.assertEqual(rebuilt.x.get_shape().as_list()[:3], [16, 4, 4])
+
 if __name__ == "__main__":
     tf.test.main()
@@ -0,0 +1,50 @@
+import hypergan as hg
+import tensorflow as tf
+from hypergan.gan_component import ValidationException
+from hypergan.inputs.record_loader import RecordLoader, write_records
+from tests.inputs.image_loader_test import fixture_path
+import os
+import shutil
+import tempfile
+
+class RecordLoaderTest(tf.test.TestCase):
+    def test_write_records(self):
+        output = tempfile.mkdtemp()
+        index = write_records(fixture_path(), output, width=4, height=4, format='png', resize=True, shard_size=1)
+        self.assertEqual(index['count'], 2)
+        self.assertEqual(len(index['shards']), 2)
+        self.assertEqual(os.path.getsize(output+'/shard-00000.hgr'), 4 + 4*4*3)
+        shutil.rmtree(output)
+
+    def test_load_records(self):
+        with self.test_session():
+            output = tempfile.mkdtemp()
+            write_records(fixture_path(), output, width=4, height=4, format='png', resize=True)
+            loader = RecordLoader(1)
+            loader.create(output, width=4, height=4)
+            self.assertEqual(loader.file_count, 2)
+            self.assertEqual(int(loader.x.get_shape()[1]), 4)
+            shutil.rmtree(output)
+
+    def test_load_wrong_size(self):
+        output = tempfile.mkdtemp()
+        write_records(fixture_path(), output, width=4, height=4, format='png', resize=True)
+        with self.assertRaises(ValidationException):
+            loader = RecordLoader(1)
+            loader.create(output, width=8, height=8)
+        shutil.rmtree(output)
+
+    def test_rebuild(self):
+        with self.test_session():
+            output = tempfile.mkdtemp()
+            write_records(fixture_path(), output, width=4, height=4, format='png', resize=True)
+            loader = RecordLoader(1)
+            loader.create(output, width=4, height=4)
+            rebuilt = loader.rebuild(batch_size=2)
+            self.assertEqual(rebuilt.x.get_shape().as_list(), [2, 4, 4, 3])
+            with self.assertRaises(ValidationException):
+                loader.rebuild(width=8, height=8)
+            shutil.rmtree(output)
+
+if __name__ == "__main__":
+    tf.test.main()
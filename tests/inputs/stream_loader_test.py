@@ -0,0 +1,48 @@
+import tensorflow as tf
+from hypergan.gan_component import ValidationException
+from hypergan.inputs.stream_loader import StreamLoader
+from tests.inputs.image_loader_test import fixture_path
+import os
+import shutil
+import tempfile
+
+def write_atomic(src, dst):
+    # The loader may list the directory mid copy, only rename complete files into place
+    tmp = os.path.join(os.path.dirname(dst), '.' + os.path.basename(dst) + '.tmp')
+    shutil.copy(src, tmp)
+    os.rename(tmp, dst)
+
+class StreamLoaderTest(tf.test.TestCase):
+    def test_tail_directory(self):
+        with self.test_session() as sess:
+            data = tempfile.mkdtemp()
+            loader = StreamLoader(2)
+            loader.create(data, width=4, height=4, format='png', resize=True, poll_interval=0.1)
+            write_atomic(fixture_path('white/image.png'), data+'/1.png')
+            write_atomic(fixture_path('black/image.png'), data+'/2.png')
+            x = sess.run(loader.x)
+            self.assertEqual(x.shape, (2, 4, 4, 3))
+            self.assertEqual(loader.file_count, 2)
+            loader.stop()
+            shutil.rmtree(data)
+
+    def test_rebuild(self):
+        with self.test_session() as sess:
+            data = tempfile.mkdtemp()
+            loader = StreamLoader(2)
+            loader.create(data, width=4, height=4, format='png', resize=True, poll_interval=0.1)
+            thread = loader.thread
+            rebuilt = loader.rebuild(batch_size=1, width=8, height=8)
+            self.assertIs(rebuilt.thread, thread)
+            write_atomic(fixture_path('white/image.png'), data+'/1.png')
+            self.assertEqual(sess.run(rebuilt.x).shape, (1, 8, 8, 3))
+            rebuilt.stop()
+            shutil.rmtree(data)
+
+    def test_invalid_source(self):
+        with self.assertRaises(ValidationException):
+            loader = StreamLoader(2)
+            loader.create(fixture_path('white/image.png'), format='png')
+
+if __name__ == "__main__":
+    tf.test.main()
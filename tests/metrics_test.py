@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+import tensorflow as tf
+from hypergan.metrics import MetricsMonitor, MetricsWriter
+
+class MetricsTest(tf.test.TestCase):
+    def test_due(self):
+        monitor = MetricsMonitor(every=10, intervals={"slow": 100, "off": 0})
+        metrics = {"fast": 1, "slow": 2, "off": 3}
+        self.assertEqual(monitor.due(metrics, 5), {})
+        self.assertEqual(sorted(monitor.due(metrics, 10).keys()), ["fast"])
+        self.assertEqual(sorted(monitor.due(metrics, 100).keys()), ["fast", "slow"])
+
+    def test_history(self):
+        monitor = MetricsMonitor(window=2)
+        for step, value in enumerate([1., 3., 5.]):
+            monitor.record(step, {"loss": value})
+        summary = monitor.summary()["loss"]
+        self.assertEqual(summary["latest"], 5.)
+        self.assertEqual(summary["mean"], 4.)
+        self.assertEqual(summary["min"], 3.)
+        self.assertEqual(summary["max"], 5.)
+
+    def test_writer(self):
+        path = os.path.join(tempfile.mkdtemp(), "metrics.jsonl")
+        writer = MetricsWriter(path)
+        writer.write(10, {"loss": 1.5})
+        writer.write(20, {"loss": 0.5})
+        writer.flush()
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row["step"] for row in rows], [10, 20])
+        self.assertEqual(rows[1]["loss"], 0.5)
+
+    def test_csv(self):
+        writer = MetricsWriter()
+        self.assertEqual(writer.format("metrics.csv", 10, 0., {"b": 1.0, "a": 2.0}), "10,0.000,a,2.0\n10,0.000,b,1.0\n")
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -4,8 +4,8 @@ import hypergan as hg
 
 from hypergan.gan_component import GANComponent
 
-def mock_gan(batch_size=1, y=1, config=None):
-    mock_config = config or hc.Config({
+def mock_config():
+    return hc.Config({
         "latent": {
             "class": "function:hypergan.distributions.uniform_distribution.UniformDistribution",
             "max": 1,
@@ -53,7 +53,9 @@ def mock_gan(batch_size=1, y=1, config=None):
 
         }
     })
-    return hg.GAN(config=mock_config, inputs=MockInput(batch_size=batch_size, y=y))
+
+def mock_gan(batch_size=1, y=1, config=None, inputs=None):
+    return hg.GAN(config=config or mock_config(), inputs=inputs or MockInput(batch_size=batch_size, y=y))
 
 class MockDiscriminator(GANComponent):
     def create(self):
@@ -0,0 +1,57 @@
+import numpy as np
+import tensorflow as tf
+
+from hypergan.ops.tensorflow.extended_ops import bicubic_interp_2d, chunked_attention
+
+def hermite(A, B, C, D, t):
+    a = -A / 2.0 + (3.0*B) / 2.0 - (3.0*C) / 2.0 + D / 2.0
+    b = A - (5.0*B) / 2.0 + 2.0*C - D / 2.0
+    c = -A / 2.0 + C / 2.0
+    return a*t*t*t + b*t*t + c*t + B
+
+def bicubic_reference(x, new_size, endpoint):
+    """ The per-pixel formula `bicubic_interp_2d` gathered before it was separable """
+    height, width = x.shape[1:3]
+    def samples(size, new):
+        f = np.linspace(0., size-1, new) if endpoint else np.linspace(0., size, new, endpoint=False)
+        i = f.astype(np.int32)
+        return [np.clip(i + k - 1, 0, size-1) for k in range(4)], f - np.floor(f)
+    ys, y_t = samples(height, new_size[0])
+    xs, x_t = samples(width, new_size[1])
+    y_t = y_t[None, :, None, None]
+    x_t = x_t[None, None, :, None]
+    cols = [hermite(*[x[:, ys[j]][:, :, xs[i]] for i in range(4)], x_t) for j in range(4)]
+    return hermite(*cols, y_t)
+
+class ExtendedOpsTest(tf.test.TestCase):
+    def attention(self, softmax):
+        q = tf.constant(np.random.normal(size=[2, 16, 4]), dtype=tf.float32)
+        k = tf.constant(np.random.normal(size=[2, 16, 4]), dtype=tf.float32)
+        v = tf.constant(np.random.normal(size=[2, 16, 3]), dtype=tf.float32)
+        s = tf.matmul(q, k, transpose_b=True)
+        expected = tf.matmul(tf.nn.softmax(s) if softmax else s / 16., v)
+        chunked = chunked_attention(q, k, v, 4, softmax=softmax)
+        d_output = tf.constant(np.random.normal(size=[2, 16, 3]), dtype=tf.float32)
+        with self.test_session():
+            self.assertAllClose(chunked.eval(), expected.eval(), atol=1e-5)
+            for a, b in zip(tf.gradients(chunked, [q, k, v], d_output), tf.gradients(expected, [q, k, v], d_output)):
+                self.assertAllClose(a.eval(), b.eval(), atol=1e-4)
+
+    def test_chunked_attention(self):
+        self.attention(softmax=True)
+
+    def test_chunked_attention_dot_product(self):
+        self.attention(softmax=False)
+
+    def test_bicubic_interp_2d(self):
+        x = np.random.normal(size=[3, 4, 6, 2]).astype(np.float32)
+        input_ = tf.placeholder(tf.float32, [None, 4, 6, 2])
+        with self.test_session() as sess:
+            for endpoint in [False, True]:
+                resized = bicubic_interp_2d(input_, [8, 12], endpoint=endpoint)
+                self.assertEqual(resized.get_shape().as_list(), [None, 8, 12, 2])
+                for batch in [x, x[:1]]:
+                    self.assertAllClose(sess.run(resized, {input_: batch}), bicubic_reference(batch, [8, 12], endpoint), atol=1e-5)
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,23 @@
+import tensorflow as tf
+
+from hypergan.registry import Registry, lookup, samplers
+from hypergan.samplers.static_batch_sampler import StaticBatchSampler
+
+class RegistryTest(tf.test.TestCase):
+    def test_lookup(self):
+        self.assertEqual(lookup("function:tensorflow.nn.tanh"), tf.nn.tanh)
+        self.assertEqual(lookup("class:hypergan.samplers.static_batch_sampler.StaticBatchSampler"), StaticBatchSampler)
+
+    def test_register(self):
+        registry = Registry()
+        registry.register("static", "hypergan.samplers.static_batch_sampler.StaticBatchSampler")
+        self.assertTrue("static" in registry)
+        self.assertEqual(registry.entries["static"], "hypergan.samplers.static_batch_sampler.StaticBatchSampler")
+        self.assertEqual(registry.get("static"), StaticBatchSampler)
+        self.assertEqual(registry.get("missing"), None)
+
+    def test_samplers(self):
+        self.assertEqual(samplers.get("static_batch"), StaticBatchSampler)
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,36 @@
+import numpy as np
+import os
+import tempfile
+import tensorflow as tf
+from hypergan.sample_sinks import RawFrameSink, VideoSink, read_frames, sink_for
+from unittest.mock import patch
+
+class SampleSinksTest(tf.test.TestCase):
+    def test_raw_frames(self):
+        path = tempfile.mkdtemp()
+        sink = RawFrameSink(path)
+        first = np.arange(4*4*3, dtype=np.uint8).reshape([4, 4, 3])
+        second = np.ones([2, 6, 3], dtype=np.uint8)
+        sink.write(first, "samples/000000.png")
+        sink.write(second, "samples/000001.png")
+        sink.close()
+        frames = list(read_frames(path))
+        self.assertEqual([name for name, _ in frames], ["000000.png", "000001.png"])
+        self.assertAllEqual(frames[0][1], first)
+        self.assertAllEqual(frames[1][1], second)
+
+    def test_video_fallback(self):
+        path = tempfile.mkdtemp()
+        with patch.dict(os.environ, {"PATH": tempfile.mkdtemp()}):
+            sink = VideoSink(path)
+        self.assertIsInstance(sink.fallback, RawFrameSink)
+        sink.write(np.zeros([4, 4, 3], dtype=np.uint8), "000000.png")
+        sink.close()
+        self.assertEqual(len(list(read_frames(path))), 1)
+
+    def test_unknown_sink(self):
+        with self.assertRaises(ValueError):
+            sink_for("gif", tempfile.mkdtemp())
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,54 @@
+import numpy as np
+import os
+import tempfile
+import tensorflow as tf
+from unittest.mock import patch
+from hypergan.sample_writer import SampleWriter, to_uint8
+
+class SampleWriterTest(tf.test.TestCase):
+    def test_to_uint8(self):
+        image = to_uint8(np.array([[[-2., 0., 1.]]]))
+        self.assertEqual(image.dtype, np.uint8)
+        self.assertEqual(image[0], 0)
+        self.assertEqual(image[2], 255)
+
+    def test_write(self):
+        writer = SampleWriter(enabled=True)
+        filename = os.path.join(tempfile.mkdtemp(), "sample.png")
+        writer.write(None, np.zeros([1, 4, 4, 3]), filename, True)
+        writer.queue.join()
+        self.assertTrue(os.path.isfile(filename))
+        self.assertEqual(writer.latest[1].shape, (4, 4, 3))
+
+    def test_write_error(self):
+        writer = SampleWriter(enabled=True)
+        directory = tempfile.mkdtemp()
+        # A directory in place of the file makes the first write fail
+        os.makedirs(os.path.join(directory, "bad.png"))
+        writer.write(None, np.zeros([1, 4, 4, 3]), os.path.join(directory, "bad.png"), True)
+        writer.queue.join()
+        self.assertEqual(writer.failed, 1)
+        filename = os.path.join(directory, "sample.png")
+        writer.write(None, np.zeros([1, 4, 4, 3]), filename, True)
+        writer.queue.join()
+        self.assertTrue(os.path.isfile(filename))
+
+    def test_ring(self):
+        writer = SampleWriter(enabled=True)
+        writer.set_ring_size(2)
+        for i in range(3):
+            writer.remember(None, np.full([2, 2, 3], i, dtype=np.uint8))
+        self.assertEqual([frame[1][0, 0, 0] for frame in writer.ring], [1, 2])
+        with patch("hypergan.sample_writer.GlobalViewer") as viewer:
+            writer.scrub(1)
+            self.assertEqual(viewer.update.call_args[0][1][0, 0, 0], 1)
+            writer.scrub(5)
+            self.assertEqual(writer.scrub_offset, 1)
+            writer.latest = (None, np.zeros([2, 2, 3], dtype=np.uint8))
+            writer.update_viewer()
+            self.assertEqual(viewer.update.call_count, 2)
+            writer.scrub(-1)
+            self.assertEqual(viewer.update.call_args[0][1][0, 0, 0], 2)
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,38 @@
+import tensorflow as tf
+import numpy as np
+from tests.mocks import mock_config, mock_gan
+
+from hypergan.train_hooks.experimental.input_fitness_train_hook import InputFitnessTrainHook
+
+class RandomInput:
+    def __init__(self, batch_size=4):
+        self.x = tf.random_uniform([batch_size, 32, 32, 1], -1, 1)
+        self.y = tf.constant(1., shape=[batch_size, 1], dtype=tf.float32)
+        self.sample = [self.x, self.y]
+
+class InputFitnessTrainHookTest(tf.test.TestCase):
+    def test_cache_matches_scored_batch(self):
+        with self.test_session():
+            config = mock_config()
+            config["fixed_input"] = True
+            gan = mock_gan(config=config, inputs=RandomInput())
+            hook = InputFitnessTrainHook(gan=gan, config={}, trainer=gan.trainer)
+            sess = gan.session
+            sess.run(tf.variables_initializer([hook.cache, hook.cache_fitness]))
+            sess.run(gan.set_x)
+
+            def assert_cache_scored():
+                # The kept fitness must be the score of the kept batch, not of the next one
+                kept = sess.run(hook.cache_fitness)
+                sess.run(hook.restore_cache)
+                self.assertAllClose(np.sort(sess.run(hook.fitness)), np.sort(kept))
+
+            for i in range(5):
+                sess.run(hook.store_and_sample)
+                assert_cache_scored()
+                sess.run(gan.set_x)
+                sess.run(hook.select_and_sample)
+                assert_cache_scored()
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -40,5 +40,24 @@ class AlternatingTrainerTest(tf.test.TestCase):
             self.assertTrue('d_loss' in trainer.output_string({'d_loss':c}))
             self.assertTrue('g_loss' in trainer.output_string({'g_loss':c}))
             self.assertEqual(len(trainer.output_variables({'a': c, 'b': c})), 2)
+
+    def test_fused_steps(self):
+        with self.test_session():
+            gan = mock_gan()
+            gan.trainer.config['fused_steps'] = 3
+            gan.step()
+            self.assertEqual(gan.trainer.current_step, 3)
+            gan.step()
+            self.assertEqual(gan.trainer.current_step, 6)
+            self.assertEqual(gan.session.run(gan.steps), 6)
+
+    def test_fused_steps_of_one(self):
+        with self.test_session():
+            gan = mock_gan()
+            gan.trainer.config['fused_steps'] = 1
+            gan.step()
+            self.assertEqual(gan.trainer.current_step, 1)
+            self.assertEqual(gan.trainer.metric_sums, None)
+
 if __name__ == "__main__":
     tf.test.main()
@@ -0,0 +1,47 @@
+import numpy as np
+import tensorflow as tf
+from tests.mocks import mock_gan, mock_config
+
+class LatentSearchTest(tf.test.TestCase):
+    def search_gan(self, batch_size=4):
+        config = mock_config()
+        config["trainer"] = dict(config.trainer, device_search=True)
+        return mock_gan(batch_size=batch_size, config=config)
+
+    def test_keeps_lowest_fitness(self):
+        with self.test_session():
+            gan = self.search_gan()
+            search = gan.latent_search
+            fitness = lambda d_fake: d_fake
+            search.build(fitness, chunk=2)
+            gan.session.run(tf.global_variables_initializer())
+            self.assertEqual(search.run(False, search_steps=5), 5)
+            best = gan.session.run(search.fitness)
+            self.assertAllClose(np.sort(best), best)
+            # the kept batch is scored by the same generator and discriminator the trainer uses
+            self.assertAllClose(gan.session.run(search.score(search.z, fitness)), best)
+            worst = best[-1]
+            search.run(True, search_steps=5)
+            self.assertTrue(gan.session.run(search.fitness)[-1] <= worst)
+
+    def test_selected_feeds_generator(self):
+        with self.test_session():
+            gan = self.search_gan()
+            search = gan.latent_search
+            search.build(lambda d_fake: d_fake)
+            gan.session.run(tf.global_variables_initializer())
+            search.run(False, search_steps=2)
+            expected = gan.session.run(gan.generator.sample, {gan.latent.sample: gan.session.run(search.z)})
+            self.assertAllClose(gan.session.run(gan.generator.sample, {search.selected: True}), expected)
+
+    def test_heuristic_stops(self):
+        with self.test_session():
+            gan = self.search_gan()
+            search = gan.latent_search
+            search.build(lambda d_fake: d_fake)
+            gan.session.run(tf.global_variables_initializer())
+            steps = search.run(False, search_steps=None, heuristic=0)
+            self.assertTrue(steps >= 1)
+
+if __name__ == "__main__":
+    tf.test.main()